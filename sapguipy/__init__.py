@@ -1 +1,14 @@
-from .sap import *
\ No newline at end of file
+from .sap import *
+from .pool import SessionPool
+from .orchestrator import Orchestrator
+from .broker import SessionBroker
+from .batch import BatchRunner
+from .rules import Rule, RuleEngine
+
+
+def __getattr__(name):
+    # asyncio (e ssl, concurrent.futures) só é importado por quem usa AsyncSapGui.
+    if name == 'AsyncSapGui':
+        from .async_sap import AsyncSapGui
+        return AsyncSapGui
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,209 @@
+from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+from sapguipy.sap import SapGui
+from sapguipy.models.exceptions import ConnectionLost, WaitTimeout
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+# Marca o fim de um iterador consumido na thread COM.
+_DONE = object()
+
+
+class AsyncElement:
+    """
+    Awaitable proxy of an element returned by AsyncSapGui.find_by_id. The element lives in the
+    COM thread of its session, so every method runs there:
+
+        button = await sap.find_by_id('wnd[0]/tbar[1]/btn[8]')
+        await button.press()
+        text = await field.get('text')
+        async for chunk in grid.aiter('iter_shell_table', chunk_rows=5000):
+            ...
+    """
+    def __init__(self, owner: 'AsyncSapGui', wrapper):
+        self._owner = owner
+        self.wrapper = wrapper
+
+    def __getattr__(self, name):
+        method = getattr(type(self.wrapper), name, None)
+        if not callable(method):
+            raise AttributeError(f"'{type(self.wrapper).__name__}' has no method '{name}', use get('{name}') for properties.")
+
+        async def call(*args, **kwargs):
+            return await self._owner.run(lambda sap: getattr(self.wrapper, name)(*args, **kwargs))
+        return call
+
+    async def get(self, name: str):
+        """Returns the value of a property of the element, like 'text' or 'rows_count'."""
+        return await self._owner.run(lambda sap: getattr(self.wrapper, name))
+
+    async def aiter(self, name: str, *args, **kwargs):
+        """
+        Runs a generator method of the element (iter_shell_table, iter_rows, iter_nodes...) in the
+        COM thread and yields its items, each one as soon as it is ready.
+        """
+        iterator = await self._owner.run(lambda sap: iter(getattr(self.wrapper, name)(*args, **kwargs)))
+        while True:
+            item = await self._owner.run(lambda sap: next(iterator, _DONE))
+            if item is _DONE:
+                return
+            yield item
+
+    def __repr__(self):
+        return f'<AsyncElement {self.wrapper!r}>'
+
+
+class AsyncSapGui:
+    """
+    asyncio facade of a SapGui object. The session is driven by a thread of its own, with its own
+    COM apartment, and every call is queued to that thread, so the COM threading rules are kept
+    and the event loop is never blocked. Several AsyncSapGui objects can run at the same time.
+
+        async with AsyncSapGui(SapGui(sid='PRD', user='USR', pwd='AnPassword', mandante='900')) as sap:
+            await sap.open_transaction('VA03')
+            table = await sap.read_shell_table('wnd[0]/usr/cntlGRID1/shellcont/shell', types=True)
+
+    Elements returned by find_by_id are AsyncElement proxies. Anything else can be run in the
+    COM thread with run(func), which calls func(sap) with the SapGui object.
+
+    A lost connection, detected by the monitor started by `async with`, makes the next call
+    raise ConnectionLost.
+    """
+    def __init__(self, sap: SapGui, executor: ThreadPoolExecutor = None):
+        """
+        sap: SapGui object to drive, not started yet (or already started in the thread of `executor`).
+        executor: single-thread executor that owns the session. By default a new one is created.
+        """
+        self.sap = sap
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='sapguipy-com', initializer=sap.backend.initialize_thread
+            )
+
+    async def __aenter__(self):
+        await self.start_sap()
+        await self.run(lambda sap: sap.start_monitor())
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            await self.run(lambda sap: sap.__exit__(exc_type, exc_value, traceback), check_connection=False)
+        finally:
+            await self.close()
+
+    async def run(self, func, *args, check_connection: bool = True, **kwargs):
+        """
+        Runs func(sap, *args, **kwargs) in the COM thread of the session and returns its result.
+
+        Raises:
+            ConnectionLost: if the connection monitor has detected that the connection was lost.
+        """
+        monitor = self.sap.monitor
+        if check_connection and monitor is not None and monitor.lost.is_set():
+            raise ConnectionLost(f'The SAP connection was lost: {monitor.error}')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, self.sap, *args, **kwargs))
+
+    async def close(self):
+        """Releases the COM thread of the session, if it was created by this object."""
+        if not self._owns_executor:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.sap.backend.uninitialize_thread)
+        await loop.run_in_executor(None, partial(self._executor.shutdown, wait=True))
+
+    # Sessão
+    async def start_sap(self, timeout: float = 60):
+        await self.run(lambda sap: sap.start_sap(timeout))
+        return self
+
+    async def attach(self, application, timeout: float = 60):
+        await self.run(lambda sap: sap.attach(application, timeout))
+        return self
+
+    async def login(self):
+        await self.run(SapGui.login)
+
+    async def logoff(self):
+        await self.run(SapGui.logoff)
+
+    async def quit(self, timeout: float = 10):
+        await self.run(lambda sap: sap.quit(timeout), check_connection=False)
+
+    async def open_transaction(self, transacao: str):
+        await self.run(lambda sap: sap.open_transaction(transacao))
+
+    async def get_user_logged(self):
+        return await self.run(SapGui.get_user_logged)
+
+    async def dump_screen(self, window: str = 'wnd[0]', depth: int = None) -> dict:
+        return await self.run(lambda sap: sap.dump_screen(window, depth))
+
+    async def new_window(self, timeout: float = 30) -> 'AsyncSapGui':
+        """
+        Opens a new session in the connection. The new session is driven by the same COM thread,
+        where its scripting objects were created.
+        """
+        window = await self.run(lambda sap: sap.new_window(timeout))
+        return AsyncSapGui(window, executor=self._executor)
+
+    # Elementos
+    async def find_by_id(self, element_id: str, raise_error: bool = True) -> 'AsyncElement|None':
+        wrapper = await self.run(lambda sap: sap.find_by_id(element_id, raise_error))
+        return None if wrapper is None else AsyncElement(self, wrapper)
+
+    async def read_shell_table(self, element_id: str, **options) -> 'DataFrame':
+        """Reads a grid with GuiShell.read_shell_table. options: columns, types and formats."""
+        return await self.run(lambda sap: sap.find_by_id(element_id).read_shell_table(**options))
+
+    async def export_to_file(self, element_id: str, path, **options) -> 'DataFrame':
+        """Exports a grid with GuiShell.export_to_file."""
+        return await self.run(lambda sap: sap.find_by_id(element_id).export_to_file(path, **options))
+
+    async def read_table(self, element_id: str, **options) -> 'DataFrame':
+        """Reads a table control with GuiTableControl.read_table."""
+        return await self.run(lambda sap: sap.find_by_id(element_id).read_table(**options))
+
+    async def read_tree(self, element_id: str, **options) -> 'DataFrame':
+        """Reads a tree with GuiTree.read_tree."""
+        return await self.run(lambda sap: sap.find_by_id(element_id).read_tree(**options))
+
+    # Esperas
+    async def wait_until(self, condition, timeout: float = 30, interval: float = 0.05, max_interval: float = 1.0, description: str = 'condition'):
+        """
+        Like sapguipy.wait.wait_until, but condition(sap) runs in the COM thread and the waiting
+        between polls is done in the event loop, so the COM thread is free for other calls.
+
+        Raises:
+            WaitTimeout: if the condition is not met within `timeout` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = interval
+        last_error = None
+        while True:
+            try:
+                result = await self.run(condition)
+                if result:
+                    return result
+            except ConnectionLost:
+                raise
+            except Exception as e:
+                last_error = e
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                message = f'Timed out after {timeout}s waiting for {description}.'
+                if last_error is not None:
+                    message += f' Last error: {last_error}'
+                raise WaitTimeout(message)
+
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_interval)
+
+    async def wait_until_idle(self, timeout: float = 30):
+        """Waits until the session is no longer busy. See SapGui.wait_until_idle."""
+        await self.wait_until(lambda sap: not sap.session.Busy, timeout, interval=0.01, max_interval=0.25, description='the session to be idle')
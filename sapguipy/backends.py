@@ -0,0 +1,152 @@
+from contextlib import nullcontext
+from platform import system
+
+
+class Backend:
+    """
+    Operations that depend on the operating system: COM apartments, the SAPGUI object,
+    desktop windows and processes. SapGui and SessionPool only use SAP through this
+    interface, so the Windows-only packages are imported when they are first needed.
+    """
+    supported = False
+
+    def initialize_thread(self):
+        """Prepares the current thread to use the scripting objects."""
+
+    def uninitialize_thread(self):
+        """Releases what initialize_thread prepared."""
+
+    def get_sapgui_object(self):
+        """Returns the 'SAPGUI' object registered by saplogon."""
+        raise Exception('This library only supports Windows OS')
+
+    def marshal(self, com_object):
+        """Packs a scripting object so it can be used from another thread."""
+        return False, com_object
+
+    def unmarshal(self, packed):
+        """Returns, in the current thread, the scripting object packed by marshal."""
+        _, com_object = packed
+        return com_object
+
+    def find_windows(self, title: str) -> list:
+        """Returns the desktop windows whose title contains `title`."""
+        return []
+
+    def close_window(self, window):
+        """Closes a window returned by find_windows."""
+
+    def launch_lock(self):
+        """
+        Returns a context manager held while sapshcut is launched and its connection is found,
+        so processes of the same Windows user do not take each other's new connection.
+        """
+        return nullcontext()
+
+    def process_tree(self, pid: int) -> set:
+        """Returns the PID and the PIDs of all descendants of the process `pid` that are still running."""
+        return set()
+
+    def terminate_processes(self, pids: set, timeout: float = 10) -> set:
+        """
+        Asks the processes to terminate, waits up to `timeout` seconds and kills the ones
+        still running. Returns the PIDs that had to be killed.
+        """
+        return set()
+
+
+class WindowsBackend(Backend):
+    """Backend based on pywin32, pywinauto, pygetwindow and psutil."""
+    supported = True
+
+    def initialize_thread(self):
+        from pythoncom import CoInitialize
+        CoInitialize()
+
+    def uninitialize_thread(self):
+        from pythoncom import CoUninitialize
+        CoUninitialize()
+
+    def get_sapgui_object(self):
+        import win32com.client
+        return win32com.client.GetObject('SAPGUI')
+
+    def marshal(self, com_object):
+        if not hasattr(com_object, '_oleobj_'):
+            return super().marshal(com_object)
+        import pythoncom
+        return True, pythoncom.CoMarshalInterThreadInterfaceInStream(pythoncom.IID_IDispatch, com_object._oleobj_)
+
+    def unmarshal(self, packed):
+        marshalled, payload = packed
+        if not marshalled:
+            return payload
+        import pythoncom
+        import win32com.client
+        return win32com.client.Dispatch(pythoncom.CoGetInterfaceAndReleaseStream(payload, pythoncom.IID_IDispatch))
+
+    def find_windows(self, title: str) -> list:
+        import pygetwindow as gw
+        return gw.getWindowsWithTitle(title)
+
+    def close_window(self, window):
+        from pywinauto import Application
+        app = Application().connect(handle=window._hWnd)
+        app.window(handle=window._hWnd).close()
+
+    def launch_lock(self):
+        return _NamedMutex('Local\\sapguipy-launch')
+
+    def process_tree(self, pid: int) -> set:
+        import psutil
+        try:
+            process = psutil.Process(pid)
+            return {pid} | {child.pid for child in process.children(recursive=True)}
+        except psutil.NoSuchProcess:
+            return set()
+
+    def terminate_processes(self, pids: set, timeout: float = 10) -> set:
+        import psutil
+        processes = []
+        for pid in pids:
+            try:
+                processes.append(psutil.Process(pid))
+            except psutil.NoSuchProcess:
+                pass
+        for process in processes:
+            try:
+                process.terminate()
+            except psutil.NoSuchProcess:
+                pass
+        _, alive = psutil.wait_procs(processes, timeout=timeout)
+        for process in alive:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        return {process.pid for process in alive}
+
+
+class _NamedMutex:
+    """Windows mutex shared by every process of the session that opens it by name."""
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        import win32event
+        self.handle = win32event.CreateMutex(None, False, self.name)
+        win32event.WaitForSingleObject(self.handle, win32event.INFINITE)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        import win32api
+        import win32event
+        win32event.ReleaseMutex(self.handle)
+        win32api.CloseHandle(self.handle)
+
+
+def get_backend() -> Backend:
+    """Returns the backend of the current operating system."""
+    if system() == 'Windows':
+        return WindowsBackend()
+    return Backend()
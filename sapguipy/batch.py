@@ -0,0 +1,213 @@
+from datetime import datetime
+from pathlib import Path
+from time import monotonic
+import json
+import os
+from sapguipy.models.exceptions import ConnectionLost
+from sapguipy.models.sap_controls import _iter_records
+
+# Tipos de mensagem da barra de status que indicam que o item falhou.
+FAILED_MESSAGE_TYPES = ('Error', 'Abort')
+
+
+def _serializable(value):
+    """Returns the value itself if it can be written to the journal, otherwise a text version of it."""
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+class JsonlJournal:
+    """Journal kept as a JSON Lines file. Every entry is flushed to disk before the next item starts."""
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def entries(self) -> list:
+        if not self.path.exists():
+            return []
+        entries = []
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Última linha cortada por uma queda durante a gravação.
+                    continue
+        return entries
+
+    def record(self, entry: dict):
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+    def close(self):
+        ...
+
+
+class SqliteJournal:
+    """Journal kept in a SQLite database, one row per item, committed after each item."""
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = Path(path)
+        self._connection = sqlite3.connect(str(self.path))
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS items ('
+            'key TEXT PRIMARY KEY, position INTEGER, status TEXT, message_type TEXT, message TEXT, '
+            'error TEXT, result TEXT, seconds REAL, finished_at TEXT)'
+            )
+        self._connection.commit()
+
+    def entries(self) -> list:
+        cursor = self._connection.execute(
+            'SELECT key, position, status, message_type, message, error, result, seconds, finished_at FROM items ORDER BY position'
+            )
+        columns = [description[0] for description in cursor.description]
+        entries = [dict(zip(columns, row)) for row in cursor]
+        for entry in entries:
+            entry['result'] = json.loads(entry['result']) if entry['result'] is not None else None
+        return entries
+
+    def record(self, entry: dict):
+        values = dict(entry, result=json.dumps(entry['result'], ensure_ascii=False))
+        self._connection.execute(
+            'INSERT OR REPLACE INTO items (key, position, status, message_type, message, error, result, seconds, finished_at) '
+            'VALUES (:key, :position, :status, :message_type, :message, :error, :result, :seconds, :finished_at)',
+            values
+            )
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+
+def open_journal(path):
+    """Opens the journal of a batch: SQLite for .db, .sqlite and .sqlite3 files, JSON Lines otherwise."""
+    if Path(path).suffix.lower() in ('.db', '.sqlite', '.sqlite3'):
+        return SqliteJournal(path)
+    return JsonlJournal(path)
+
+
+class BatchRunner:
+    """
+    Runs a step function for every item of a batch and keeps a journal of the items done, so
+    a batch interrupted by a crash of SAP GUI can be started again and goes on from where it stopped.
+
+        def create_order(sap, item):
+            sap.open_transaction('VA01')
+            ...
+            sap.find_by_id('wnd[0]/tbar[0]/btn[11]').press()
+
+        runner = BatchRunner(sap, create_order, 'orders.jsonl', key=lambda item: item['order_ref'])
+        results = runner.run(orders_dataframe)
+        runner.metrics  # {'done': 980, 'failed': 20, 'skipped': 0, 'items_per_minute': 41.3, ...}
+
+    After each item the status bar is read and recorded with the item. An item is 'done' if the step
+    returned and the status bar does not show an error, 'failed' otherwise. A lost connection
+    (ConnectionLost) stops the batch without recording the current item.
+    """
+    def __init__(self, sap, step, journal, key=None, retry_failed: bool = True):
+        """
+        sap: logged SapGui object.
+        step: callable(sap, item) run for every item. Its return value is recorded in the journal.
+        journal: path of the journal file, see open_journal.
+        key: callable(item) returning the text that identifies the item between runs.
+        Defaults to the position of the item in the batch.
+        retry_failed: if True, failed items are run again when the batch is restarted.
+        """
+        self.sap = sap
+        self.step = step
+        self.journal_path = Path(journal)
+        self.key = key
+        self.retry_failed = retry_failed
+        self.metrics = {}
+
+    def _item_key(self, position: int, item) -> str:
+        return str(position if self.key is None else self.key(item))
+
+    def _read_statusbar(self) -> tuple:
+        try:
+            statusbar = self.sap.find_by_id('wnd[0]/sbar')
+            return statusbar.message_type, statusbar.get_text()
+        except ConnectionLost:
+            raise
+        except Exception:
+            return None, None
+
+    def completed(self) -> set:
+        """Keys of the items already done (and failed, if retry_failed is False) according to the journal."""
+        journal = open_journal(self.journal_path)
+        try:
+            statuses = {entry['key']: entry['status'] for entry in journal.entries()}
+        finally:
+            journal.close()
+        finished = ('done',) if self.retry_failed else ('done', 'failed')
+        return {key for key, status in statuses.items() if status in finished}
+
+    def run(self, items) -> list:
+        """
+        Runs the step for every item not yet completed and returns the journal entries of the items
+        run now, in order. items: iterable, or a pandas DataFrame (each row is given as a dict).
+        """
+        if hasattr(items, 'itertuples'):
+            columns, rows = _iter_records(items)
+            items = (dict(zip(columns, row)) for row in rows)
+
+        completed = self.completed()
+        journal = open_journal(self.journal_path)
+        entries = []
+        done = failed = skipped = 0
+        start = monotonic()
+        try:
+            for position, item in enumerate(items):
+                key = self._item_key(position, item)
+                if key in completed:
+                    skipped += 1
+                    continue
+
+                item_start = monotonic()
+                result = error = None
+                try:
+                    result = self.step(self.sap, item)
+                except ConnectionLost:
+                    raise
+                except Exception as e:
+                    error = f'{type(e).__name__}: {e}'
+                message_type, message = self._read_statusbar()
+
+                status = 'failed' if error is not None or message_type in FAILED_MESSAGE_TYPES else 'done'
+                entry = {
+                    'key': key,
+                    'position': position,
+                    'status': status,
+                    'message_type': message_type,
+                    'message': message,
+                    'error': error,
+                    'result': _serializable(result),
+                    'seconds': monotonic() - item_start,
+                    'finished_at': datetime.now().isoformat(timespec='seconds'),
+                }
+                journal.record(entry)
+                entries.append(entry)
+                if status == 'done':
+                    done += 1
+                else:
+                    failed += 1
+        finally:
+            journal.close()
+            elapsed = monotonic() - start
+            self.metrics = {
+                'items': done + failed + skipped,
+                'done': done,
+                'failed': failed,
+                'skipped': skipped,
+                'elapsed_seconds': elapsed,
+                'items_per_minute': (done + failed) / elapsed * 60 if elapsed else 0.0,
+            }
+        return entries
@@ -0,0 +1,215 @@
+from threading import Thread, Event, Lock
+from time import monotonic
+from sapguipy.sap import SapGui
+
+# Janelas fechadas, no máximo, ao devolver uma sessão: fechar um popup pode abrir uma confirmação.
+MAX_POPUPS = 10
+
+
+def _start_sap(sid: str, user: str, pwd: str, mandante: str, **options) -> SapGui:
+    sap = SapGui(sid=sid, user=user, pwd=pwd, mandante=mandante, **options)
+    sap.start_sap()
+    return sap
+
+
+class _Entry:
+    __slots__ = ('sap', 'key', 'packed', 'last_activity', 'idle_since', 'healthy')
+
+    def __init__(self, sap: SapGui, key: tuple):
+        self.sap = sap
+        self.key = key
+        self.packed = None
+        self.last_activity = monotonic()
+        self.idle_since = None
+        self.healthy = True
+
+
+class _Lease:
+    def __init__(self, broker: 'SessionBroker', args: tuple, options: dict):
+        self.broker = broker
+        self.args = args
+        self.options = options
+        self.sap = None
+
+    def __enter__(self) -> SapGui:
+        self.sap = self.broker.acquire(*self.args, **self.options)
+        return self.sap
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.broker.release(self.sap)
+
+
+class SessionBroker:
+    """
+    Keeps logged SAP sessions warm and leases them, so back-to-back jobs do not pay for a
+    new sapshcut launch and logon each time.
+
+        broker = SessionBroker(keep_alive=300)
+        with broker.lease('PRD', 'USR', 'AnPassword', '900') as sap:
+            sap.open_transaction('SU01D')
+        ...
+        broker.close()
+
+    Sessions are kept by (sid, mandante, user). When a lease ends, open popups are closed and
+    the session goes back to the initial screen ('/n'); if that fails, the session is discarded.
+    While a session is idle, a background thread sends it a '/n' command every `keep_alive`
+    seconds, so the server does not end it for inactivity.
+
+    The broker must be used from the thread that created it, since that thread owns the
+    scripting objects; the keep-alive thread uses marshalled copies of them, which only it
+    creates and releases.
+    """
+    def __init__(self, keep_alive: float = 300, max_idle: float = None, factory=_start_sap):
+        """
+        keep_alive: seconds of inactivity after which an idle session gets a keep-alive command.
+        max_idle: seconds after which an idle session is closed instead of being leased. None keeps it forever.
+        factory: callable(sid, user, pwd, mandante, **options) that returns a logged SapGui.
+        """
+        self.keep_alive = keep_alive
+        self.max_idle = max_idle
+        self.factory = factory
+        self.stats = {'created': 0, 'reused': 0, 'recycled': 0, 'keep_alives': 0}
+        self._idle = []
+        self._lock = Lock()
+        self._stop = Event()
+        # Acorda a thread de keep-alive para soltar os proxies das sessões emprestadas.
+        self._wake = Event()
+        self._backend = None
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def lease(self, sid: str, user: str, pwd: str, mandante: str, **options) -> _Lease:
+        """Context manager that acquires a session on enter and releases it on exit."""
+        return _Lease(self, (sid, user, pwd, mandante), options)
+
+    def acquire(self, sid: str, user: str, pwd: str, mandante: str, **options) -> SapGui:
+        """
+        Returns a logged SapGui for (sid, mandante, user): an idle healthy one if there is any,
+        otherwise a new one built by the factory.
+        """
+        key = (sid, mandante, user)
+        while True:
+            with self._lock:
+                entry = next((entry for entry in self._idle if entry.key == key), None)
+                if entry is not None:
+                    self._idle.remove(entry)
+                    self._wake.set()
+            if entry is None:
+                break
+            if self._expired(entry) or not entry.healthy or not self._is_healthy(entry.sap):
+                self._discard(entry.sap)
+                continue
+            self.stats['reused'] += 1
+            return entry.sap
+
+        sap = self.factory(sid, user, pwd, mandante, **options)
+        self.stats['created'] += 1
+        return sap
+
+    def release(self, sap: SapGui):
+        """
+        Gives a leased session back to the broker. The session is reset to the initial screen,
+        or discarded if that is not possible.
+        """
+        try:
+            self._reset(sap)
+        except Exception:
+            self._discard(sap)
+            return
+
+        entry = _Entry(sap, (sap.sid, sap.mandante, sap.user))
+        entry.idle_since = monotonic()
+        entry.packed = sap.backend.marshal(getattr(sap.session, '_com_object', sap.session))
+        with self._lock:
+            self._idle.append(entry)
+        self._start_keep_alive(sap.backend)
+
+    def close(self):
+        """Stops the keep-alive thread and closes every idle session."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._discard(entry.sap)
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def _expired(self, entry: _Entry) -> bool:
+        return self.max_idle is not None and monotonic() - entry.idle_since > self.max_idle
+
+    def _is_healthy(self, sap: SapGui) -> bool:
+        try:
+            return not sap.session.Busy and sap.get_user_logged() is not None
+        except Exception:
+            return False
+
+    def _reset(self, sap: SapGui):
+        """Closes the popups, topmost first, and goes back to the initial screen."""
+        for _ in range(MAX_POPUPS):
+            window = sap.session.ActiveWindow
+            if window.Id.endswith('wnd[0]'):
+                break
+            window.Close()
+            sap._after_action()
+        else:
+            if not sap.session.ActiveWindow.Id.endswith('wnd[0]'):
+                raise Exception(f'The popups of the session are still open after closing {MAX_POPUPS} windows.')
+        sap.session.EndTransaction()
+        sap._after_action()
+        if not self._is_healthy(sap):
+            raise Exception('The session is not logged anymore.')
+
+    def _discard(self, sap: SapGui):
+        self.stats['recycled'] += 1
+        try:
+            sap.quit()
+        except Exception:
+            # A sessão já caiu ou o processo já foi encerrado.
+            pass
+
+    def _start_keep_alive(self, backend):
+        if self._thread is not None or not self.keep_alive:
+            return
+        self._backend = backend
+        self._stop.clear()
+        self._thread = Thread(target=self._keep_alive_loop, daemon=True)
+        self._thread.start()
+
+    def _keep_alive_loop(self):
+        self._backend.initialize_thread()
+        # Proxies desempacotados nesta thread, por entrada: pelas regras do COM, só ela pode liberá-los.
+        proxies = {}
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(min(self.keep_alive, 1.0))
+                self._wake.clear()
+                with self._lock:
+                    for entry in [entry for entry in proxies if entry not in self._idle]:
+                        del proxies[entry]
+                    if self._stop.is_set():
+                        break
+                    for entry in self._idle:
+                        if not entry.healthy or monotonic() - entry.last_activity < self.keep_alive:
+                            continue
+                        try:
+                            if entry not in proxies:
+                                proxies[entry] = self._backend.unmarshal(entry.packed)
+                            proxies[entry].SendCommand('/n')
+                            self.stats['keep_alives'] += 1
+                        except Exception:
+                            entry.healthy = False
+                        entry.last_activity = monotonic()
+        finally:
+            proxies.clear()
+            self._backend.uninitialize_thread()
@@ -0,0 +1,211 @@
+from typing import TYPE_CHECKING
+import re
+
+if TYPE_CHECKING:
+    from pandas import DataFrame, Series
+
+# Formato numérico do perfil do usuário (SU3) -> (separador de milhar, separador decimal).
+NUMBER_FORMATS = {
+    '1.234.567,89': ('.', ','),
+    '1,234,567.89': (',', '.'),
+    '1 234 567,89': (' ', ','),
+}
+
+# Formato de data do perfil do usuário (SU3) -> formato do strptime.
+DATE_FORMATS = {
+    'DD.MM.YYYY': '%d.%m.%Y',
+    'MM/DD/YYYY': '%m/%d/%Y',
+    'MM-DD-YYYY': '%m-%d-%Y',
+    'YYYY.MM.DD': '%Y.%m.%d',
+    'YYYY/MM/DD': '%Y/%m/%d',
+    'YYYY-MM-DD': '%Y-%m-%d',
+}
+
+# Tipos ABAP (internos e do dicionário) -> tipo da conversão.
+ABAP_TYPES = {
+    'C': 'text', 'N': 'text', 'STRING': 'text', 'CHAR': 'text', 'NUMC': 'text', 'CUKY': 'text', 'UNIT': 'text', 'LANG': 'text', 'CLNT': 'text',
+    'D': 'date', 'DATS': 'date',
+    'T': 'time', 'TIMS': 'time',
+    'I': 'integer', 'B': 'integer', 'S': 'integer', '8': 'integer', 'INT1': 'integer', 'INT2': 'integer', 'INT4': 'integer', 'INT8': 'integer',
+    'P': 'number', 'F': 'number', 'CURR': 'number', 'QUAN': 'number', 'DEC': 'number', 'FLTP': 'number',
+}
+
+TYPES = ('text', 'category', 'number', 'integer', 'date', 'time')
+
+_TIME_PATTERN = r'\d{1,2}:\d{2}:\d{2}'
+
+def _text(values) -> 'Series':
+    from pandas import Series
+    return Series(values, copy=False).astype(str).str.strip()
+
+def _number_pattern(number_format: str) -> str:
+    thousands, decimal = (re.escape(separator) for separator in NUMBER_FORMATS[number_format])
+    return rf'[-+]?(?:\d{{1,3}}(?:{thousands}\d{{3}})+|\d+)(?:{decimal}\d*)?-?'
+
+def _date_pattern(date_format: str) -> str:
+    pattern = re.escape(date_format)
+    return pattern.replace('DD', r'\d{2}').replace('MM', r'\d{2}').replace('YYYY', r'\d{4}')
+
+def to_number(values, number_format: str = '1.234.567,89') -> 'Series':
+    """
+    Converts texts like '1.234,56', '-3' or '12,5-' (SAP's trailing minus) to float64.
+    Empty or invalid texts become NaN.
+    """
+    from pandas import to_numeric
+
+    thousands, decimal = NUMBER_FORMATS[number_format]
+    text = _text(values)
+    negative = text.str.endswith('-')
+    text = text.str.rstrip('-').str.replace(thousands, '', regex=False).str.replace(decimal, '.', regex=False)
+    numbers = to_numeric(text, errors='coerce').astype('float64')
+    return numbers.where(~negative, -numbers)
+
+def to_integer(values, number_format: str = '1.234.567,89', downcast: bool = True) -> 'Series':
+    """
+    Like to_number, but returns the smallest integer dtype that holds the values, or the
+    nullable Int64 when there are empty values.
+    downcast: if False, the dtype is always Int64, whatever the values.
+    """
+    from pandas import to_numeric
+
+    numbers = to_number(values, number_format)
+    if not downcast or numbers.isna().any():
+        return numbers.round().astype('Int64')
+    return to_numeric(numbers.round().astype('int64'), downcast='integer')
+
+def to_date(values, date_format: str = 'DD.MM.YYYY') -> 'Series':
+    """Converts dates in the user's date format to datetime64. Empty dates and '00.00.0000' become NaT."""
+    from pandas import to_datetime
+    return to_datetime(_text(values), format=DATE_FORMATS[date_format], errors='coerce')
+
+def to_time(values) -> 'Series':
+    """Converts times like '13:45:10' to timedelta64. Empty times become NaT."""
+    from pandas import to_timedelta
+    return to_timedelta(_text(values).where(lambda text: text != ''), errors='coerce')
+
+def to_category(values) -> 'Series':
+    """Stores the texts as a categorical, with empty texts as missing values."""
+    text = _text(values)
+    return text.where(text != '').astype('category')
+
+def _matches(text: 'Series', kind: str, number_format: str, date_format: str) -> 'Series':
+    """Tells which texts (stripped and non-empty) are written the way the type expects."""
+    if kind == 'date':
+        return text.str.fullmatch(_date_pattern(date_format))
+    if kind == 'time':
+        return text.str.fullmatch(_TIME_PATTERN)
+    numbers = text.str.fullmatch(_number_pattern(number_format))
+    if kind == 'integer':
+        return numbers & ~text.str.contains(NUMBER_FORMATS[number_format][1], regex=False)
+    return numbers
+
+def infer_type(values, number_format: str = '1.234.567,89', date_format: str = 'DD.MM.YYYY', category_ratio: float = 0.5) -> str:
+    """
+    Returns the conversion type of a column of texts, looking at its non-empty values:
+    'date', 'time', 'integer' or 'number' when all of them match the format, otherwise 'category'
+    when there are few distinct values (at most category_ratio of the values) or 'text'.
+
+    Numbers with leading zeros, like document numbers, are kept as text.
+    """
+    text = _text(values)
+    text = text[text != '']
+    if text.empty:
+        return 'text'
+    if _matches(text, 'date', number_format, date_format).all():
+        return 'date'
+    if _matches(text, 'time', number_format, date_format).all():
+        return 'time'
+    if _matches(text, 'number', number_format, date_format).all() and not text.str.match(r'[-+]?0\d').any():
+        return 'integer' if _matches(text, 'integer', number_format, date_format).all() else 'number'
+    if text.nunique() <= category_ratio * len(text):
+        return 'category'
+    return 'text'
+
+def infer_types(frame: 'DataFrame', number_format: str = '1.234.567,89', date_format: str = 'DD.MM.YYYY', category_ratio: float = 0.5) -> dict:
+    """Returns the conversion type of each column of a frame of texts. See infer_type."""
+    return {column: infer_type(frame[column], number_format, date_format, category_ratio) for column in frame.columns}
+
+def convert_table(frame: 'DataFrame', types: dict = None, number_format: str = '1.234.567,89', date_format: str = 'DD.MM.YYYY', category_ratio: float = 0.5) -> 'DataFrame':
+    """
+    Converts a frame of texts in SAP's display format to typed columns. Each column is converted
+    at once with vectorised pandas operations.
+
+    types: column -> 'text', 'category', 'number', 'integer', 'date' or 'time'. An ABAP type
+    ('P', 'DATS', 'CURR'...) is also accepted. The types of the other columns are inferred (see infer_type).
+    number_format: decimal notation of the SAP user, one of NUMBER_FORMATS.
+    date_format: date format of the SAP user, one of DATE_FORMATS.
+    """
+    _check_formats(number_format, date_format)
+    types = dict(types or {})
+    converted = {}
+    for column in frame.columns:
+        kind = types.get(column)
+        if kind is None:
+            kind = infer_type(frame[column], number_format, date_format, category_ratio)
+        converted[column] = _convert_column(frame[column], column, kind, number_format, date_format)
+
+    from pandas import DataFrame
+    return DataFrame(converted, index=frame.index, columns=frame.columns)
+
+def _check_formats(number_format: str, date_format: str):
+    if number_format not in NUMBER_FORMATS:
+        raise ValueError(f"Unknown number format '{number_format}'. Use one of: {', '.join(NUMBER_FORMATS)}.")
+    if date_format not in DATE_FORMATS:
+        raise ValueError(f"Unknown date format '{date_format}'. Use one of: {', '.join(DATE_FORMATS)}.")
+
+def _convert_column(values, column, kind: str, number_format: str, date_format: str, downcast: bool = True) -> 'Series':
+    kind = ABAP_TYPES.get(str(kind).upper(), kind)
+    if kind == 'number':
+        return to_number(values, number_format)
+    if kind == 'integer':
+        return to_integer(values, number_format, downcast)
+    if kind == 'date':
+        return to_date(values, date_format)
+    if kind == 'time':
+        return to_time(values)
+    if kind == 'category':
+        return to_category(values)
+    if kind == 'text':
+        return values
+    raise ValueError(f"Unknown type '{kind}' for column '{column}'. Use one of: {', '.join(TYPES)}.")
+
+def abap_types(types: dict) -> dict:
+    """Maps ABAP types to conversion types, leaving out the ABAP types that are not known."""
+    return {column: ABAP_TYPES[kind.upper()] for column, kind in types.items() if isinstance(kind, str) and kind.upper() in ABAP_TYPES}
+
+def convert_chunks(chunks, types: dict = None, number_format: str = '1.234.567,89', date_format: str = 'DD.MM.YYYY', category_ratio: float = 0.5):
+    """
+    Converts consecutive chunks of the same table like convert_table. The types inferred from the
+    first chunk are used for all of them and every chunk gets the same dtypes, so the chunks can
+    be concatenated: integers are always Int64 and categories are kept as text, since the
+    categories of the whole table are only known at the end (use to_category after concatenating).
+
+    Raises:
+        ValueError: if a later chunk has values that do not fit the type inferred from the first
+        one. Pass the type of that column in `types`.
+    """
+    _check_formats(number_format, date_format)
+    types = dict(types or {})
+    schema = None
+    inferred = {}
+    for frame in chunks:
+        if schema is None:
+            untyped = [column for column in frame.columns if column not in types]
+            inferred = infer_types(frame[untyped], number_format, date_format, category_ratio)
+            schema = {**inferred, **types}
+
+        converted = {}
+        for column in frame.columns:
+            kind = ABAP_TYPES.get(str(schema.get(column, 'text')).upper(), schema.get(column, 'text'))
+            if column in inferred and kind not in ('text', 'category'):
+                text = _text(frame[column])
+                invalid = text[(text != '') & ~_matches(text, kind, number_format, date_format)]
+                if not invalid.empty:
+                    raise ValueError(
+                        f"Column '{column}' was inferred as '{kind}' from the first chunk, but row {invalid.index[0]} "
+                        f"has the value {invalid.iloc[0]!r}. Pass its type in types."
+                        )
+            converted[column] = frame[column] if kind == 'category' else _convert_column(frame[column], column, kind, number_format, date_format, downcast=False)
+
+        from pandas import DataFrame
+        yield DataFrame(converted, index=frame.index, columns=frame.columns)
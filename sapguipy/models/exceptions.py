@@ -1,2 +1,14 @@
 class ElementNotFound(Exception):
     ...
+
+class WaitTimeout(TimeoutError):
+    ...
+
+class ConnectionLost(Exception):
+    ...
+
+class ScreenRuleError(Exception):
+    ...
+
+class RetryRequested(ScreenRuleError):
+    ...
@@ -0,0 +1,111 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+# Formato -> posição do formato na lista do diálogo "Salvar lista em arquivo" do ALV.
+EXPORT_FORMATS = {'unconverted': 0, 'spreadsheet': 1}
+
+def _unique_names(names: list) -> list:
+    """ALV grids may have repeated column titles. Repeated names get a suffix, like pandas does."""
+    seen = {}
+    unique = []
+    for name in names:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        unique.append(name if count == 0 else f'{name}.{count}')
+    return unique
+
+def iter_unconverted(lines):
+    """
+    Yields the header and then the rows of a list saved in the 'unconverted' format:
+
+        18.10.2026        Dynamic List Display        1
+        ----------------------------------------
+        |Material  |Plnt|  Quantity|
+        ----------------------------------------
+        |100-100   |1000|    10,000|
+
+    Only the lines between vertical bars are read. The header repeated at each page break is skipped.
+    """
+    header = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.startswith('|'):
+            continue
+        values = [value.strip() for value in line[1:-1 if line.endswith('|') else None].split('|')]
+        if header is None:
+            header = values
+            yield header
+        elif values != header:
+            yield values
+
+def iter_spreadsheet(lines):
+    """
+    Yields the header and then the rows of a list saved in the 'spreadsheet' (tab separated) format.
+
+    The title lines before the header are skipped, as well as the empty column that SAP adds at
+    the beginning of each line and the header repeated at each page break.
+    """
+    header = None
+    first = 0
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if '\t' not in line:
+            continue
+        values = line.split('\t')
+        if header is None:
+            first = next((index for index, value in enumerate(values) if value.strip()), 0)
+            header = [value.strip() for value in values[first:]]
+            yield header
+            continue
+        values = [value.strip() for value in values[first:first + len(header)]]
+        if values != header:
+            yield values
+
+_PARSERS = {'unconverted': iter_unconverted, 'spreadsheet': iter_spreadsheet}
+
+def iter_export_file(path, format: str = 'unconverted', chunk_rows: int = 100000, encoding: str = 'utf-8-sig'):
+    """
+    Yields a file exported from an ALV grid as consecutive pandas DataFrames of at most chunk_rows rows.
+
+    The file is read line by line, so only one chunk is kept in memory. The values are kept as
+    text, like in GuiShell.read_shell_table.
+    format: 'unconverted' or 'spreadsheet'.
+    """
+    if format not in _PARSERS:
+        raise ValueError(f"Unknown export format '{format}'. Use one of: {', '.join(_PARSERS)}.")
+    if chunk_rows <= 0:
+        raise ValueError('chunk_rows must be greater than zero.')
+    from pandas import DataFrame
+
+    with open(path, encoding=encoding, errors='replace', newline='') as file:
+        rows = _PARSERS[format](file)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _unique_names(header)
+        width = len(columns)
+        chunk = []
+        chunk_start = 0
+        for values in rows:
+            if len(values) != width:
+                values = (values + [''] * width)[:width]
+            chunk.append(values)
+            if len(chunk) == chunk_rows:
+                yield DataFrame(chunk, columns=columns, index=range(chunk_start, chunk_start + len(chunk)))
+                chunk_start += len(chunk)
+                chunk = []
+        if chunk or chunk_start == 0:
+            yield DataFrame(chunk, columns=columns, index=range(chunk_start, chunk_start + len(chunk)))
+
+def read_export_file(path, format: str = 'unconverted', encoding: str = 'utf-8-sig') -> 'DataFrame':
+    """
+    Returns a file exported from an ALV grid as a pandas DataFrame. See iter_export_file.
+    """
+    from pandas import DataFrame, concat
+
+    chunks = list(iter_export_file(path, format, encoding=encoding))
+    if not chunks:
+        return DataFrame()
+    return chunks[0] if len(chunks) == 1 else concat(chunks)
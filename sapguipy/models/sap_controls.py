@@ -1,8 +1,150 @@
-from pandas import DataFrame
+from typing import TYPE_CHECKING
+from itertools import islice
+from time import perf_counter
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from pandas import DataFrame
+
+# IDs do diálogo "Salvar lista em arquivo" do ALV.
+EXPORT_FORMAT_ID = 'wnd[1]/usr/subSUBSCREEN_STEPLOOP:SAPLSPO5:0150/sub:SAPLSPO5:0150/radSPOPLI-SELFLAG[{index},0]'
+EXPORT_PATH_ID = 'wnd[1]/usr/ctxtDY_PATH'
+EXPORT_FILENAME_ID = 'wnd[1]/usr/ctxtDY_FILENAME'
+EXPORT_ENCODING_ID = 'wnd[1]/usr/ctxtDY_FILE_ENCODING'
+# Código de página do SAP para UTF-8.
+EXPORT_ENCODING = '4310'
+
+# Propriedades lidas por padrão em snapshot().
+SNAPSHOT_PROPERTIES = ('Id', 'Type', 'Name', 'Text', 'Left', 'Top', 'Width', 'Height', 'Tooltip', 'Changeable')
+
+# Tipo do elemento -> propriedades que ele não possui, descobertas no primeiro snapshot de cada tipo.
+_MISSING_PROPERTIES = {}
+
+class ElementSnapshot:
+    """
+    Immutable record with the properties of an element, read in a single pass.
+    Properties that the element does not have are None.
+
+        snapshot = element.snapshot()
+        snapshot.Text, snapshot['Left'], snapshot.as_dict()
+    """
+    __slots__ = ('_values',)
+
+    def __init__(self, values: dict):
+        object.__setattr__(self, '_values', values)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ElementSnapshot is immutable.')
+
+    def __eq__(self, other):
+        return isinstance(other, ElementSnapshot) and self._values == other._values
+
+    def __hash__(self):
+        return hash(tuple(self._values.items()))
+
+    def __repr__(self):
+        return f"ElementSnapshot({self._values!r})"
+
+    def as_dict(self) -> dict:
+        return dict(self._values)
+
+def snapshot_element(element, properties: tuple = SNAPSHOT_PROPERTIES) -> ElementSnapshot:
+    """
+    Reads the given properties of a raw scripting element into an ElementSnapshot.
+
+    The properties that an element type does not have are remembered, so they are
+    not requested again for other elements of the same type.
+    """
+    element_type = element.Type
+    missing = _MISSING_PROPERTIES.setdefault(element_type, set())
+    values = {}
+    for prop in properties:
+        if prop == 'Type':
+            values[prop] = element_type
+            continue
+        if prop in missing:
+            values[prop] = None
+            continue
+        try:
+            values[prop] = getattr(element, prop)
+        except AttributeError:
+            missing.add(prop)
+            values[prop] = None
+        except Exception:
+            values[prop] = None
+    return ElementSnapshot(values)
+
+def snapshot_elements(elements, properties: tuple = SNAPSHOT_PROPERTIES) -> list:
+    """
+    Returns an ElementSnapshot for each element. Accepts wrappers or raw scripting elements.
+    """
+    return [
+        snapshot_element(getattr(element, 'element', element), properties)
+        for element in elements
+        ]
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+def _iter_records(rows, columns: list = None):
+    """
+    Returns the column names and an iterator of value tuples for a pandas DataFrame,
+    an iterable of dicts or an iterable of sequences (these need `columns`).
+    """
+    if hasattr(rows, 'itertuples'):
+        columns = list(rows.columns) if columns is None else list(columns)
+        return columns, rows[columns].itertuples(index=False, name=None)
+
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return list(columns or []), iter(())
+    if isinstance(first, dict):
+        columns = list(first) if columns is None else list(columns)
+        records = (tuple(row.get(column) for column in columns) for row in rows)
+        return columns, _chain_first(tuple(first.get(column) for column in columns), records)
+    if columns is None:
+        raise ValueError('columns is required when the rows are sequences.')
+    return list(columns), _chain_first(tuple(first), (tuple(row) for row in rows))
+
+def _chain_first(first, rest):
+    yield first
+    yield from rest
+
 class GuiVComponent:
+    # Chamado após ações que vão ao servidor (definido pelo SapGui que criou o elemento).
+    _on_action = None
+    # Devolve o elemento bruto com o ID informado (definido pelo SapGui que criou o elemento).
+    _find_element = None
+    # Se True, o construtor recebe também a instância do SapGui (usado para listar os filhos).
+    _takes_session = False
+
     def __init__(self, element):
         self.element = element
 
+    def snapshot(self, properties: tuple = SNAPSHOT_PROPERTIES) -> ElementSnapshot:
+        """
+        Returns the given properties of the element, read at once, as an immutable ElementSnapshot.
+        """
+        return snapshot_element(self.element, properties)
+
+    def _action_done(self):
+        """
+        Notifies the SapGui object that created this element that an action went to the server,
+        so it can clear its element cache and, in auto_wait mode, wait for the session to be idle.
+        """
+        if self._on_action is not None:
+            self._on_action()
+
     @property
     def id(self):
         return self.element.Id
@@ -10,6 +152,11 @@ class GuiVComponent:
     @property
     def name(self):
         return self.element.Name
+
+    @property
+    def type(self):
+        return self.element.Type
+
     @property
     def changeable(self):
         if not hasattr(self.element, 'changeable'):
@@ -89,6 +236,7 @@ class GuiButton(GuiVComponent):
     def press(self):
         """Presses the button."""
         self.element.Press()
+        self._action_done()
 
 class GuiTextField(GuiVComponent):
     def __init__(self, element):
@@ -102,6 +250,12 @@ class GuiTextField(GuiVComponent):
         """Returns the text of the text field."""
         return self.element.Text
 
+class GuiPasswordField(GuiTextField):
+    ...
+
+class GuiOkCodeField(GuiTextField):
+    ...
+
 class GuiComboBox(GuiVComponent):
     def __init__(self, element):
         self.element = element
@@ -109,6 +263,7 @@ class GuiComboBox(GuiVComponent):
     def select_entry(self, entry):
         """Selects an entry in the combo box."""
         self.element.Key = entry
+        self._action_done()
 
 class GuiCheckBox(GuiVComponent):
     def __init__(self, element):
@@ -122,6 +277,19 @@ class GuiCheckBox(GuiVComponent):
         """Sets the value of the CheckBox."""
         self.element.Selected = value
 
+class GuiRadioButton(GuiVComponent):
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def selected(self):
+        return self.element.Selected
+
+    def select(self):
+        """Selects the radio button."""
+        self.element.Select()
+        self._action_done()
+
 class GuiCTextField(GuiVComponent):
     def __init__(self, element):
         self.element = element
@@ -141,26 +309,13 @@ class GuiTab(GuiVComponent):
     def select(self):
         """Selects the tab."""
         self.element.Select()
-
-class GuiGridView(GuiVComponent):
-    def __init__(self, element):
-        self.element = element
-    
-    def select_row(self, row):
-        """Selects a row in the grid view."""
-        self.element.Rows.SelectedRow = row
-    
-    def get_cell_value(self, row, column):
-        """Returns the value of a specific cell."""
-        return self.element.GetCellValue(row, column)
-    
-    def set_cell_value(self, row, column, value):
-        """Defines the value of a specific cell."""
-        self.element.SetCellValue(row, column, value)
+        self._action_done()
 
 class GuiShell(GuiVComponent):
     def __init__(self, element):
         self.element = element
+        self._scrollable = None
+        self.page_timings = []
 
     @property
     def rows_count(self):
@@ -168,6 +323,12 @@ class GuiShell(GuiVComponent):
             return None
         return self.element.RowCount
     
+    @property
+    def visible_rows_count(self):
+        if not hasattr(self.element, 'visiblerowcount'):
+            return None
+        return self.element.VisibleRowCount
+
     @property
     def columns_order(self):
         return [item for item in self.element.ColumnOrder]
@@ -179,37 +340,357 @@ class GuiShell(GuiVComponent):
     def send_command(self, command):
         """Sends a command to the shell."""
         self.element.SendCommand(command)
+        self._action_done()
     
     def get_cell_value(self, row, column):
         """Returns the value of a specific cell."""
         return self.element.GetCellValue(row, column)
 
-    def read_shell_table(self) -> DataFrame:
-        """Return a shell table as a pandas DataFrame."""
-        columns = self.columns_order
-        rows_count = self.rows_count
-        data = [
-                {column: self.get_cell_value(i, column) for column in columns}
-                for i in range(rows_count)
-                ]
-        
-        return DataFrame(data)
+    def get_column_values(self, column, rows_count: int = None) -> 'ndarray':
+        """
+        Returns all values of a column as a preallocated array.
+
+        Makes one GetCellValue call per row, scrolling one visible page at a time so
+        that the ALV loads the rows being read.
+        """
+        from numpy import empty
+
+        if rows_count is None:
+            rows_count = self.rows_count or 0
+        values = empty(rows_count, dtype=object)
+        get_cell_value = self.element.GetCellValue
+        page_rows = self.visible_rows_count or rows_count
+        for page_start in range(0, rows_count, page_rows):
+            self._scroll_to(page_start)
+            for i in range(page_start, min(page_start + page_rows, rows_count)):
+                values[i] = get_cell_value(i, column)
+        return values
+
+    def column_types(self, columns: list = None) -> dict:
+        """
+        Returns the conversion type ('number', 'date'...) of each column, from the ABAP type
+        the grid exposes with GetColumnDataType. Columns of unknown type are left out.
+        """
+        from sapguipy.models.conversion import abap_types
+
+        if not hasattr(self.element, 'getcolumndatatype'):
+            return {}
+        columns = self.columns_order if columns is None else list(columns)
+        types = {}
+        for column in columns:
+            try:
+                types[column] = self.element.GetColumnDataType(column)
+            except Exception:
+                pass
+        return abap_types(types)
+
+    def _resolve_types(self, columns: list, types) -> dict:
+        """Types of the grid metadata, overridden by the ones given by the user (if types is a dict)."""
+        resolved = self.column_types(columns)
+        if isinstance(types, dict):
+            resolved.update(types)
+        return resolved
+
+    def read_shell_table(self, columns: list = None, types=None, **formats) -> 'DataFrame':
+        """
+        Return a shell table as a pandas DataFrame.
+
+        The table is read into preallocated arrays one visible page at a time, every column of a
+        page before scrolling to the next, since the ALV only loads the rows that were scrolled
+        into view. GuiGridView has no bulk reader: for large grids, export_to_file is much faster.
+        columns: subset of columns to read. Defaults to all columns in display order.
+        types: if True, the texts are converted to numbers, dates and categoricals, with the types
+        from the grid metadata or inferred from the values. A dict (column -> type) sets the type of
+        some columns. See sapguipy.models.conversion.convert_table. By default the texts are kept.
+        formats: number_format, date_format and category_ratio of the conversion.
+        """
+        from pandas import DataFrame
+
+        columns = self.columns_order if columns is None else list(columns)
+        rows_count = self.rows_count or 0
+        frame = next(self._iter_text_chunks(max(rows_count, 1), columns), None)
+        if frame is None:
+            frame = DataFrame({column: [] for column in columns}, columns=columns, dtype=object)
+        if types:
+            from sapguipy.models.conversion import convert_table
+            frame = convert_table(frame, self._resolve_types(columns, types), **formats)
+        return frame
+
+    def _scroll_to(self, row):
+        """Scrolls the grid so that the given row is the first visible one."""
+        if self._scrollable is None:
+            self._scrollable = hasattr(self.element, 'firstvisiblerow')
+        if self._scrollable:
+            self.element.FirstVisibleRow = row
+
+    def iter_shell_table(self, chunk_rows: int = 10000, columns: list = None, types=None, **formats):
+        """
+        Yields the shell table as consecutive pandas DataFrames of at most chunk_rows rows.
+
+        The grid is scrolled one visible page at a time and only the rows of the
+        current chunk are kept in memory, so the whole table is never loaded at once.
+        columns: subset of columns to read. Defaults to all columns in display order.
+        types, formats: typed conversion, see read_shell_table. The types inferred from the
+        first chunk are used for all of them (see sapguipy.models.conversion.convert_chunks).
+        """
+        if chunk_rows <= 0:
+            raise ValueError('chunk_rows must be greater than zero.')
+        columns = self.columns_order if columns is None else list(columns)
+        chunks = self._iter_text_chunks(chunk_rows, columns)
+        if types:
+            from sapguipy.models.conversion import convert_chunks
+            chunks = convert_chunks(chunks, self._resolve_types(columns, types), **formats)
+        yield from chunks
+
+    def _iter_text_chunks(self, chunk_rows: int, columns: list):
+        from numpy import empty
+        from pandas import DataFrame
+
+        rows_count = self.rows_count or 0
+        page_rows = self.visible_rows_count or chunk_rows
+        get_cell_value = self.element.GetCellValue
+
+        for chunk_start in range(0, rows_count, chunk_rows):
+            chunk_stop = min(chunk_start + chunk_rows, rows_count)
+            data = {column: empty(chunk_stop - chunk_start, dtype=object) for column in columns}
+
+            for page_start in range(chunk_start, chunk_stop, page_rows):
+                page_stop = min(page_start + page_rows, chunk_stop)
+                self._scroll_to(page_start)
+                for column in columns:
+                    values = data[column]
+                    for row in range(page_start, page_stop):
+                        values[row - chunk_start] = get_cell_value(row, column)
+
+            yield DataFrame(data, index=range(chunk_start, chunk_stop), columns=columns)
+
+    def export_to_file(self, path, format: str = 'unconverted', timeout: float = 60, fallback: bool = True, types=None, **formats) -> 'DataFrame':
+        """
+        Saves the grid to a local file with the ALV export (Export > Local file) and returns it
+        as a pandas DataFrame. Much faster than reading the cells for large grids.
+
+        path: file to be written. An existing file is replaced.
+        format: 'unconverted' or 'spreadsheet'.
+        timeout: seconds to wait for SAP to finish writing the file.
+        fallback: if True and the export is not available in the grid, the table is read
+        with read_shell_table instead.
+
+        types, formats: typed conversion, see read_shell_table. The grid metadata is used only
+        by the fallback, since the file has the column titles instead of the field names.
+
+        The columns of the exported file are named by their displayed titles, while
+        read_shell_table names them by their field names.
+        """
+        from pathlib import Path
+        from sapguipy.models.export import EXPORT_FORMATS, read_export_file
+        from sapguipy.wait import wait_for_file
+
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{format}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+        path = Path(path).absolute()
+        if path.exists():
+            path.unlink()
 
-class GuiTree(GuiVComponent):
+        find = self._find_element
+        try:
+            if find is None:
+                raise Exception('The element was not created by SapGui.find_by_id.')
+            self.element.PressToolbarContextButton('&MB_EXPORT')
+            self.element.SelectContextMenuItem('&PC')
+            self._action_done()
+            find(EXPORT_FORMAT_ID.format(index=EXPORT_FORMATS[format])).Select()
+            find('wnd[1]/tbar[0]/btn[0]').Press()
+            self._action_done()
+            find(EXPORT_PATH_ID).Text = str(path.parent)
+            find(EXPORT_FILENAME_ID).Text = path.name
+            encoding = find(EXPORT_ENCODING_ID, False)
+            if encoding is not None:
+                encoding.Text = EXPORT_ENCODING
+            find('wnd[1]/tbar[0]/btn[0]').Press()
+            self._action_done()
+        except Exception:
+            if not fallback:
+                raise
+            # Fecha o diálogo que tenha ficado aberto antes de ler as células.
+            popup = find('wnd[1]', False) if find is not None else None
+            if popup is not None:
+                popup.Close()
+                self._action_done()
+            return self.read_shell_table(types=types, **formats)
+
+        wait_for_file(path, timeout)
+        frame = read_export_file(path, format)
+        if types:
+            from sapguipy.models.conversion import convert_table
+            frame = convert_table(frame, types if isinstance(types, dict) else None, **formats)
+        return frame
+
+    def write_rows(self, rows, columns: list = None, start_row: int = 0) -> list:
+        """
+        Writes rows into an editable grid, starting at row `start_row`, and returns the timings of each page.
+
+        rows: pandas DataFrame, iterable of dicts or iterable of sequences (these need `columns`).
+        columns: grid columns to write, in the order of the values. Defaults to the DataFrame
+        columns or the keys of the first dict. Missing values (None, NaN) are not written.
+
+        The grid is scrolled one visible page at a time and the changes are sent to the
+        server once, at the end. The rows must already exist in the grid.
+        """
+        columns, records = _iter_records(rows, columns)
+        rows_count = self.rows_count or 0
+        page_rows = self.visible_rows_count or rows_count or 1
+        modify_cell = self.element.ModifyCell
+        self.page_timings = []
+
+        row = start_row
+        while True:
+            page = list(islice(records, page_rows))
+            if not page:
+                break
+            if row + len(page) > rows_count:
+                raise ValueError(f'The grid has {rows_count} rows, cannot write up to row {row + len(page) - 1}.')
+            start = perf_counter()
+            self._scroll_to(row)
+            cells = 0
+            for offset, values in enumerate(page):
+                for column, value in zip(columns, values):
+                    if not _is_missing(value):
+                        modify_cell(row + offset, column, str(value))
+                        cells += 1
+            self.page_timings.append({'page': len(self.page_timings), 'first_row': row, 'rows': len(page), 'cells': cells, 'seconds': perf_counter() - start})
+            row += len(page)
+
+        if hasattr(self.element, 'triggermodified'):
+            self.element.TriggerModified()
+            self._action_done()
+        return self.page_timings
+
+class GuiGridView(GuiShell):
     def __init__(self, element):
-        self.element = element
+        super().__init__(element)
     
-    def expand_node(self):
+    def select_row(self, row):
+        """Selects a row in the grid view."""
+        self.element.Rows.SelectedRow = row
+    
+    def set_cell_value(self, row, column, value):
+        """Defines the value of a specific cell."""
+        self.element.SetCellValue(row, column, value)
+
+class GuiTree(GuiShell):
+    def __init__(self, element):
+        super().__init__(element)
+        self._expanded = set()
+    
+    def expand_node(self, node_key):
         """Expands a node in the tree."""
-        self.element.Expand()
+        self.element.ExpandNode(node_key)
+        self._expanded.add(node_key)
+        self._action_done()
     
-    def collapse_node(self):
+    def collapse_node(self, node_key):
         """Collapses a node in the tree."""
-        self.element.Collapse()
+        self.element.CollapseNode(node_key)
+        self._action_done()
+
+    @property
+    def column_names(self) -> list:
+        """Names of the item columns of a column tree. Empty for simple and list trees."""
+        if self.element.GetTreeType() != 2:
+            return []
+        return list(self.element.GetColumnNames())
+
+    def iter_nodes(self, node_key: str = None, expand: bool = True, columns: list = None):
+        """
+        Yields every node of the tree, depth first, as a dict with the keys key, parent, level
+        and text, plus the text of each item column.
+
+        node_key: node whose subtree is read. Defaults to the whole tree.
+        expand: if True, folders whose children were not loaded yet are expanded, each one
+        only once. Otherwise only the nodes already loaded are read.
+        columns: item columns to read, for column trees. Defaults to all of them.
+
+        Each node costs one call for its text, one for its children (GetSubNodesCol) and one per
+        column, plus, when expanding, one to know if it is a folder.
+        """
+        element = self.element
+        columns = self.column_names if columns is None else list(columns)
+        get_text = element.GetNodeTextByKey
+        get_children = element.GetSubNodesCol
+        get_item_text = element.GetItemText
+        is_expandable = element.IsFolderExpandable
+        is_expanded = element.IsFolderExpanded
+
+        def walk(key, parent, level):
+            node = {'key': key, 'parent': parent, 'level': level, 'text': get_text(key)}
+            for column in columns:
+                node[column] = get_item_text(key, column)
+            yield node
+            if expand and key not in self._expanded and is_expandable(key) and not is_expanded(key):
+                self.expand_node(key)
+            children = get_children(key)
+            if children is not None:
+                for child in list(children):
+                    yield from walk(child, key, level + 1)
+
+        if node_key is not None:
+            yield from walk(node_key, element.GetParent(node_key) or None, element.GetHierarchyLevel(node_key))
+            return
+
+        # GetAllNodeKeys lista os nós em pré-ordem, então as raízes aparecem antes dos filhos
+        # e só elas precisam de GetParent.
+        seen = set()
+        for key in list(element.GetAllNodeKeys()):
+            if key in seen or element.GetParent(key):
+                continue
+            for node in walk(key, None, 0):
+                seen.add(node['key'])
+                yield node
+
+    def iter_tree(self, chunk_rows: int = 10000, node_key: str = None, expand: bool = True, columns: list = None):
+        """
+        Yields the flattened tree as consecutive pandas DataFrames of at most chunk_rows rows,
+        with the columns key, parent, level, text and the item columns. See iter_nodes.
+        """
+        if chunk_rows <= 0:
+            raise ValueError('chunk_rows must be greater than zero.')
+        from pandas import DataFrame
+
+        nodes = self.iter_nodes(node_key, expand, columns)
+        chunk_start = 0
+        while True:
+            chunk = list(islice(nodes, chunk_rows))
+            if not chunk:
+                break
+            yield DataFrame.from_records(chunk, index=range(chunk_start, chunk_start + len(chunk)))
+            chunk_start += len(chunk)
+
+    def read_tree(self, node_key: str = None, expand: bool = True, columns: list = None) -> 'DataFrame':
+        """Returns the flattened tree as a pandas DataFrame. See iter_nodes."""
+        from pandas import DataFrame
+
+        nodes = list(self.iter_nodes(node_key, expand, columns))
+        names = ['key', 'parent', 'level', 'text'] + (list(nodes[0])[4:] if nodes else [])
+        return DataFrame.from_records(nodes, columns=names)
+
+    def to_dict(self, node_key: str = None, expand: bool = True, columns: list = None) -> list:
+        """
+        Returns the tree as nested dicts, each with a children list, like
+        [{'key': ..., 'text': ..., 'level': 0, 'children': [...]}]. See iter_nodes.
+        """
+        roots = []
+        nodes = {}
+        for node in self.iter_nodes(node_key, expand, columns):
+            parent = nodes.get(node.pop('parent'))
+            node['children'] = []
+            nodes[node['key']] = node
+            (parent['children'] if parent is not None else roots).append(node)
+        return roots
     
     def select_node(self, node_key):
         """Selects a node in the tree."""
         self.element.SelectNode(node_key)
+        self._action_done()
 
 class GuiStatusbar(GuiVComponent):
     def __init__(self, element):
@@ -324,18 +805,193 @@ class GuiToolbar(GuiVComponent):
     def press_button(self, button_id):
         """Presses a button in the toolbar."""
         self.element.PressButton(button_id)
+        self._action_done()
 
 class GuiTableControl(GuiVComponent):
     def __init__(self, element):
         self.element = element
-    
+        self._columns = None
+        self.page_timings = []
+
+    @property
+    def rows_count(self):
+        return self.element.RowCount
+
+    @property
+    def visible_rows_count(self):
+        return self.element.VisibleRowCount
+
+    @property
+    def columns(self) -> list:
+        """Field names of the columns (like 'VBAP-MATNR'), in display order. Read only once."""
+        if self._columns is None:
+            get_cell = self.element.GetCell
+            self._columns = [get_cell(0, index).Name for index in range(self.element.Columns.Count)]
+        return self._columns
+
+    def _column_indexes(self, columns: list) -> list:
+        """Returns the index of each column, given by index or by field name."""
+        return [column if isinstance(column, int) else self.columns.index(column) for column in columns]
+
     def set_cell_value(self, row, column, value):
-        """Sets the value of a specific cell."""
-        self.element.SetCellValue(row, column, value)
+        """Sets the value of a specific cell. The row is relative to the first visible row."""
+        self.element.GetCell(row, column).Text = value
     
     def get_cell_value(self, row, column):
-        """Returns the value of a specific cell."""
-        return self.element.GetCellValue(row, column)
+        """Returns the value of a specific cell. The row is relative to the first visible row."""
+        return self.element.GetCell(row, column).Text
+
+    def _scroll_to(self, row: int) -> int:
+        """
+        Scrolls the table so that the given row is the first visible one, or as close as the
+        scrollbar allows, and returns the first visible row.
+
+        Scrolling goes to the server and the screen is rebuilt, so the element is found again by its ID.
+        """
+        scrollbar = self.element.VerticalScrollbar
+        position = scrollbar.Position
+        if position == row:
+            return position
+        element_id = self.element.Id
+        scrollbar.Position = min(row, scrollbar.Maximum)
+        self._action_done()
+        if self._find_element is not None:
+            self.element = self._find_element(element_id)
+        return self.element.VerticalScrollbar.Position
+
+    def _iter_pages(self, indexes: list, stop_at_empty_row: bool):
+        """
+        Yields the rows of each visible page, as tuples of texts, reading every row only once.
+        The timings of each page are kept in page_timings.
+        """
+        rows_count = self.rows_count
+        page_rows = self.visible_rows_count
+        self.page_timings = []
+
+        row = 0
+        while row < rows_count:
+            start = perf_counter()
+            first_row = self._scroll_to(row)
+            # No fim da tabela a barra de rolagem para antes, e a página repete linhas já lidas.
+            stop = min(first_row + page_rows, rows_count)
+            get_cell = self.element.GetCell
+            page = []
+            for offset in range(row - first_row, stop - first_row):
+                values = tuple(get_cell(offset, index).Text for index in indexes)
+                if stop_at_empty_row and not any(values):
+                    rows_count = row + len(page)
+                    break
+                page.append(values)
+            self.page_timings.append({'page': len(self.page_timings), 'first_row': row, 'rows': len(page), 'cells': len(page) * len(indexes), 'seconds': perf_counter() - start})
+            yield page
+            row += len(page)
+            if not page:
+                break
+
+    def iter_rows(self, columns: list = None, stop_at_empty_row: bool = False):
+        """
+        Yields every row of the table as a tuple of texts, in the order of `columns`.
+
+        The table is scrolled one visible page at a time with VerticalScrollbar.Position and
+        each page is read once, so only one page is kept in memory.
+        columns: columns to read, by field name or index. Defaults to all columns in display order.
+        stop_at_empty_row: if True, stops at the first row whose cells are all empty, like the
+        blank input rows at the end of entry tables.
+        """
+        indexes = self._column_indexes(self.columns if columns is None else columns)
+        for page in self._iter_pages(indexes, stop_at_empty_row):
+            yield from page
+
+    def iter_table(self, chunk_rows: int = 10000, columns: list = None, stop_at_empty_row: bool = False, types=None, **formats):
+        """
+        Yields the table as consecutive pandas DataFrames of at most chunk_rows rows, indexed by
+        the absolute row number. See iter_rows and read_table for the other parameters.
+        """
+        if chunk_rows <= 0:
+            raise ValueError('chunk_rows must be greater than zero.')
+        chunks = self._iter_text_chunks(chunk_rows, columns, stop_at_empty_row)
+        if types:
+            from sapguipy.models.conversion import convert_chunks
+            chunks = convert_chunks(chunks, types if isinstance(types, dict) else None, **formats)
+        yield from chunks
+
+    def _iter_text_chunks(self, chunk_rows: int, columns: list, stop_at_empty_row: bool):
+        from pandas import DataFrame
+
+        names = self._column_names(columns)
+        rows = self.iter_rows(columns, stop_at_empty_row)
+        chunk_start = 0
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                break
+            yield DataFrame.from_records(chunk, columns=names, index=range(chunk_start, chunk_start + len(chunk)))
+            chunk_start += len(chunk)
+
+    def read_table(self, columns: list = None, stop_at_empty_row: bool = False, types=None, **formats) -> 'DataFrame':
+        """
+        Returns the whole table as a pandas DataFrame, with the field names as column names.
+        See iter_rows for the parameters.
+        types: if True, the texts are converted to numbers, dates and categoricals, with the types
+        inferred from the values. A dict (column -> type) sets the type of some columns.
+        See sapguipy.models.conversion.convert_table. By default the texts are kept.
+        formats: number_format, date_format and category_ratio of the conversion.
+        """
+        from pandas import DataFrame
+
+        names = self._column_names(columns)
+        frame = DataFrame.from_records(list(self.iter_rows(columns, stop_at_empty_row)), columns=names)
+        if types:
+            from sapguipy.models.conversion import convert_table
+            frame = convert_table(frame, types if isinstance(types, dict) else None, **formats)
+        return frame
+
+    def _column_names(self, columns: list = None) -> list:
+        if columns is None:
+            return list(self.columns)
+        return [self.columns[column] if isinstance(column, int) else column for column in columns]
+
+    def write_rows(self, rows, columns: list = None, start_row: int = 0) -> list:
+        """
+        Writes rows into the table control, starting at the absolute row `start_row`, and returns
+        the timings of each page.
+
+        rows: pandas DataFrame, iterable of dicts or iterable of sequences (these need `columns`).
+        columns: table columns to write, by field name or index, in the order of the values. Defaults
+        to the DataFrame columns or the keys of the first dict. Missing values (None, NaN) are not written.
+
+        The rows are entered one visible page at a time: the cells of the page are filled and then the
+        table is scrolled to the next page, which sends the page to the server. The last page is left
+        on the screen, to be confirmed by the caller (Enter, save...).
+        """
+        columns, records = _iter_records(rows, columns)
+        indexes = self._column_indexes(columns)
+        page_rows = self.visible_rows_count
+        self.page_timings = []
+
+        pending = []
+        row = start_row
+        while True:
+            pending.extend(islice(records, page_rows - len(pending)))
+            if not pending:
+                break
+            start = perf_counter()
+            first_row = self._scroll_to(row)
+            # A barra de rolagem pode parar antes da linha pedida (fim da tabela).
+            fits = min(len(pending), page_rows - (row - first_row))
+            if fits <= 0:
+                raise ValueError(f'The table control cannot be scrolled to row {row}.')
+            get_cell = self.element.GetCell
+            cells = 0
+            for offset, values in enumerate(pending[:fits], start=row - first_row):
+                for index, value in zip(indexes, values):
+                    if not _is_missing(value):
+                        get_cell(offset, index).Text = str(value)
+                        cells += 1
+            self.page_timings.append({'page': len(self.page_timings), 'first_row': row, 'rows': fits, 'cells': cells, 'seconds': perf_counter() - start})
+            del pending[:fits]
+            row += fits
+        return self.page_timings
 
 class GuiTitlebar(GuiVComponent):
     def __init__(self, element):
@@ -357,21 +1013,21 @@ class GuiContainer(GuiVComponent):
 class GuiSplitter(GuiVComponent):
     def __init__(self, element):
         self.element = element
-    
-    @property
-    def element(self):
-        return self.element
 
 class GuiUserArea(GuiVComponent):
+    _takes_session = True
+
     def __init__(self, class_instance, element):
         self.__class = class_instance
         self.element = element
     
     def list_children(self):
-        """List all children of the user area."""
-        return [self.__class.find_by_id(item) for item in self.element.Children]
+        """List all children of the user area. The children are wrapped only when accessed."""
+        return GuiChildren(self.__class, self.element.Children)
     
 class GuiMainWindow(GuiVComponent):
+    _takes_session = True
+
     def __init__(self, class_instance, element):
         self.__class = class_instance
         self.element = element
@@ -395,6 +1051,7 @@ class GuiMainWindow(GuiVComponent):
     def send_v_key(self, key):
         """Sends a VKey to the window."""
         self.element.SendVKey(key)
+        self._action_done()
 
     def show_message_box(self):
         self.element.ShowMessageBox()
@@ -407,10 +1064,14 @@ class GuiMainWindow(GuiVComponent):
     
     def close(self):
         self.element.Close()
+        self._action_done()
 
     def list_children(self):
-        """List all children."""
-        return [self.__class.find_by_id(item) for item in self.element.Children]
+        """List all children. The children are wrapped only when accessed."""
+        return GuiChildren(self.__class, self.element.Children)
+
+class GuiModalWindow(GuiMainWindow):
+    ...
 
 class GuiComponentCollection(GuiVComponent):
     def __init__(self, element):
@@ -425,24 +1086,30 @@ class GuiComponentCollection(GuiVComponent):
         return self.element.Length
     
 class GuiMenubar(GuiVComponent):
+    _takes_session = True
+
     def __init__(self, class_instance, element):
         self.__class = class_instance
         self.element = element
     
     def list_children(self):
-        """List all children."""
-        return [self.__class.find_by_id(item) for item in self.element.Children]
+        """List all children. The children are wrapped only when accessed."""
+        return GuiChildren(self.__class, self.element.Children)
     
 class GuiCustomControl(GuiVComponent):
+    _takes_session = True
+
     def __init__(self, class_instance, element):
         self.__class = class_instance
         self.element = element
 
     def list_children(self):
-        """List all children."""
-        return [self.__class.find_by_id(item) for item in self.element.Children]
+        """List all children. The children are wrapped only when accessed."""
+        return GuiChildren(self.__class, self.element.Children)
     
 class GuiContainerShell(GuiVComponent):
+    _takes_session = True
+
     def __init__(self, class_instance, element):
         self.__class = class_instance
         self.element = element
@@ -450,5 +1117,93 @@ class GuiContainerShell(GuiVComponent):
     
     
     def list_children(self):
-        """List all children."""
-        return [self.__class.find_by_id(item) for item in self.element.Children]
\ No newline at end of file
+        """List all children. The children are wrapped only when accessed."""
+        return GuiChildren(self.__class, self.element.Children)
+
+class GuiChildren:
+    """
+    Lazy sequence over the children of a container.
+
+    Only the collection is held: a child's type is fetched and its wrapper is built
+    when the child is accessed, so large user areas can be walked without wrapping
+    every field up front.
+    """
+    def __init__(self, class_instance, collection):
+        self.__class = class_instance
+        self.collection = collection
+
+    def __len__(self):
+        return self.collection.Count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('child index out of range')
+        return self.__class.find_by_id(self.collection.ElementAt(index))
+
+    def __iter__(self):
+        for item in self.collection:
+            yield self.__class.find_by_id(item)
+
+    def snapshot(self, properties: tuple = SNAPSHOT_PROPERTIES) -> list:
+        """
+        Returns an ElementSnapshot for every child, without building their wrappers.
+        """
+        return snapshot_elements(self.collection, properties)
+
+# Tipo do elemento (propriedade Type) -> classe que o representa.
+# Tipos que não estão aqui são representados por GuiVComponent.
+CONTROL_TYPES = {
+    "GuiButton": GuiButton,
+    "GuiTextField": GuiTextField,
+    "GuiPasswordField": GuiPasswordField,
+    "GuiOkCodeField": GuiOkCodeField,
+    "GuiRadioButton": GuiRadioButton,
+    "GuiComboBox": GuiComboBox,
+    "GuiCheckBox": GuiCheckBox,
+    "GuiCTextField": GuiCTextField,
+    "GuiTab": GuiTab,
+    "GuiGridView": GuiGridView,
+    "GuiShell": GuiShell,
+    "GuiShell/GridView": GuiGridView,
+    "GuiShell/Tree": GuiTree,
+    "GuiTree": GuiTree,
+    "GuiStatusbar": GuiStatusbar,
+    "GuiFrameWindow": GuiFrameWindow,
+    "GuiSessionInfo": GuiSessionInfo,
+    "GuiLabel": GuiLabel,
+    "GuiToolbar": GuiToolbar,
+    "GuiTableControl": GuiTableControl,
+    "GuiTitlebar": GuiTitlebar,
+    "GuiContainer": GuiContainer,
+    "GuiSplitter": GuiSplitter,
+    "GuiUserArea": GuiUserArea,
+    "GuiMainWindow": GuiMainWindow,
+    "GuiModalWindow": GuiModalWindow,
+    "GuiComponentCollection": GuiComponentCollection,
+    "GuiMenubar": GuiMenubar,
+    "GuiCustomControl": GuiCustomControl,
+    "GuiContainerShell": GuiContainerShell,
+}
+
+def register_control(element_type: str, control_class: type = None):
+    """
+    Registers the class used by SapGui.find_by_id to represent an element type.
+
+    element_type: value of the Type property of the element. Shells are told apart by their
+    SubType, as 'GuiShell/<SubType>' (like 'GuiShell/Tree'), falling back to 'GuiShell'.
+    Can be used directly or as a class decorator:
+
+        @register_control("GuiRadioButton")
+        class GuiRadioButton(GuiVComponent):
+            ...
+    """
+    def decorator(cls):
+        CONTROL_TYPES[element_type] = cls
+        return cls
+    if control_class is not None:
+        return decorator(control_class)
+    return decorator
@@ -0,0 +1,69 @@
+from sapguipy.models.sap_controls import snapshot_element
+
+# Propriedades gravadas em cada nó do dump (ContainerType indica se o nó tem filhos).
+DUMP_PROPERTIES = ('Id', 'Type', 'Name', 'Text', 'Left', 'Top', 'Width', 'Height', 'Changeable', 'ContainerType')
+
+def _relative_id(element_id: str) -> str:
+    """Strips the '/app/con[n]/ses[n]/' prefix, so the ID can be used directly in find_by_id."""
+    if element_id and element_id.startswith('/app/'):
+        return element_id.split('/', 4)[-1]
+    return element_id
+
+def dump_element(element, depth: int = None) -> dict:
+    """
+    Returns a compact tree of a raw scripting element and its children.
+
+    Each node is a dict with the keys id, type, name, text, left, top, width, height,
+    changeable and children. Properties that are empty or absent are left out, so the
+    result is small and can be serialised to JSON (or msgpack) as it is.
+    depth: how many levels of children to read. None reads the whole tree.
+    """
+    values = snapshot_element(element, DUMP_PROPERTIES).as_dict()
+    node = {}
+    for prop in DUMP_PROPERTIES[:-1]:
+        value = values[prop]
+        if value is None or value == '':
+            continue
+        node[prop.lower()] = _relative_id(value) if prop == 'Id' else value
+
+    if values['ContainerType'] and (depth is None or depth > 0):
+        next_depth = None if depth is None else depth - 1
+        node['children'] = [dump_element(child, next_depth) for child in element.Children]
+    return node
+
+def flatten_screen(tree: dict) -> dict:
+    """Returns every node of a dump indexed by its ID, without the children key."""
+    nodes = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        nodes[node.get('id')] = {key: value for key, value in node.items() if key != 'children'}
+        stack.extend(node.get('children', ()))
+    return nodes
+
+def diff_screens(old: dict, new: dict) -> dict:
+    """
+    Compares two dumps made by dump_element.
+
+    Returns a dict with the IDs that were added and removed and, for the IDs present in
+    both, the properties that changed as {id: {property: (old value, new value)}}.
+    """
+    old_nodes = flatten_screen(old)
+    new_nodes = flatten_screen(new)
+    changed = {}
+    for element_id in old_nodes.keys() & new_nodes.keys():
+        before = old_nodes[element_id]
+        after = new_nodes[element_id]
+        differences = {
+            key: (before.get(key), after.get(key))
+            for key in before.keys() | after.keys()
+            if before.get(key) != after.get(key)
+            }
+        if differences:
+            changed[element_id] = differences
+
+    return {
+        'added': sorted(new_nodes.keys() - old_nodes.keys()),
+        'removed': sorted(old_nodes.keys() - new_nodes.keys()),
+        'changed': changed,
+    }
@@ -0,0 +1,207 @@
+from collections import deque
+from threading import Thread, Event
+from queue import Empty
+from time import monotonic
+import pickle
+import os
+
+
+def _picklable(value):
+    """Returns the value itself if it can be sent to another process, otherwise a text version of it."""
+    try:
+        pickle.dumps(value)
+        return value
+    except Exception:
+        if isinstance(value, BaseException):
+            return Exception(f'{type(value).__name__}: {value}')
+        return repr(value)
+
+def _heartbeat(worker_id, events, interval: float, stop: Event):
+    while not stop.wait(interval):
+        events.put(('heartbeat', worker_id, None))
+
+def _worker_main(worker_id, sap_factory, job, tasks, events, heartbeat: float):
+    """
+    Entry point of a worker process.
+
+    Builds its own SapGui through sap_factory(worker_id), so each worker owns its
+    connection, and runs job(sap, item) for every item the orchestrator sends to it.
+    """
+    events.put(('status', worker_id, {'pid': os.getpid(), 'status': 'starting'}))
+    stop = Event()
+    Thread(target=_heartbeat, args=(worker_id, events, heartbeat, stop), daemon=True).start()
+    try:
+        with sap_factory(worker_id) as sap:
+            events.put(('ready', worker_id, None))
+            while True:
+                task = tasks.get()
+                if task is None:
+                    break
+
+                index, item = task
+                start = monotonic()
+                try:
+                    result = job(sap, item)
+                    events.put(('done', worker_id, (index, _picklable(result), monotonic() - start)))
+                except Exception as e:
+                    events.put(('error', worker_id, (index, _picklable(e), monotonic() - start)))
+        events.put(('status', worker_id, {'status': 'stopped'}))
+    except Exception as e:
+        events.put(('status', worker_id, {'status': 'failed', 'error': str(e)}))
+    finally:
+        stop.set()
+
+
+class Orchestrator:
+    """
+    Spreads a job across several worker processes, each one driving its own SAP connection.
+
+    Every worker builds its SapGui with sap_factory(worker_id), takes items from a shared
+    work queue kept by the orchestrator and reports its health back to the orchestrator. sap_factory and job are
+    sent to the workers, so they must be picklable (top level functions or functools.partial).
+
+    Example:
+        def open_sap(worker_id):
+            return SapGui(sid='PRD', user='USR', pwd='AnPassword', mandante='900')
+
+        results = Orchestrator(open_sap, workers=4).run(extract_report, variants)
+    """
+    def __init__(self, sap_factory, workers: int = 2, heartbeat: float = 5.0, start_method: str = 'spawn'):
+        """
+        sap_factory: callable that receives the worker id and returns a SapGui (or any object with the same context manager interface).
+        workers: number of worker processes.
+        heartbeat: interval, in seconds, between the health reports of each worker.
+        start_method: multiprocessing start method.
+        """
+        from multiprocessing import get_context
+
+        if workers <= 0:
+            raise ValueError('workers must be greater than zero.')
+        self.sap_factory = sap_factory
+        self.workers = workers
+        self.heartbeat = heartbeat
+        self._context = get_context(start_method)
+        self.health = {}
+        self.metrics = {}
+
+    def _update_health(self, worker_id, **values):
+        self.health.setdefault(worker_id, {
+            'pid': None,
+            'status': 'starting',
+            'done': 0,
+            'failed': 0,
+            'busy_seconds': 0.0,
+            'current_item': None,
+            'last_heartbeat': None,
+        }).update(values)
+
+    def run(self, job, items) -> list:
+        """
+        Runs job(sap, item) for every item and returns the results in the same order as the items.
+
+        If a worker process dies while running an item, the item is sent to another worker once.
+        Failed items have their exception in place of the result; check metrics['failed'].
+        """
+        items = list(items)
+        results = [None] * len(items)
+        self.health = {}
+        self.metrics = {}
+        if not items:
+            return results
+
+        queue = deque(range(len(items)))
+        events = self._context.Queue()
+        processes = {}
+        tasks = {}
+        for worker_id in range(min(self.workers, len(items))):
+            self._update_health(worker_id)
+            tasks[worker_id] = self._context.Queue()
+            processes[worker_id] = self._context.Process(
+                target=_worker_main,
+                args=(worker_id, self.sap_factory, job, tasks[worker_id], events, self.heartbeat),
+                daemon=True
+                )
+            processes[worker_id].start()
+
+        def dispatch(worker_id):
+            health = self.health[worker_id]
+            if queue:
+                index = queue.popleft()
+                tasks[worker_id].put((index, items[index]))
+                health.update(status='running', current_item=index)
+            else:
+                health.update(status='idle', current_item=None)
+
+        start = monotonic()
+        pending = len(items)
+        failed = 0
+        retried = set()
+        try:
+            while pending:
+                try:
+                    kind, worker_id, payload = events.get(timeout=self.heartbeat)
+                except Empty:
+                    kind = None
+
+                if kind == 'status':
+                    self._update_health(worker_id, **payload)
+                elif kind == 'heartbeat':
+                    self._update_health(worker_id, last_heartbeat=monotonic())
+                elif kind == 'ready':
+                    dispatch(worker_id)
+                elif kind in ('done', 'error'):
+                    index, value, elapsed = payload
+                    results[index] = value
+                    pending -= 1
+                    health = self.health[worker_id]
+                    health['busy_seconds'] += elapsed
+                    if kind == 'done':
+                        health['done'] += 1
+                    else:
+                        health['failed'] += 1
+                        failed += 1
+                    dispatch(worker_id)
+
+                # Verifica se algum worker morreu sem avisar (queda do SAP GUI, por exemplo).
+                for worker_id, process in processes.items():
+                    health = self.health[worker_id]
+                    if process.is_alive() or health['status'] in ('stopped', 'dead'):
+                        continue
+                    index = health['current_item']
+                    health.update(status='dead', current_item=None, exitcode=process.exitcode)
+                    if index is None:
+                        continue
+                    if index in retried:
+                        results[index] = Exception(f'Worker {worker_id} died while running item {index}.')
+                        pending -= 1
+                        failed += 1
+                        continue
+                    retried.add(index)
+                    queue.append(index)
+                    idle = next((w for w, h in self.health.items() if h['status'] == 'idle'), None)
+                    if idle is not None:
+                        dispatch(idle)
+
+                if pending and not any(process.is_alive() for process in processes.values()):
+                    raise Exception('All workers stopped before the job was finished.')
+        finally:
+            for worker_id, process in processes.items():
+                if process.is_alive():
+                    tasks[worker_id].put(None)
+            for process in processes.values():
+                process.join(timeout=self.heartbeat)
+                if process.is_alive():
+                    process.terminate()
+
+            elapsed = monotonic() - start
+            self.metrics = {
+                'items': len(items),
+                'done': len(items) - pending - failed,
+                'failed': failed,
+                'retried': len(retried),
+                'elapsed_seconds': elapsed,
+                'items_per_minute': (len(items) - pending) / elapsed * 60 if elapsed else 0.0,
+                'workers': self.health,
+            }
+
+        return results
@@ -0,0 +1,160 @@
+from threading import Thread
+from queue import Queue
+from sapguipy.sap import SapGui, MAX_SESSIONS
+
+
+def _session_alive(session) -> bool:
+    """Checks if the session still answers to the scripting API."""
+    try:
+        session.Busy
+        return True
+    except Exception:
+        return False
+
+
+class SessionPool:
+    """
+    Runs jobs in parallel over several sessions of the same SAP connection.
+
+    Every session is opened with SapGui.new_window and pinned to its own COM
+    initialised worker thread. The session of the SapGui object given to the
+    pool is left free for the caller. The sessions are closed when map returns.
+    """
+    def __init__(self, sap: SapGui, size: int = 2, retries: int = 1):
+        """
+        sap: logged SapGui object whose connection will host the sessions.
+        size: number of sessions (and worker threads) to open. The connection has room for
+        MAX_SESSIONS sessions, the one of `sap` included.
+        retries: how many times a job is retried on a fresh session when its session dies.
+        """
+        if size <= 0:
+            raise ValueError('size must be greater than zero.')
+        if size >= MAX_SESSIONS:
+            raise ValueError(f'size must be less than {MAX_SESSIONS}: the connection has room for {MAX_SESSIONS} sessions, the one of sap included.')
+        self.sap = sap
+        self.size = size
+        self.retries = retries
+        self._windows = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes every session opened by the pool."""
+        for slot in list(self._windows):
+            self._close_window(slot)
+
+    def _close_window(self, slot):
+        window = self._windows.pop(slot, None)
+        if window is None:
+            return
+        try:
+            self.sap.connection.CloseSession(window.session.Id)
+        except Exception:
+            # A sessão pode já ter caído.
+            pass
+
+    def _check_free_sessions(self, count: int):
+        """Raises before opening anything if the connection has no room for `count` new sessions."""
+        free = MAX_SESSIONS - self.sap.connection.Sessions.Count
+        if count > free:
+            raise Exception(f'The pool needs {count} new sessions, but the connection has room for {max(free, 0)}.')
+
+    def _start_worker(self, slot, job, jobs: Queue, events: Queue) -> Thread:
+        window = self.sap.new_window()
+        self._windows[slot] = window
+        worker = Thread(target=self._work, args=(slot, self.sap.backend.marshal(window.session), job, jobs, events), daemon=True)
+        worker.start()
+        return worker
+
+    def _work(self, slot, stream, job, jobs: Queue, events: Queue):
+        """Worker loop. Runs in its own thread, with its own COM apartment."""
+        backend = self.sap.backend
+        backend.initialize_thread()
+        try:
+            try:
+                sap = self.sap._clone_for_session(backend.unmarshal(stream))
+            except Exception as e:
+                events.put(('failed', slot, e))
+                return
+
+            while True:
+                task = jobs.get()
+                if task is None:
+                    return
+
+                index, item, attempt = task
+                try:
+                    events.put(('done', index, job(sap, item)))
+                except Exception as e:
+                    if _session_alive(sap.session):
+                        events.put(('error', index, e))
+                        continue
+
+                    if attempt < self.retries:
+                        jobs.put((index, item, attempt + 1))
+                    else:
+                        events.put(('error', index, e))
+                    events.put(('dead', slot, None))
+                    return
+        finally:
+            backend.uninitialize_thread()
+
+    def map(self, job, items) -> list:
+        """
+        Runs job(sap, item) for every item, spread across the pool sessions.
+
+        job: callable that receives a SapGui bound to a pool session and an item.
+        Returns the results in the same order as the items. If any job failed, the
+        exception of the first failed item is raised after every job finished.
+        """
+        items = list(items)
+        results = [None] * len(items)
+        errors = {}
+        if not items:
+            return results
+
+        jobs = Queue()
+        events = Queue()
+        for index, item in enumerate(items):
+            jobs.put((index, item, 0))
+
+        workers = {}
+        count = min(self.size, len(items))
+        self._check_free_sessions(count)
+        try:
+            for slot in range(count):
+                workers[slot] = self._start_worker(slot, job, jobs, events)
+
+            pending = len(items)
+            while pending:
+                kind, index, payload = events.get()
+                if kind == 'done':
+                    results[index] = payload
+                    pending -= 1
+                elif kind == 'error':
+                    errors[index] = payload
+                    pending -= 1
+                elif kind == 'dead':
+                    # index é o slot do worker cuja sessão caiu: abre uma nova sessão no lugar.
+                    workers.pop(index).join()
+                    self._close_window(index)
+                    if pending:
+                        workers[index] = self._start_worker(index, job, jobs, events)
+                elif kind == 'failed':
+                    workers.pop(index).join()
+                    raise Exception(f'Failed to attach to a new session: {payload}.')
+        finally:
+            for _ in workers:
+                jobs.put(None)
+            for worker in workers.values():
+                worker.join()
+            # Inclui as sessões abertas antes de uma falha na partida dos workers.
+            self.close()
+
+        if errors:
+            raise errors[min(errors)]
+        return results
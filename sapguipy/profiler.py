@@ -0,0 +1,254 @@
+from contextlib import ContextDecorator
+from collections import defaultdict
+from types import MethodType, FunctionType, BuiltinFunctionType
+from time import perf_counter, time_ns
+import json
+
+# Tipos devolvidos pelo COM que não precisam ser instrumentados.
+_PLAIN_TYPES = (str, int, float, bool, bytes, type(None), tuple, list)
+
+
+def _is_method(value) -> bool:
+    """Tells bound methods apart from callable COM objects, like collections (Children(0))."""
+    return isinstance(value, (MethodType, FunctionType, BuiltinFunctionType)) or type(value).__name__.endswith('Method')
+
+
+class _Stat:
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+
+
+class _Step(ContextDecorator):
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._start_step(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler._end_step(error=exc_type is not None)
+        return False
+
+
+class Profiler:
+    """
+    Counts and times every COM property access and method call made through the objects
+    it instruments, by element type and by name, and attributes them to user-defined steps.
+
+        profiler = Profiler()
+        sap.enable_profiling(profiler)
+        with profiler.step('fill header'):
+            sap.find_by_id('wnd[0]/usr/ctxtVBAK-AUART').set_text('OR')
+
+        @profiler.step('save')
+        def save(sap): ...
+
+        print(profiler.summary())
+
+    Calls made outside of any step are attributed to the step '<none>'.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Discards everything recorded so far."""
+        self.calls = defaultdict(_Stat)
+        self.steps = defaultdict(_Stat)
+        self.step_calls = defaultdict(_Stat)
+        self.spans = []
+        self._stack = []
+
+    def step(self, name: str) -> _Step:
+        """Context manager (or decorator) that attributes the calls made inside it to `name`."""
+        return _Step(self, name)
+
+    def _start_step(self, name: str):
+        self._stack.append({
+            'name': name,
+            'parent': self._stack[-1]['name'] if self._stack else None,
+            'start_time_unix_nano': time_ns(),
+            'start': perf_counter(),
+            'com_calls': 0,
+            'com_seconds': 0.0,
+        })
+
+    def _end_step(self, error: bool = False):
+        span = self._stack.pop()
+        elapsed = perf_counter() - span.pop('start')
+        span['end_time_unix_nano'] = span['start_time_unix_nano'] + int(elapsed * 1e9)
+        span['status'] = 'ERROR' if error else 'OK'
+        self.steps[span['name']].add(elapsed)
+        self.spans.append(span)
+
+    def record(self, element_type: str, name: str, seconds: float):
+        """Records one COM access. Called by the instrumented objects."""
+        self.calls[(element_type, name)].add(seconds)
+        if self._stack:
+            span = self._stack[-1]
+            span['com_calls'] += 1
+            span['com_seconds'] += seconds
+            self.step_calls[span['name']].add(seconds)
+        else:
+            self.step_calls['<none>'].add(seconds)
+
+    def instrument(self, com_object, element_type: str = '?'):
+        """
+        Returns a proxy of a raw scripting object that reports its accesses to this profiler.
+        element_type: type used in the report until the object's Type property is read.
+        """
+        if isinstance(com_object, (InstrumentedObject,) + _PLAIN_TYPES):
+            return com_object
+        return InstrumentedObject(com_object, self, element_type)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(stat.count for stat in self.calls.values())
+
+    def to_dict(self) -> dict:
+        return {
+            'calls': [
+                {'type': element_type, 'name': name, 'count': stat.count, 'seconds': stat.seconds}
+                for (element_type, name), stat in sorted(self.calls.items(), key=lambda item: -item[1].seconds)
+                ],
+            'steps': [
+                {
+                    'name': name,
+                    'count': stat.count,
+                    'seconds': stat.seconds,
+                    'com_calls': self.step_calls[name].count,
+                    'com_seconds': self.step_calls[name].seconds,
+                    }
+                for name, stat in self.steps.items()
+                ],
+            'spans': list(self.spans),
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_spans(self) -> list:
+        """
+        Returns the finished steps as OpenTelemetry-style span dicts, with the COM calls
+        and COM time of each step as attributes.
+        """
+        return [
+            {
+                'name': span['name'],
+                'parent': span['parent'],
+                'start_time_unix_nano': span['start_time_unix_nano'],
+                'end_time_unix_nano': span['end_time_unix_nano'],
+                'status': span['status'],
+                'attributes': {'sap.com.calls': span['com_calls'], 'sap.com.seconds': span['com_seconds']},
+                }
+            for span in self.spans
+            ]
+
+    def summary(self, limit: int = 20) -> str:
+        """Returns a text table with the most expensive COM members and the steps."""
+        lines = [f"{'type':<24} {'name':<28} {'calls':>8} {'seconds':>10} {'avg ms':>8}"]
+        for row in self.to_dict()['calls'][:limit]:
+            lines.append(
+                f"{row['type']:<24} {row['name']:<28} {row['count']:>8} {row['seconds']:>10.4f} "
+                f"{row['seconds'] / row['count'] * 1000:>8.3f}"
+                )
+        if self.steps:
+            lines.append('')
+            lines.append(f"{'step':<40} {'runs':>6} {'seconds':>10} {'com calls':>10} {'com seconds':>12}")
+            for row in self.to_dict()['steps']:
+                lines.append(
+                    f"{row['name']:<40} {row['count']:>6} {row['seconds']:>10.4f} "
+                    f"{row['com_calls']:>10} {row['com_seconds']:>12.4f}"
+                    )
+        return '\n'.join(lines)
+
+
+class InstrumentedObject:
+    """
+    Proxy of a raw scripting object (session, element, collection...) that times every
+    property access, property assignment and method call and reports it to a Profiler.
+    Objects returned by the proxied object are instrumented as well.
+
+    The element type is learnt from the first read of its Type property, which
+    SapGui.find_by_id always does, so no extra call is made to find it.
+    """
+    __slots__ = ('_com_object', '_profiler', '_type')
+
+    def __init__(self, com_object, profiler: Profiler, element_type: str = '?'):
+        object.__setattr__(self, '_com_object', com_object)
+        object.__setattr__(self, '_profiler', profiler)
+        object.__setattr__(self, '_type', element_type)
+
+    def __getattr__(self, name):
+        start = perf_counter()
+        try:
+            value = getattr(self._com_object, name)
+        except AttributeError:
+            self._profiler.record(self._type, name, perf_counter() - start)
+            raise
+        if _is_method(value):
+            # O custo de um método é medido na chamada.
+            return _InstrumentedMethod(self, name, value)
+        if name.lower() == 'type' and isinstance(value, str):
+            object.__setattr__(self, '_type', value)
+        self._profiler.record(self._type, name, perf_counter() - start)
+        return self._profiler.instrument(value)
+
+    def __setattr__(self, name, value):
+        start = perf_counter()
+        try:
+            setattr(self._com_object, name, value)
+        finally:
+            self._profiler.record(self._type, name, perf_counter() - start)
+
+    def __call__(self, *args):
+        start = perf_counter()
+        try:
+            value = self._com_object(*args)
+        finally:
+            self._profiler.record(self._type, 'Item', perf_counter() - start)
+        return self._profiler.instrument(value)
+
+    def __iter__(self):
+        for item in self._com_object:
+            yield self._profiler.instrument(item)
+
+    def __len__(self):
+        return len(self._com_object)
+
+    def __eq__(self, other):
+        if isinstance(other, InstrumentedObject):
+            other = other._com_object
+        return self._com_object == other
+
+    def __hash__(self):
+        return hash(self._com_object)
+
+    def __repr__(self):
+        return f'<Instrumented {self._com_object!r}>'
+
+
+class _InstrumentedMethod:
+    __slots__ = ('owner', 'name', 'method')
+
+    def __init__(self, owner: InstrumentedObject, name: str, method):
+        self.owner = owner
+        self.name = name
+        self.method = method
+
+    def __call__(self, *args):
+        profiler = self.owner._profiler
+        start = perf_counter()
+        try:
+            value = self.method(*args)
+        finally:
+            profiler.record(self.owner._type, self.name, perf_counter() - start)
+        return profiler.instrument(value)
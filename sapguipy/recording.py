@@ -0,0 +1,350 @@
+from pathlib import Path
+from time import perf_counter
+import re
+from sapguipy.models.exceptions import ConnectionLost
+from sapguipy.models.sap_controls import _iter_records, _is_missing
+
+# Métodos que não vão ao servidor: não encerram a tela atual.
+LOCAL_METHODS = {'setfocus', 'maximize', 'iconify', 'restore', 'setcurrentcell', 'selectcolumn', 'deselectcolumn'}
+# Propriedades cuja alteração vai ao servidor (rolagem de table controls).
+SERVER_PROPERTIES = {'position'}
+# Propriedades que o gravador registra mas não mudam nada na execução.
+NOOP_PROPERTIES = {'caretposition'}
+
+# Linhas do cabeçalho que o gravador gera para obter a sessão.
+_PREAMBLE = re.compile(r'^(if\b|end\s+if\b|else\b|set\b|wscript\.|rem\b|\')', re.IGNORECASE)
+_VALUE = r'"(?:[^"]|"")*"|[-+]?\d+(?:\.\d+)?|true\b|false\b'
+_ARGUMENTS = rf'\(\s*(?:(?:{_VALUE})(?:\s*,\s*(?:{_VALUE}))*)?\s*\)'
+# Membros intermediários, com argumentos literais opcionais: .verticalScrollbar, .getAbsoluteRow(5)
+_SEGMENT = re.compile(rf'\.(\w+)({_ARGUMENTS})?', re.IGNORECASE)
+_PATH = rf'((?:\.\w+(?:{_ARGUMENTS})?)*)\.(\w+)'
+_FIND_BY_ID = re.compile(rf'^session\.findById\("((?:[^"]|"")*)"\){_PATH}\s*(?:=\s*(.*)|(.*))$', re.IGNORECASE)
+_SESSION = re.compile(rf'^session{_PATH}\s*(?:=\s*(.*)|(.*))$', re.IGNORECASE)
+_LITERAL = re.compile(rf'\s*({_VALUE})\s*(,|$)', re.IGNORECASE)
+
+
+def _answers(element) -> bool:
+    """Checks if a scripting object still answers, i.e. the reference is not stale."""
+    try:
+        element.Id
+        return True
+    except Exception:
+        return False
+
+
+class Param:
+    """Value of a plan that is taken from a column of each row."""
+    __slots__ = ('column', 'cast')
+
+    def __init__(self, column: str, cast: type = str):
+        self.column = column
+        self.cast = cast
+
+    def __eq__(self, other):
+        return isinstance(other, Param) and (self.column, self.cast) == (other.column, other.cast)
+
+    def __hash__(self):
+        return hash((self.column, self.cast))
+
+    def __repr__(self):
+        return f'Param({self.column!r})'
+
+
+class Step:
+    """
+    One statement of a recording.
+
+    kind: 'set' (target.name = args[0]) or 'call' (target.name(*args)).
+    target: element ID, or None for the session itself.
+    name: property or method, possibly with a path like 'verticalScrollbar.position' or
+    'getAbsoluteRow(5).selected'.
+    path: the members before the last one, as (member, args) pairs, args being None for a
+    property. Defaults to the parts of a name without arguments.
+    """
+    __slots__ = ('kind', 'target', 'name', 'args', 'line', 'path')
+
+    def __init__(self, kind: str, target: str, name: str, args: tuple = (), line: int = None, path: tuple = None):
+        self.kind = kind
+        self.target = target
+        self.name = name
+        self.args = tuple(args)
+        self.line = line
+        self.path = tuple((member, None) for member in name.split('.')[:-1]) if path is None else tuple(path)
+
+    @property
+    def member(self) -> str:
+        """Last part of the name, in lowercase."""
+        return self.name.rsplit('.', 1)[-1].lower()
+
+    @property
+    def ends_screen(self) -> bool:
+        """True if the statement goes to the server, so the screen may change after it."""
+        if self.kind == 'set':
+            return self.member in SERVER_PROPERTIES
+        return self.member not in LOCAL_METHODS
+
+    def __eq__(self, other):
+        return isinstance(other, Step) and (self.kind, self.target, self.name, self.args) == (other.kind, other.target, other.name, other.args)
+
+    def __repr__(self):
+        target = 'session' if self.target is None else f'session.findById({self.target!r})'
+        if self.kind == 'set':
+            return f'{target}.{self.name} = {self.args[0]!r}'
+        return f"{target}.{self.name}({', '.join(repr(arg) for arg in self.args)})"
+
+
+def _parse_literals(text: str, line: int) -> tuple:
+    text = text.strip()
+    if text.startswith('(') and text.endswith(')'):
+        text = text[1:-1]
+    values = []
+    position = 0
+    while position < len(text):
+        match = _LITERAL.match(text, position)
+        if match is None:
+            raise ValueError(f'Line {line}: unsupported value {text[position:]!r}.')
+        literal = match.group(1)
+        if literal.startswith('"'):
+            values.append(literal[1:-1].replace('""', '"'))
+        elif literal.lower() in ('true', 'false'):
+            values.append(literal.lower() == 'true')
+        elif '.' in literal:
+            values.append(float(literal))
+        else:
+            values.append(int(literal))
+        position = match.end()
+    return tuple(values)
+
+def _parse_path(text: str, line: int) -> tuple:
+    """Returns the (member, args) pairs of the members before the last one, like '.getAbsoluteRow(5)'."""
+    return tuple(
+        (match.group(1), None if match.group(2) is None else _parse_literals(match.group(2), line))
+        for match in _SEGMENT.finditer(text)
+        )
+
+def parse_recording(source: str) -> list:
+    """
+    Parses a VBScript recorded by SAP GUI's script recorder and returns its statements as Steps.
+
+    The header that gets the session (If Not IsObject(application)..., Set session = ...) and the
+    comments are skipped. Only statements on `session` and `session.findById(...)` with literal
+    values are supported; anything else raises ValueError with the line number.
+    """
+    steps = []
+    for number, line in enumerate(source.splitlines(), start=1):
+        line = line.strip()
+        if not line or _PREAMBLE.match(line):
+            continue
+
+        match = _FIND_BY_ID.match(line)
+        if match is not None:
+            target = match.group(1).replace('""', '"')
+            path, member, value, args = match.group(2, 3, 4, 5)
+        else:
+            match = _SESSION.match(line)
+            if match is None:
+                raise ValueError(f'Line {number}: unsupported statement {line!r}.')
+            target = None
+            path, member, value, args = match.group(1, 2, 3, 4)
+        name = f'{path[1:]}.{member}' if path else member
+
+        if value is not None:
+            values = _parse_literals(value, number)
+            if len(values) != 1:
+                raise ValueError(f'Line {number}: expected one value in {line!r}.')
+            steps.append(Step('set', target, name, values, number, _parse_path(path, number)))
+        else:
+            steps.append(Step('call', target, name, _parse_literals(args or '', number), number, _parse_path(path, number)))
+    return steps
+
+def optimize(steps: list) -> list:
+    """
+    Removes the statements that do not change the result of a recording:
+
+    - caretPosition assignments;
+    - setFocus calls, except the ones right before a sendVKey (F4, F1... act on the focused field);
+    - assignments overwritten by a later assignment to the same property in the same screen.
+    """
+    steps = [step for step in steps if not (step.kind == 'set' and step.member in NOOP_PROPERTIES)]
+
+    kept = []
+    for index, step in enumerate(steps):
+        if step.kind == 'call' and step.member == 'setfocus':
+            following = steps[index + 1] if index + 1 < len(steps) else None
+            if following is None or following.kind != 'call' or following.member != 'sendvkey':
+                continue
+        kept.append(step)
+
+    # Percorre de trás para frente: só a última atribuição de cada propriedade na tela vale.
+    result = []
+    assigned = set()
+    for step in reversed(kept):
+        if step.ends_screen:
+            assigned.clear()
+        if step.kind == 'set' and not step.ends_screen:
+            key = (step.target, step.name.lower())
+            if key in assigned:
+                continue
+            assigned.add(key)
+        result.append(step)
+    result.reverse()
+    return result
+
+def parameterize(steps: list, parameters: dict) -> list:
+    """
+    Replaces recorded literal values by Params, so they are taken from the rows given to
+    RecordingPlan.run.
+
+    parameters: recorded value -> column. A key may also be an element ID, to replace the
+    value assigned to that element whatever it was.
+    """
+    result = []
+    for step in steps:
+        args = step.args
+        if step.kind == 'set' and step.target in parameters:
+            args = (Param(parameters[step.target], type(args[0])),)
+        else:
+            args = tuple(
+                Param(parameters[arg], type(arg)) if not isinstance(arg, bool) and isinstance(arg, (str, int, float)) and arg in parameters else arg
+                for arg in args
+                )
+        result.append(Step(step.kind, step.target, step.name, args, step.line, step.path))
+    return result
+
+
+class RecordingPlan:
+    """
+    Executable plan of a recording, built by compile_recording.
+
+        plan = compile_recording('va01.vbs', parameters={'OR': 'order_type', 'M-01': 'material'})
+        results = plan.run(sap, orders_dataframe)
+
+    In each screen (the statements between two server round-trips) every element is looked up
+    only once, and after each round-trip the plan waits for the session to be idle.
+    """
+    def __init__(self, steps: list, statements: int = None):
+        self.steps = list(steps)
+        self.statements = len(self.steps) if statements is None else statements
+
+    @property
+    def parameters(self) -> list:
+        """Columns used by the plan, in order of first use."""
+        columns = []
+        for step in self.steps:
+            for arg in step.args:
+                if isinstance(arg, Param) and arg.column not in columns:
+                    columns.append(arg.column)
+        return columns
+
+    @property
+    def stats(self) -> dict:
+        """Number of recorded statements, of steps kept, of screens and of element lookups per run."""
+        lookups = 0
+        screens = 0
+        targets = set()
+        for step in self.steps:
+            if step.target is not None and step.target not in targets:
+                targets.add(step.target)
+                lookups += 1
+            if step.ends_screen:
+                screens += 1
+                targets.clear()
+        return {'statements': self.statements, 'steps': len(self.steps), 'screens': screens, 'lookups': lookups}
+
+    def run(self, sap, rows=None, timeout: float = 30) -> list:
+        """
+        Runs the plan once, or once per row, and returns for each run the status bar message
+        shown at the end, like {'row': 0, 'message_type': 'S', 'message': '...', 'seconds': 1.2}.
+
+        rows: pandas DataFrame, iterable of dicts or None. Steps whose parameter is missing in
+        a row (None, NaN) are skipped.
+        timeout: seconds to wait for the session to be idle after each round-trip.
+        """
+        if rows is None:
+            records = [{}]
+        else:
+            columns, values = _iter_records(rows)
+            records = (dict(zip(columns, row)) for row in values)
+
+        results = []
+        for index, record in enumerate(records):
+            if sap.monitor is not None and sap.monitor.lost.is_set():
+                raise ConnectionLost(f'The SAP connection was lost: {sap.monitor.error}')
+            start = perf_counter()
+            self._run_once(sap, record, timeout)
+            statusbar = sap.session.FindById('wnd[0]/sbar')
+            results.append({'row': index, 'message_type': statusbar.MessageType, 'message': statusbar.Text, 'seconds': perf_counter() - start})
+        return results
+
+    def _run_once(self, sap, record: dict, timeout: float):
+        elements = {}
+        for step in self.steps:
+            args = []
+            for arg in step.args:
+                if isinstance(arg, Param):
+                    value = record[arg.column]
+                    if _is_missing(value):
+                        break
+                    arg = value if isinstance(value, arg.cast) else arg.cast(value)
+                args.append(arg)
+            else:
+                self._apply(sap, step, args, elements)
+                if step.ends_screen:
+                    elements.clear()
+                    sap._after_action()
+                    sap.wait_until_idle(timeout)
+
+    def _apply(self, sap, step: Step, args: list, elements: dict):
+        cached = step.target in elements
+        element = self._element(sap, step.target, elements)
+        try:
+            self._apply_to(element, step, args)
+        except Exception:
+            # Só repete quando a referência guardada deixou de valer (a tela foi refeita por um
+            # evento do servidor). Erros da própria ação, ou de uma ação que vai ao servidor,
+            # não são repetidos: press e sendVKey não podem rodar duas vezes.
+            if not cached or (step.kind == 'call' and step.ends_screen) or _answers(element):
+                raise
+            elements.pop(step.target)
+            self._apply_to(self._element(sap, step.target, elements), step, args)
+
+    def _element(self, sap, target: str, elements: dict):
+        if target is None:
+            return sap.session
+        element = elements.get(target)
+        if element is None:
+            element = elements[target] = sap.session.FindById(target)
+        return element
+
+    def _apply_to(self, element, step: Step, args: list):
+        for name, arguments in step.path:
+            element = getattr(element, name)
+            if arguments is not None:
+                element = element(*arguments)
+        member = step.name.rsplit('.', 1)[-1]
+        if step.kind == 'set':
+            setattr(element, member, args[0])
+        else:
+            getattr(element, member)(*args)
+
+    def __repr__(self):
+        return '\n'.join(repr(step) for step in self.steps)
+
+
+def compile_recording(source: str, parameters: dict = None, optimized: bool = True) -> RecordingPlan:
+    """
+    Compiles a SAP GUI script recording into a RecordingPlan.
+
+    source: path of the .vbs file (str or Path), or the script itself.
+    parameters: recorded value (or element ID) -> column of the rows given to RecordingPlan.run.
+    optimized: if False, every recorded statement is kept.
+    """
+    if isinstance(source, Path) or ('\n' not in source and source.lower().endswith('.vbs')):
+        source = Path(source).read_text(encoding='utf-8-sig', errors='replace')
+    steps = parse_recording(source)
+    statements = len(steps)
+    if optimized:
+        steps = optimize(steps)
+    if parameters:
+        steps = parameterize(steps, parameters)
+    return RecordingPlan(steps, statements)
@@ -0,0 +1,316 @@
+import re
+from sapguipy.models.exceptions import ScreenRuleError, RetryRequested
+from sapguipy.models.sap_controls import snapshot_element
+
+# Propriedade da barra de status -> atributo do ScreenState. Só as usadas pelas regras são lidas.
+STATUSBAR_PROPERTIES = {
+    'MessageType': 'message_type',
+    'MessageId': 'message_id',
+    'MessageNumber': 'message_number',
+    'MessageParameter': 'parameters',
+    'Text': 'text',
+}
+# Profundidade dos elementos lidos em cada popup (wnd[1]/usr/txtMESSTXT1 está no nível 2).
+POPUP_DEPTH = 3
+
+ACTIONS = ('dismiss', 'fail', 'retry')
+
+
+def _relative_id(element_id: str, prefix: str) -> str:
+    return element_id[len(prefix):] if element_id.startswith(prefix) else element_id
+
+def _popup_elements(element, prefix: str, depth: int, elements: set):
+    """Adds to `elements` the IDs, relative to the popup, of the children of a raw element."""
+    if depth <= 0 or not snapshot_element(element, ('ContainerType',))['ContainerType']:
+        return
+    for child in element.Children:
+        elements.add(_relative_id(child.Id, prefix))
+        _popup_elements(child, prefix, depth - 1, elements)
+
+
+class Popup:
+    """Modal window open in the session: its ID, its title and the IDs of its elements, like 'usr/txtMESSTXT1'."""
+    __slots__ = ('id', 'title', 'elements')
+
+    def __init__(self, id: str, title: str, elements: set):
+        self.id = id
+        self.title = title
+        self.elements = elements
+
+    def __repr__(self):
+        return f'<Popup {self.id} {self.title!r}>'
+
+
+class ScreenState:
+    """
+    What a RuleEngine reads of the session after an action: the message of the status bar
+    and the popups open over the main window, topmost last. The state returned by
+    RuleEngine.check also has, in `applied`, how many times each rule was applied in that check.
+    """
+    def __init__(self, message_type: str = '', message_id: str = '', message_number: str = '', parameters: tuple = (), text: str = '', popups: list = None):
+        self.message_type = message_type or ''
+        self.message_id = message_id or ''
+        self.message_number = message_number or ''
+        self.parameters = tuple(parameters)
+        self.text = text or ''
+        self.popups = list(popups or [])
+        self.statusbar = None
+        self.applied = {}
+
+    @classmethod
+    def read(cls, session, properties: tuple = tuple(STATUSBAR_PROPERTIES), popups: bool = True, statusbar=None) -> 'ScreenState':
+        """
+        Reads the state of a raw session: the given properties of the status bar and, if a popup
+        is open, the windows of the session. Without popups this costs one call per property
+        plus one lookup of 'wnd[1]'.
+
+        properties: status bar properties to read, keys of STATUSBAR_PROPERTIES.
+        statusbar: the raw status bar, if it is already known. Otherwise it is looked up.
+        """
+        state = cls()
+        if properties:
+            element = statusbar if statusbar is not None else session.FindById('wnd[0]/sbar', False)
+            if element is not None:
+                state.statusbar = element
+                for prop in properties:
+                    value = getattr(element, prop)
+                    if prop == 'MessageParameter':
+                        value = ((value,) if value else ()) if isinstance(value, str) else tuple(value or ())
+                    setattr(state, STATUSBAR_PROPERTIES[prop], value or ('' if prop != 'MessageParameter' else ()))
+
+        if popups and session.FindById('wnd[1]', False) is not None:
+            for window in session.Children:
+                window_id = window.Id
+                if window_id.endswith('/wnd[0]'):
+                    continue
+                elements = set()
+                _popup_elements(window, window_id + '/', POPUP_DEPTH, elements)
+                state.popups.append(Popup(window_id, window.Text, elements))
+        return state
+
+    def __repr__(self):
+        return f'<ScreenState {self.message_type}{self.message_id}/{self.message_number} {self.text!r} popups={self.popups}>'
+
+
+class Rule:
+    """
+    Declarative rule of a RuleEngine. The conditions use technical values (message type, class
+    and number, element IDs), which are the same in every logon language:
+
+        Rule('fail', message_id='00', message_number='152', error=ValueError)   # senha incorreta
+        Rule('dismiss', popup='usr/radMULTI_LOGON_OPT1', select='usr/radMULTI_LOGON_OPT1')
+        Rule('dismiss', message_type='W')                                       # confirma avisos com Enter
+        Rule('retry', message_id='M3', message_number='897')                     # registro bloqueado
+
+    A rule matches when all its conditions match. Rules with popup or title match the topmost
+    popup that meets them; the other conditions are checked against the status bar.
+
+    action:
+        'dismiss': selects `select` and presses `press` in the popup, or Enter in the main
+        window when the rule has no popup condition.
+        'fail': raises `error` with `message`, or the text of the status bar.
+        'retry': closes the popup like 'dismiss', if the rule matched one, and raises
+        RetryRequested, so RuleEngine.run runs the action again.
+        A callable(sap, state) is called instead, like SapGui.change_password.
+    """
+    def __init__(self, action, message_type: str = None, message_id: str = None, message_number: str = None, parameters: tuple = None, text: str = None, popup: str = None, title: str = None, press: str = 'tbar[0]/btn[0]', select: str = None, error: type = ScreenRuleError, message: str = None, name: str = None):
+        """
+        message_type: 'S', 'E', 'W', 'I' or 'A', or several of them like 'EA'.
+        message_id, message_number: class and number of the message, like '00' and '152'.
+        parameters: values of the message parameters, None matches any value.
+        text: regular expression searched in the status bar text. Depends on the logon language.
+        popup: ID of an element that the popup must have, relative to the popup, like 'usr/txtMESSTXT1'.
+        title: regular expression searched in the popup title. Depends on the logon language.
+        press, select: IDs, relative to the popup, of the button to press and of the option to select when dismissing.
+        error, message: exception raised by 'fail' and its message.
+        """
+        if not callable(action) and action not in ACTIONS:
+            raise ValueError(f"Unknown action '{action}'. Use one of: {', '.join(ACTIONS)} or a callable.")
+        if all(condition is None for condition in (message_type, message_id, message_number, parameters, text, popup, title)):
+            raise ValueError('A rule needs at least one condition.')
+        self.action = action
+        self.message_type = message_type
+        self.message_id = message_id
+        self.message_number = message_number
+        self.parameters = None if parameters is None else tuple(parameters)
+        self.text = None if text is None else re.compile(text)
+        self.popup = popup
+        self.title = None if title is None else re.compile(title)
+        self.press = press
+        self.select = select
+        self.error = error
+        self.message = message
+        self.name = name or self._describe()
+
+    @property
+    def checks_popups(self) -> bool:
+        return self.popup is not None or self.title is not None
+
+    @property
+    def checks_statusbar(self) -> bool:
+        return bool(self.statusbar_properties)
+
+    @property
+    def statusbar_properties(self) -> tuple:
+        """Status bar properties that the conditions of the rule look at."""
+        conditions = (self.message_type, self.message_id, self.message_number, self.parameters, self.text)
+        return tuple(prop for prop, condition in zip(STATUSBAR_PROPERTIES, conditions) if condition is not None)
+
+    def _describe(self) -> str:
+        if self.checks_popups:
+            return f'popup {self.popup or self.title.pattern}'
+        return f"message {self.message_type or ''}{self.message_id or ''}{'/' + self.message_number if self.message_number else ''}"
+
+    def _matches_statusbar(self, state: ScreenState) -> bool:
+        if self.message_type is not None and (not state.message_type or state.message_type not in self.message_type):
+            return False
+        if self.message_id is not None and state.message_id.upper() != self.message_id.upper():
+            return False
+        if self.message_number is not None and state.message_number.lstrip('0') != self.message_number.lstrip('0'):
+            return False
+        if self.parameters is not None and any(
+            expected is not None and (index >= len(state.parameters) or state.parameters[index] != expected)
+            for index, expected in enumerate(self.parameters)
+            ):
+            return False
+        return self.text is None or self.text.search(state.text) is not None
+
+    def match(self, state: ScreenState):
+        """Returns (True, popup) if the rule matches the state, popup being None for status bar rules. Otherwise (False, None)."""
+        if self.checks_statusbar and not self._matches_statusbar(state):
+            return False, None
+        if not self.checks_popups:
+            return True, None
+        for popup in reversed(state.popups):
+            if (self.popup is None or self.popup in popup.elements) and (self.title is None or self.title.search(popup.title)):
+                return True, popup
+        return False, None
+
+    def __repr__(self):
+        action = self.action if isinstance(self.action, str) else getattr(self.action, '__name__', repr(self.action))
+        return f'<Rule {action} {self.name}>'
+
+
+class RuleEngine:
+    """
+    Checks the session after an action against a list of rules, in order, and applies the first
+    one that matches. Dismissing may reveal another popup or message, so the check is repeated
+    until no rule matches.
+
+        rules = RuleEngine([Rule('dismiss', message_type='W'), Rule('fail', message_type='EA')])
+        sap = SapGui(..., rules=rules)     # verificado após cada ação que vai ao servidor
+        rules.run(sap, lambda sap: sap.find_by_id('wnd[0]/tbar[0]/btn[11]').press(), retries=2)
+
+    Each check reads the status bar and the open popups once (see ScreenState.read), instead
+    of probing each known element with its own find_by_id.
+    """
+    def __init__(self, rules: list, max_rounds: int = 10, timeout: float = 30):
+        """
+        rules: Rules, checked in order.
+        max_rounds: how many rules may be applied in one check before giving up.
+        timeout: seconds to wait for the session to be idle after dismissing.
+        """
+        self.rules = list(rules)
+        self.max_rounds = max_rounds
+        self.timeout = timeout
+
+    def __add__(self, other: 'RuleEngine|list') -> 'RuleEngine':
+        rules = other.rules if isinstance(other, RuleEngine) else list(other)
+        return RuleEngine(self.rules + rules, self.max_rounds, self.timeout)
+
+    def read(self, sap) -> ScreenState:
+        """Reads the part of the screen that the rules look at."""
+        properties = {prop for rule in self.rules for prop in rule.statusbar_properties}
+        return ScreenState.read(
+            sap.session,
+            properties=tuple(prop for prop in STATUSBAR_PROPERTIES if prop in properties),
+            popups=any(rule.checks_popups for rule in self.rules),
+            statusbar=getattr(sap.statusbar, 'element', None)
+            )
+
+    def match(self, state: ScreenState):
+        """Returns the first rule that matches the state and the popup it matched, or (None, None)."""
+        for rule in self.rules:
+            matched, popup = rule.match(state)
+            if matched:
+                return rule, popup
+        return None, None
+
+    def check(self, sap) -> ScreenState:
+        """
+        Applies the rules to the session until none matches and returns the last state read,
+        with the rules applied in this check (rule name -> times) in its `applied` attribute.
+        The engine keeps no state between checks, so it can be shared by sessions and threads.
+
+        Raises:
+            The `error` of a 'fail' rule.
+            RetryRequested: if a 'retry' rule matched.
+            ScreenRuleError: if rules keep matching after max_rounds.
+        """
+        applied = {}
+        for _ in range(self.max_rounds):
+            state = self.read(sap)
+            rule, popup = self.match(state)
+            if rule is None:
+                state.applied = applied
+                return state
+            applied[rule.name] = applied.get(rule.name, 0) + 1
+            self._apply(sap, rule, state, popup)
+        raise ScreenRuleError(f'The screen still matches the rules after {self.max_rounds} rounds: {state!r}')
+
+    def _apply(self, sap, rule: Rule, state: ScreenState, popup: Popup):
+        if callable(rule.action):
+            rule.action(sap, state)
+            return
+        if not state.text and state.statusbar is not None and rule.message is None:
+            # O texto só é lido quando vai para a mensagem do erro.
+            state.text = state.statusbar.Text
+        if rule.action == 'fail':
+            detail = popup.title if popup is not None and not state.text else state.text
+            raise rule.error(rule.message or f'{rule.name}: {detail}')
+
+        if rule.action == 'dismiss':
+            self._dismiss(sap, rule, popup)
+            return
+        if popup is not None:
+            self._dismiss(sap, rule, popup)
+        raise RetryRequested(rule.message or f'{rule.name}: {state.text or (popup.title if popup else "")}')
+
+    def _dismiss(self, sap, rule: Rule, popup: Popup):
+        # Usa os objetos COM diretamente: os wrappers chamariam a verificação de novo.
+        session = sap.session
+        if popup is None:
+            session.FindById('wnd[0]').SendVKey(0)
+        else:
+            if rule.select is not None:
+                session.FindById(f'{popup.id}/{rule.select}').Select()
+            if rule.press is not None:
+                session.FindById(f'{popup.id}/{rule.press}').Press()
+        sap.invalidate_cache()
+        sap.wait_until_idle(self.timeout)
+
+    def run(self, sap, action, *args, retries: int = 1, **kwargs):
+        """
+        Runs action(sap, *args, **kwargs), checks the screen and returns the action's result.
+        When a 'retry' rule matches, the action is run again, up to `retries` more times.
+        """
+        for attempt in range(retries + 1):
+            try:
+                result = action(sap, *args, **kwargs)
+                sap.check_screen(self)
+                return result
+            except RetryRequested:
+                if attempt == retries:
+                    raise
+
+
+def _change_password(sap, state: ScreenState):
+    sap.change_password()
+
+# Regras do logon, no lugar dos textos em português e das sondagens de cada popup.
+INFO_POPUP = Rule('dismiss', popup='usr/txtMESSTXT1', name='information popup')
+WRONG_PASSWORD = Rule('fail', message_id='00', message_number='152', error=ValueError, message='Failed to login with the provided credentials.', name='wrong password')
+MULTI_LOGON = Rule('dismiss', popup='usr/radMULTI_LOGON_OPT1', select='usr/radMULTI_LOGON_OPT1', name='multiple logon')
+PASSWORD_CHANGE = Rule(_change_password, popup='usr/lblRSYST-NCODE_TEXT', name='password change')
+
+LOGON_RULES = RuleEngine([INFO_POPUP, WRONG_PASSWORD, MULTI_LOGON, PASSWORD_CHANGE])
@@ -1,26 +1,31 @@
 from datetime import datetime, timedelta
-from pythoncom import CoInitialize
-from pywinauto import Application
-from subprocess import Popen
-from threading import Thread
-from platform import system
 from random import randint
 from pathlib import Path
-import pygetwindow as gw
-from time import sleep
-import win32com.client
-import psutil
-import os
-from sapguipy.models.exceptions import ElementNotFound
+from sapguipy.models.exceptions import ElementNotFound, WaitTimeout, ConnectionLost
+from sapguipy.watchdog import ConnectionMonitor
+from sapguipy.wait import wait_until, PhaseTimer
+from sapguipy.profiler import Profiler, InstrumentedObject
 from sapguipy.models.sap_controls import *
+from sapguipy.models.screen import dump_element, diff_screens
+from sapguipy.backends import Backend, get_backend
+from sapguipy.rules import RuleEngine, ScreenState, LOGON_RULES
+
+# Sessões por conexão que new_window aceita abrir (o servidor permite até 6, rdisp/max_alt_modes).
+MAX_SESSIONS = 3
 
 class SapGui:
-    def __init__(self, sid: str, user: str, pwd: str, mandante: str, root_sap_dir: str='C:\Program Files (x86)\SAP\FrontEnd\SAPGUI'):
+    def __init__(self, sid: str, user: str, pwd: str, mandante: str, root_sap_dir: str='C:\Program Files (x86)\SAP\FrontEnd\SAPGUI', connection_id: int|str = 0, session_id: int|str = 0, element_cache: bool = False, auto_wait: bool = False, backend: Backend = None, rules: RuleEngine = None):
         """
         sid: identificador do sistema, cada ambiente tem seu próprio SID. Normalmente são: PRD (produção) / DEV (desenvolvimento) / QAS (qualidade).
         usuario: usuário que a automação utilizará para realizar login.
         senha: senha que a automação utilizará para realizar login.
         diretorio_instalacao: diretório onde o sapshcut.exe se encontra, onde foi realizado a instalação do SAP.
+        connection_id: índice (negativos contam a partir do fim, -1 é a última conexão aberta) ou ID ('/app/con[1]') da conexão a ser utilizada por attach. start_sap sempre utiliza a conexão que abriu.
+        session_id: índice ou ID ('/app/con[1]/ses[0]') da sessão a ser utilizada dentro da conexão.
+        element_cache: se True, os elementos retornados por find_by_id são reaproveitados até a próxima ação que vá ao servidor (press, send_v_key, open_transaction...).
+        auto_wait: se True, as ações que vão ao servidor só retornam quando a sessão deixar de estar ocupada (ver wait_until_idle).
+        backend: operações dependentes do sistema operacional (COM, janelas e processos). Por padrão, o do sistema atual.
+        rules: regras (RuleEngine) verificadas após cada ação que vai ao servidor, depois de a sessão deixar de estar ocupada.
         """
         self.sid = sid
         self.user = user
@@ -32,18 +37,35 @@ class SapGui:
         self.logged = False
         self.session_info = None
         self.statusbar = None
+        self.timings = {}
+        self.profiler = None
+        self.monitor = None
+        self.program = None
+        self._owned_pids = set()
+        self._owns_connection = False
+        self._owns_session = False
+        self.connection_id = connection_id
+        self.session_id = session_id
+        self.element_cache = element_cache
+        self.auto_wait = auto_wait
+        self.backend = backend or get_backend()
+        self.rules = rules
+        self._checking_screen = False
+        self._element_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def __enter__(self):
         self.start_sap()
-        self.thread_conexao = Thread(target=self.verify_sap_connection,daemon=True)
-        self.thread_conexao.start()
+        self.start_monitor()
         return self
     
     def __exit__(self, exc_type, exc_value, traceback):
+        self.stop_monitor()
         if self.logged:
             self.quit()
         
-    def start_sap(self):
+    def start_sap(self, timeout: float = 60):
         """
         Starts the SAP application and establishes a session.
 
@@ -52,61 +74,129 @@ class SapGui:
         multiple login attempts and manages password changes if required. The method 
         sets the `logged` attribute to `True` upon successful login.
 
+        Each step (scripting engine available, connection opened, session idle) is awaited
+        only as long as it takes, up to `timeout` seconds. The time spent in each phase is
+        stored in the `timings` attribute.
+
         Raises:
-            Exception: If the SAP application fails to start after multiple attempts 
-            or if the SAP Application object cannot be obtained.
+            Exception: If the SAP application fails to start or if the SAP Application 
+            object cannot be obtained within the timeout.
+            WaitTimeout: If the connection or the session is not ready within the timeout.
             ValueError: If the login attempt fails due to incorrect credentials.
         """
-        if system() == 'Windows':
-            tries = 0
-            while tries <=5:
-                try:
-                    self.program = Popen(args=f'{self.root_sap_dir}/sapshcut.exe -system={self.sid} -client={self.mandante} -user={self.user} -pw={self.__pwd} -language={self.language}')
-                    sleep(1)
-                    self.SapGuiAuto = win32com.client.GetObject('SAPGUI',CoInitialize())
-                    if self.SapGuiAuto:
-                        break
-                except Exception as e:
-                    if tries >= 5:
+        if self.backend.supported:
+            from subprocess import Popen
+
+            timer = PhaseTimer()
+            self.timings = timer.timings
+            self.backend.initialize_thread()
+
+            # Outros robôs do mesmo usuário podem abrir conexões ao mesmo tempo: só a conexão
+            # que não existia antes deste sapshcut pertence a este objeto.
+            with self.backend.launch_lock():
+                known_connections = self._connection_ids()
+                with timer.phase('launch'):
+                    try:
+                        self.program = Popen(args=f'{self.root_sap_dir}/sapshcut.exe -system={self.sid} -client={self.mandante} -user={self.user} -pw={self.__pwd} -language={self.language}')
+                    except Exception as e:
                         raise Exception(f'Failed to get control of SAP: {e}.')
-                    tries += 1
-
-                    sleep(3)
-
-            # Get the SAP Application object
-            self.application = self.SapGuiAuto.GetScriptingEngine
-            if not self.application:
-                raise Exception("Failed to get SAP Application object.")
-
-            sleep(2)
-            self.connection = self.application.Children(0)
-            self.session = self.connection.Children(0)
-            self.session_info = GuiSessionInfo(self.session.info)
-            self.statusbar = self.find_by_id("wnd[0]/sbar")
-
-            # Se aparecer a janela de x tentativas com a senha incorreta
-            if self.find_by_id("wnd[1]/usr/txtMESSTXT1", False):
-                self.find_by_id("wnd[1]/tbar[0]/btn[0]").press()
-
-            if self.session_info.get_user() is None:
-                if self.statusbar.get_text() == 'O nome ou a senha não está correto (repetir o logon)':
-                    raise ValueError('Failed to login with the provided credentials.')
-                
-                if self.find_by_id("wnd[1]/usr/radMULTI_LOGON_OPT1", False):
-                    self.find_by_id("wnd[1]/usr/radMULTI_LOGON_OPT1").select()
-                    self.find_by_id("wnd[1]/tbar[0]/btn[0]").press()
-            
-            if self.find_by_id("wnd[1]/usr/lblRSYST-NCODE_TEXT", False):
-                # Se aparecer a tela de troca de senha, resetar a senha
-                self.change_password()
-            self.logged = True
+
+                with timer.phase('scripting_engine'):
+                    try:
+                        self.SapGuiAuto = wait_until(self._track_processes, timeout, description='the SAPGUI object')
+                        # Get the SAP Application object
+                        self.application = wait_until(lambda: self.SapGuiAuto.GetScriptingEngine, timeout, description='the scripting engine')
+                    except WaitTimeout as e:
+                        raise Exception(f'Failed to get control of SAP: {e}')
+
+                with timer.phase('connection'):
+                    connection = wait_until(lambda: self._new_connection(known_connections), timeout, description='the SAP connection')
+                self.connection_id = connection.Id
+                self._owns_connection = True
+
+            self._open_session(timer, timeout, connection)
         else:
             raise Exception('This library only supports Windows OS')
         
+    def _connection_ids(self) -> set:
+        """Returns the IDs of the connections already open in saplogon, if it is running."""
+        try:
+            application = self.backend.get_sapgui_object().GetScriptingEngine
+            return {connection.Id for connection in application.Children}
+        except Exception:
+            return set()
+
+    def _new_connection(self, known_connections: set):
+        """Returns the connection that is not in known_connections, or None while it is not open."""
+        for connection in self.application.Children:
+            if connection.Id not in known_connections:
+                return connection
+        return None
+
+    def _track_processes(self):
+        """
+        Records the processes started by sapshcut (saplogon, when it was not running yet)
+        while waiting for the SAPGUI object, and returns the object once it is registered.
+        """
+        self._owned_pids |= self.backend.process_tree(self.program.pid)
+        return self.backend.get_sapgui_object()
+
+    def attach(self, application, timeout: float = 60):
+        """
+        Attaches to a scripting engine that is already running, instead of launching SAP.
+
+        application: the GuiApplication object (SapGuiAuto.GetScriptingEngine). Any object with
+        the same interface is accepted, like sapguipy.testing.FakeEngine().application.
+        The connection and the session are chosen by connection_id and session_id.
+        """
+        timer = PhaseTimer()
+        self.timings = timer.timings
+        self.application = application
+        self._open_session(timer, timeout)
+        return self
+
+    def _open_session(self, timer: PhaseTimer, timeout: float, connection=None):
+        """
+        Waits for the connection and the session of the scripting engine and handles the logon popups.
+        connection: the connection to use, already found. By default it is chosen by connection_id.
+        """
+        if connection is not None:
+            self.connection = connection
+        else:
+            with timer.phase('connection'):
+                self.connection = wait_until(lambda: self._get_child(self.application, self.connection_id), timeout, description='the SAP connection')
+
+        with timer.phase('session'):
+            self.session = wait_until(lambda: self._get_child(self.connection, self.session_id), timeout, description='the SAP session')
+            wait_until(lambda: not self.session.Busy, timeout, description='the session to be idle')
+
+        self.invalidate_cache()
+        self.session_info = GuiSessionInfo(self.session.info)
+        self.statusbar = self.find_by_id("wnd[0]/sbar")
+
+        # Popups de tentativas com a senha incorreta, de logon múltiplo e de troca de senha
+        self.check_screen(LOGON_RULES)
+        self.logged = True
+
+    def _get_child(self, parent, child_id: int|str):
+        """
+        Returns a child of the application or of a connection, by index or by ID.
+        Negative indexes are counted from the last child.
+        """
+        if isinstance(child_id, str):
+            element = self.application.FindById(child_id, False)
+            if element is None:
+                raise ElementNotFound(f"The element with ID '{child_id}' was not found.")
+            return element
+        if child_id < 0:
+            child_id += parent.Children.Count
+        return parent.Children(child_id)
+
     def change_password(self):
         """
         If the password is expired, SAP will open an modal to change the password.
-        This method changes the password in this modal.
+        This method changes the password in this modal. It is called by LOGON_RULES, whose
+        next check closes the information popup that SAP shows after the change.
         """
         _current_date = datetime.now()
         _random = randint(0,100)
@@ -116,9 +206,6 @@ class SapGui:
         self.find_by_id("wnd[1]/usr/pwdRSYST-NCODE").set_text(self.new_pwd)
         self.find_by_id("wnd[1]/usr/pwdRSYST-NCOD2").set_text(self.new_pwd)
         self.find_by_id("wnd[1]/tbar[0]/btn[0]").press()
-
-        if self.find_by_id("wnd[1]/usr/txtMESSTXT1", False):
-            self.find_by_id("wnd[1]/tbar[0]/btn[0]").press()
         
     def get_user_logged(self):
         
@@ -128,26 +215,53 @@ class SapGui:
         user = self.session_info.get_user()
         return None if user == '' else user
     
-    def new_window(self):
-        if self.connection.Sessions.Count < 3:
-            self.session.CreateSession()
-            sleep(2)
-            new_session = self.connection.Children(self.connection.Sessions.Count-1)
-            return SapGui(
-                        sid=self.sid,
-                        user=self.user,
-                        pwd=self.__pwd,
-                        mandante=self.mandante,
-                        root_sap_dir=str(self.root_sap_dir)
-                        )._initialize_new_session(new_session)
+    def new_window(self, timeout: float = 30):
+        """
+        Opens a new session in the current connection and returns a new SapGui object bound to it.
+        Waits until the session is created and idle, up to `timeout` seconds.
+        """
+        sessions_count = self.connection.Sessions.Count
+        if sessions_count < MAX_SESSIONS:
+            timer = PhaseTimer()
+            with timer.phase('session'):
+                self.session.CreateSession()
+                wait_until(lambda: self.connection.Sessions.Count > sessions_count, timeout, description='the new session')
+                new_session = self.connection.Children(self.connection.Sessions.Count-1)
+                wait_until(lambda: not new_session.Busy, timeout, description='the new session to be idle')
+            new_window = self._clone_for_session(new_session)
+            new_window._owns_session = True
+            new_window.timings = timer.timings
+            return new_window
         else:
             raise Exception('Maximum number of windows reached.')
+
+    def _clone_for_session(self, session):
+        """
+        Returns a new SapGui object with the same credentials, bound to the given session.
+        """
+        clone = SapGui(
+                    sid=self.sid,
+                    user=self.user,
+                    pwd=self.__pwd,
+                    mandante=self.mandante,
+                    root_sap_dir=str(self.root_sap_dir),
+                    connection_id=self.connection_id,
+                    session_id=self.session_id,
+                    element_cache=self.element_cache,
+                    auto_wait=self.auto_wait,
+                    backend=self.backend,
+                    rules=self.rules
+                    )
+        clone.application = self.application
+        clone.connection = self.connection
+        return clone._initialize_new_session(session)
         
     def _initialize_new_session(self, session):
         """
         Initializes a new session within the SAP application and returns a new SapGui object.
         """
         self.session = session
+        self.invalidate_cache()
         self.session_info = GuiSessionInfo(self.session.info)
         self.statusbar = self.find_by_id("wnd[0]/sbar")
         self.logged = True
@@ -160,66 +274,188 @@ class SapGui:
         self.find_by_id("wnd[0]").maximize()
         self.find_by_id("wnd[0]/usr/txtRSYST-BNAME").set_text(self.user)
         self.find_by_id("wnd[0]/usr/pwdRSYST-BCODE").set_text(self.__pwd)
-        self.find_by_id("wnd[0]").sendVKey(0)
+        self.find_by_id("wnd[0]").send_v_key(0)
 
         if self.get_user_logged() is None:
-            if self.find_by_id("wnd[0]/sbar/pane[0]").text == 'O nome ou a senha não está correto (repetir o logon)':
-                raise ValueError('Failed to login with the provided credentials.')
-            
-            self.find_by_id("wnd[1]/usr/radMULTI_LOGON_OPT1").select()
-            self.find_by_id("wnd[1]/tbar[0]/btn[0]").press()
+            self.check_screen(LOGON_RULES)
 
     def logoff(self):
         """
         Logs out of the SAP application.
         """
+        # O fim do logon não é uma queda da conexão.
+        self.stop_monitor()
         self.find_by_id("wnd[0]").maximize()
         self.find_by_id("wnd[0]/tbar[0]/okcd").set_text("/nend")
-        self.find_by_id("wnd[0]").sendVKey(0)
+        self.find_by_id("wnd[0]").send_v_key(0)
         self.find_by_id("wnd[1]/usr/btnSPOP-OPTION1").press()
 
-    def quit(self):
+    def quit(self, timeout: float = 10):
         """
-        Forces the SAP application to quit.
+        Closes only what this object opened: the session created by new_window, or the connection
+        and the processes started by start_sap. They are closed through the scripting API first;
+        the processes still running after `timeout` seconds are killed. Sessions and processes of
+        other SapGui objects, or of other bots logged with the same Windows user, are left untouched.
         """
-        self.program.terminate()
+        # O fechamento da conexão não é uma queda da conexão.
+        self.stop_monitor()
+        try:
+            if self._owns_session:
+                self.connection.CloseSession(self.session.Id)
+            elif self._owns_connection:
+                connections_count = self.application.Children.Count
+                self.connection.CloseConnection()
+                wait_until(lambda: self.application.Children.Count < connections_count, timeout, description='the connection to close')
+        except Exception:
+            # A conexão pode já ter caído, nesse caso os processos são encerrados abaixo.
+            pass
+
+        if self._owned_pids:
+            try:
+                # O saplogon iniciado por este objeto pode estar atendendo conexões de outros robôs.
+                shared = self.application.Children.Count > 0
+            except Exception:
+                shared = False
+            if not shared:
+                self.backend.terminate_processes(self._owned_pids, timeout)
+                self._owned_pids = set()
 
-        for proc in psutil.process_iter(['pid', 'name', 'username']):
-            if 'saplogon' in proc.info['name'].lower() and proc.info['username'] == f"{os.getenv('USERDOMAIN')}\{os.getenv('USERNAME')}":
-                proc.kill()
+        if self.program is not None and self.program.poll() is None:
+            self.program.terminate()
 
         self.logged = False
 
     def open_transaction(self,transacao: str):
         """Open an SAP transaction."""
         self.session.startTransaction(transacao)
+        self._after_action()
     
     def get_window_size(self):
         return self.find_by_id("wnd[0]").width, self.find_by_id("wnd[0]").height
         
+    def enable_profiling(self, profiler: Profiler = None) -> Profiler:
+        """
+        Instruments the session, so every COM access made through it and through the elements
+        returned by find_by_id is counted and timed. Returns the Profiler that receives them.
+        """
+        self.profiler = profiler or Profiler()
+        self.session = self.profiler.instrument(self.session, 'GuiSession')
+        self._refresh_session_elements()
+        return self.profiler
+
+    def disable_profiling(self):
+        """
+        Removes the instrumentation added by enable_profiling.
+        """
+        if isinstance(self.session, InstrumentedObject):
+            self.session = self.session._com_object
+            self._refresh_session_elements()
+        self.profiler = None
+
+    def _refresh_session_elements(self):
+        self.invalidate_cache()
+        self.session_info = GuiSessionInfo(self.session.info)
+        self.statusbar = self.find_by_id("wnd[0]/sbar")
+
+    def dump_screen(self, window: str = 'wnd[0]', depth: int = None) -> dict:
+        """
+        Returns a compact, JSON serialisable tree with the IDs, types, texts, positions and
+        changeable flags of every element of a window, read in a single traversal.
+        Two dumps can be compared with diff_screens.
+        depth: how many levels of children to read. None reads the whole tree.
+        """
+        element = self.session.FindById(window, False)
+        if element is None:
+            raise ElementNotFound(f"The element with ID '{window}' was not found.")
+        return dump_element(element, depth)
+
+    def start_monitor(self, interval: float = 2.0, interrupt: bool = False, callbacks: list = None) -> ConnectionMonitor:
+        """
+        Starts a ConnectionMonitor that probes the session every `interval` seconds.
+        When the connection is lost, the callbacks are called with (sap, error) and the next
+        find_by_id raises ConnectionLost. If `interrupt` is True, ConnectionLost is also raised
+        at once in the thread that called this method, wherever it is running.
+        """
+        self.stop_monitor()
+        self.monitor = ConnectionMonitor(self, interval=interval, interrupt=interrupt)
+        for callback in callbacks or []:
+            self.monitor.add_callback(callback)
+        return self.monitor.start()
+
+    def stop_monitor(self):
+        """Stops the connection monitor, if it is running."""
+        if self.monitor is not None:
+            self.monitor.stop()
+
     def verify_sap_connection(self):
-        while self.logged:
-            sleep(10)
-            #Se a janela com o titulo 'SAP GUI for Windows 800' está aparecendo, significa que o SAP caiu. Então a execução deve ser interrompida.
-            windows = gw.getWindowsWithTitle('SAP GUI for Windows 800')
-            if windows:
-                # Fechar a janela
-                for window in windows:
-                    try:
-                        app = Application().connect(handle=window._hWnd)
-                        app_window = app.window(handle=window._hWnd)
-                        app_window.close()
-                        self.logged = False
-                    except Exception as e:
-                        raise Exception(f'Não foi possível fechar a janela do SAP: {e}')
-        else:
-            return
-        
-    def find_by_id(self, element_id: str|win32com.client.CDispatch, raise_error: bool = True):
+        """
+        Blocks until the SAP connection is lost or the session is closed.
+        Kept for compatibility: prefer start_monitor, which does not need a thread of its own.
+        """
+        monitor = self.monitor if self.monitor is not None and self.monitor.running else self.start_monitor()
+        while self.logged and not monitor.lost.wait(1):
+            pass
+
+    def invalidate_cache(self):
+        """
+        Clears the element cache. Called automatically after actions that go to the server.
+        """
+        self._element_cache.clear()
+
+    def wait_until_idle(self, timeout: float = 30):
+        """
+        Blocks until the session is no longer busy with a server round-trip.
+
+        Raises:
+            WaitTimeout: If the session is still busy after `timeout` seconds.
+        """
+        wait_until(lambda: not self.session.Busy, timeout, interval=0.01, max_interval=0.25, description='the session to be idle')
+
+    def _after_action(self):
+        """
+        Called after every action that goes to the server.
+        """
+        self.invalidate_cache()
+        if self.auto_wait or self.rules is not None:
+            self.wait_until_idle()
+        if self.rules is not None:
+            self.check_screen()
+
+    def check_screen(self, rules: RuleEngine = None) -> ScreenState:
+        """
+        Checks the status bar and the open popups against `rules` (by default the rules given
+        to the constructor), applying the rules that match. Returns the state read last.
+        Actions run by the rules themselves do not trigger another check.
+        """
+        rules = rules or self.rules
+        if rules is None or self._checking_screen:
+            return None
+        self._checking_screen = True
+        try:
+            return rules.check(self)
+        finally:
+            self._checking_screen = False
+
+    @property
+    def cache_stats(self):
+        """Returns the hits and misses of the element cache."""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'size': len(self._element_cache)}
+
+    def find_by_id(self, element_id: 'str|CDispatch', raise_error: bool = True):
         """
         Returns a instance of the GuiElement class supplied with the specified ID.
         """
+        if self.monitor is not None and self.monitor.lost.is_set():
+            raise ConnectionLost(f'The SAP connection was lost: {self.monitor.error}')
+
         if isinstance(element_id, str):
+            if self.element_cache:
+                cached = self._element_cache.get(element_id)
+                if cached is not None:
+                    self.cache_hits += 1
+                    return cached
+                self.cache_misses += 1
+
             element = self.session.FindById(element_id, False)
 
             if element is None and raise_error:
@@ -228,57 +464,22 @@ class SapGui:
                 return None
         else:
             element = element_id
-        
+
+        wrapper = self._wrap_element(element)
+        wrapper._on_action = self._after_action
+        wrapper._find_element = self.session.FindById
+        if self.element_cache and isinstance(element_id, str):
+            self._element_cache[element_id] = wrapper
+        return wrapper
+
+    def _wrap_element(self, element):
+        """
+        Returns the wrapper class instance that matches the type of the element.
+        """
         element_type = element.Type
-        
-        match element_type:
-            case "GuiButton":
-                return GuiButton(element)
-            case "GuiTextField":
-                return GuiTextField(element)
-            case "GuiComboBox":
-                return GuiComboBox(element)
-            case "GuiCheckBox":
-                return GuiCheckBox(element)
-            case "GuiCTextField":
-                return GuiCTextField(element)
-            case "GuiTab":
-                return GuiTab(element)
-            case "GuiGridView":
-                return GuiGridView(element)
-            case "GuiShell":
-                return GuiShell(element)
-            case "GuiTree":
-                return GuiTree(element)
-            case "GuiStatusbar":
-                return GuiStatusbar(element)
-            case "GuiFrameWindow":
-                return GuiFrameWindow(element)
-            case "GuiSessionInfo":
-                return GuiSessionInfo(element)
-            case "GuiLabel":
-                return GuiLabel(element)
-            case "GuiToolbar":
-                return GuiToolbar(element)
-            case "GuiTableControl":
-                return GuiTableControl(element)
-            case "GuiTitlebar":
-                return GuiTitlebar(element)
-            case "GuiContainer":
-                return GuiContainer(element)
-            case "GuiSplitter":
-                return GuiSplitter(element)
-            case "GuiUserArea":
-                return GuiUserArea(self,element)
-            case "GuiMainWindow":
-                return GuiMainWindow(self,element)
-            case "GuiComponentCollection":
-                return GuiComponentCollection(element)
-            case "GuiMenubar":
-                return GuiMenubar(self,element)
-            case "GuiCustomControl":
-                return GuiCustomControl(self,element)
-            case "GuiContainerShell":
-                return GuiContainerShell(self,element)
-            case _:
-                raise TypeError(f"Element type '{element_type}' is not supported.")
\ No newline at end of file
+        control_class = CONTROL_TYPES.get(element_type, GuiVComponent)
+        if element_type == 'GuiShell':
+            control_class = CONTROL_TYPES.get(f'GuiShell/{element.SubType}', control_class)
+        if control_class._takes_session:
+            return control_class(self, element)
+        return control_class(element)
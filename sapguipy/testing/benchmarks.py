@@ -0,0 +1,97 @@
+from time import perf_counter
+from sapguipy.sap import SapGui
+from sapguipy.testing.fake_engine import FakeEngine
+
+
+def _sap(engine: FakeEngine, **options) -> SapGui:
+    return SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900', **options).attach(engine.application)
+
+def grid_extraction(rows: int = 1000, columns: int = 10, latency: float = 0.0, export: bool = False, chunk_rows: int = None):
+    """
+    Scenario: reads an ALV grid of rows x columns with read_shell_table (iter_shell_table
+    when chunk_rows is given, export_to_file to a temporary file when export is True).
+    Returns (engine, run).
+    """
+    engine = FakeEngine(latency=latency)
+    data = {f'COL{c}': [f'{r}-{c}' for r in range(rows)] for c in range(columns)}
+    engine.session.set_screen(engine.grid('shellcont', data))
+    sap = _sap(engine)
+    grid = sap.find_by_id('wnd[0]/usr/shellcont')
+
+    def run():
+        if export:
+            from tempfile import TemporaryDirectory
+            with TemporaryDirectory() as directory:
+                return grid.export_to_file(f'{directory}/grid.txt', fallback=False)
+        if chunk_rows is None:
+            return grid.read_shell_table()
+        return sum(len(chunk) for chunk in grid.iter_shell_table(chunk_rows))
+    return engine, run
+
+def element_lookup(lookups: int = 1000, latency: float = 0.0, element_cache: bool = False):
+    """
+    Scenario: looks up the status bar, the OK-code field and a button `lookups` times each.
+    Returns (engine, run).
+    """
+    engine = FakeEngine(latency=latency)
+    sap = _sap(engine, element_cache=element_cache)
+    ids = ('wnd[0]/sbar', 'wnd[0]/tbar[0]/okcd', 'wnd[0]/tbar[0]/btn[0]')
+
+    def run():
+        for _ in range(lookups):
+            for element_id in ids:
+                sap.find_by_id(element_id)
+    return engine, run
+
+def login_flow(latency: float = 0.0, ready_after: float = 0.0):
+    """
+    Scenario: attaches to an engine that shows the logon screen and logs in.
+    Returns (engine, run).
+    """
+    engine = FakeEngine(latency=latency, ready_after=ready_after, logged=False, password='pwd')
+
+    def run():
+        sap = _sap(engine)
+        sap.login()
+        return sap
+    return engine, run
+
+def tree_walk(fields: int = 200, latency: float = 0.0):
+    """
+    Scenario: dumps a screen whose user area has `fields` text fields. Returns (engine, run).
+    """
+    engine = FakeEngine(latency=latency)
+    engine.session.set_screen(*(
+        engine.element(f'txtFIELD{i}', 'GuiTextField', text=str(i), Left=i % 80, Top=i // 80)
+        for i in range(fields)
+        ))
+    sap = _sap(engine)
+
+    def run():
+        return sap.dump_screen()
+    return engine, run
+
+SCENARIOS = {
+    'grid_extraction': grid_extraction,
+    'element_lookup': element_lookup,
+    'login_flow': login_flow,
+    'tree_walk': tree_walk,
+}
+
+def measure(scenario: str, **options) -> dict:
+    """
+    Runs a scenario once and returns its wall time and the COM calls it made.
+
+    The pytest-benchmark suite in tests/test_benchmarks.py runs the scenarios with the
+    `benchmark` fixture and checks their call counts (pip install sapguipy[test], then pytest).
+    """
+    engine, run = SCENARIOS[scenario](**options)
+    engine.stats.reset()
+    start = perf_counter()
+    run()
+    return {
+        'scenario': scenario,
+        'seconds': perf_counter() - start,
+        'calls': engine.stats.total,
+        'calls_by_name': dict(engine.stats.by_name()),
+    }
@@ -0,0 +1,928 @@
+from collections import Counter
+from time import monotonic, sleep
+
+# Classe -> membros COM (nome em minúsculas -> (tipo, nome real)), calculado uma vez por classe.
+_COM_MEMBERS = {}
+# Classe -> nomes dos métodos auxiliares em Python (não contam como chamadas COM).
+_PYTHON_MEMBERS = {}
+
+def _com_members(cls) -> dict:
+    members = _COM_MEMBERS.get(cls)
+    if members is None:
+        members = {}
+        for name in dir(cls):
+            if name.startswith('_get_'):
+                members[name[5:].lower()] = ('property', name)
+            elif name.startswith('_set_'):
+                members['=' + name[5:].lower()] = ('setter', name)
+            elif name[0].isupper() and callable(getattr(cls, name)):
+                members[name.lower()] = ('method', name)
+        _COM_MEMBERS[cls] = members
+    return members
+
+def _python_members(cls) -> set:
+    members = _PYTHON_MEMBERS.get(cls)
+    if members is None:
+        members = {name for name in dir(cls) if not name.startswith('_') and not name[0].isupper()}
+        _PYTHON_MEMBERS[cls] = members
+    return members
+
+
+class CallStats:
+    """
+    Counts every property access and method call made on the fake scripting objects,
+    by element type and member name, and optionally adds a latency to each of them
+    to simulate the cost of a COM round-trip.
+    """
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+        # Quando True, toda chamada falha, como depois de uma queda do SAP GUI.
+        self.crashed = False
+
+    def record(self, element_type: str, name: str):
+        self.calls[(element_type, name)] += 1
+        if self.latency:
+            sleep(self.latency)
+        if self.crashed:
+            raise Exception('The RPC server is unavailable.')
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def by_name(self) -> Counter:
+        """Returns the number of calls by member name, regardless of the element type."""
+        names = Counter()
+        for (_, name), count in self.calls.items():
+            names[name] += count
+        return names
+
+    def reset(self):
+        self.calls.clear()
+
+
+class _RecordedMethod:
+    """Bound COM method: like a dispatch method, each call is a round-trip and is recorded."""
+    __slots__ = ('stats', 'element_type', 'name', 'method')
+
+    def __init__(self, stats: CallStats, element_type: str, name: str, method):
+        self.stats = stats
+        self.element_type = element_type
+        self.name = name
+        self.method = method
+
+    def __call__(self, *args):
+        self.stats.record(self.element_type, self.name)
+        return self.method(*args)
+
+
+class FakeObject:
+    """
+    Base of every fake scripting object.
+
+    Like win32com's dynamic dispatch, COM member names are case-insensitive and an unknown
+    member raises AttributeError. COM members are the methods whose name starts with an
+    uppercase letter, the computed properties defined as _get_<Name>/_set_<Name> and the
+    plain properties given to the constructor. Every access to them (every call, for
+    methods) is recorded in the CallStats of the engine. Lowercase methods are Python
+    helpers used to build scenarios and are not recorded.
+    """
+    _type_name = 'GuiComponent'
+
+    def __init__(self, stats: CallStats, **properties):
+        object.__setattr__(self, '_stats', stats)
+        object.__setattr__(self, '_properties', {})
+        object.__setattr__(self, '_names', {})
+        self._properties['type'] = self._type_name
+        self._names['type'] = 'Type'
+        for name, value in properties.items():
+            self._properties[name.lower()] = value
+            self._names[name.lower()] = name
+
+    def __getattribute__(self, name):
+        if name.startswith('_') or name in _python_members(type(self)):
+            return object.__getattribute__(self, name)
+        return object.__getattribute__(self, '_com_get')(name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+            return
+        lname = name.lower()
+        self._stats.record(self._properties['type'], self._names.get(lname, name))
+        setter = _com_members(type(self)).get('=' + lname)
+        if setter is not None:
+            object.__getattribute__(self, setter[1])(value)
+        else:
+            self._properties[lname] = value
+            self._names.setdefault(lname, name)
+
+    def _com_get(self, name):
+        lname = name.lower()
+        member = _com_members(type(self)).get(lname)
+        if member is not None:
+            kind, real_name = member
+            if kind == 'property':
+                self._stats.record(self._properties['type'], real_name[5:])
+                return object.__getattribute__(self, real_name)()
+            return _RecordedMethod(self._stats, self._properties['type'], real_name, object.__getattribute__(self, real_name))
+        self._stats.record(self._properties['type'], self._names.get(lname, name))
+        if lname in self._properties:
+            return self._properties[lname]
+        raise AttributeError(f'<unknown>.{name}')
+
+    def __repr__(self):
+        return f"<{self._properties['type']} {self._properties.get('id', '')}>"
+
+
+class FakeCollection(FakeObject):
+    """GuiComponentCollection. Can be called with an index, like Children(0), and iterated."""
+    _type_name = 'GuiComponentCollection'
+
+    def __init__(self, stats: CallStats, items=None):
+        super().__init__(stats)
+        self._items = list(items or [])
+
+    def _get_Count(self):
+        return len(self._items)
+
+    def _get_Length(self):
+        return len(self._items)
+
+    def ElementAt(self, index):
+        return self._items[index]
+
+    def Item(self, index):
+        return self._items[index]
+
+    def __call__(self, index):
+        self._stats.record(self._type_name, 'Item')
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        for item in list(self._items):
+            self._stats.record(self._type_name, 'Next')
+            yield item
+
+
+class FakeComponent(FakeObject):
+    """
+    Generic visual element (GuiVComponent). The element type is given by type_name and the
+    element name is the last part of its ID, like 'txtRSYST-BNAME' or 'btn[0]'.
+    """
+    _type_name = 'GuiVComponent'
+
+    def __init__(self, stats: CallStats, name: str, type_name: str = None, text: str = '', children: list = None, **properties):
+        defaults = {
+            'Name': name, 'Text': text, 'Left': 0, 'Top': 0, 'Width': 10, 'Height': 1,
+            'ScreenLeft': 0, 'ScreenTop': 0, 'Tooltip': '', 'Changeable': True,
+        }
+        defaults.update(properties)
+        super().__init__(stats, **defaults)
+        if type_name is not None:
+            self._properties['type'] = type_name
+        self._name = name
+        self._parent = None
+        self._container = children is not None
+        self._children = FakeCollection(stats)
+        for child in children or []:
+            self.add(child)
+
+    def _full_id(self) -> str:
+        if self._parent is None:
+            return self._name
+        return f'{self._parent._full_id()}/{self._name}'
+
+    def _session(self):
+        node = self
+        while node is not None and not isinstance(node, FakeSession):
+            node = node._parent
+        return node
+
+    def _action(self, name: str, *args):
+        session = self._session()
+        if session is not None:
+            session._handle_action(self, name, args)
+
+    # Propriedades calculadas
+    def _get_Id(self):
+        return self._full_id()
+
+    def _get_Children(self):
+        if not self._container:
+            raise AttributeError('<unknown>.Children')
+        return self._children
+
+    def _get_ContainerType(self):
+        return self._container
+
+    def _get_Parent(self):
+        return self._parent
+
+    # Ações
+    def Press(self):
+        self._action('Press')
+
+    def Select(self):
+        if 'selected' in self._properties:
+            self._properties['selected'] = True
+        self._action('Select')
+
+    def SetFocus(self):
+        self._action('SetFocus')
+
+    def SendVKey(self, key):
+        self._action('SendVKey', key)
+
+    def Maximize(self):
+        ...
+
+    def Iconify(self):
+        ...
+
+    def Restore(self):
+        ...
+
+    def Close(self):
+        self._action('Close')
+
+    def PressButton(self, button_id):
+        self._action('PressButton', button_id)
+
+    def SendCommand(self, command):
+        self._action('SendCommand', command)
+
+    def FindByName(self, name, type_name=None):
+        for child in self._children._items:
+            if child._properties.get('name') == name and (type_name is None or child._properties['type'] == type_name):
+                return child
+        return None
+
+    # Auxiliares para montar cenários
+    def add(self, child: 'FakeComponent') -> 'FakeComponent':
+        """Adds a child element and returns it."""
+        self._container = True
+        child._parent = self
+        self._children._items.append(child)
+        return child
+
+    def clear(self):
+        """Removes every child element."""
+        for child in self._children._items:
+            child._parent = None
+        self._children._items.clear()
+
+    def find(self, path: str):
+        """Returns the descendant with the given relative path (like 'usr/txtFIELD'), or None."""
+        node = self
+        for part in path.split('/'):
+            node = next((child for child in node._children._items if child._name == part), None)
+            if node is None:
+                return None
+        return node
+
+
+class FakeStatusbar(FakeComponent):
+    """GuiStatusbar with the message properties of the status bar."""
+    _type_name = 'GuiStatusbar'
+
+    def __init__(self, stats: CallStats):
+        super().__init__(
+            stats, 'sbar', children=[], MessageType='', MessageId='', MessageNumber='',
+            MessageParameter='', MessageAsPopup=False
+            )
+        self.add(FakeComponent(stats, 'pane[0]', 'GuiStatusPane'))
+
+    def set_message(self, text: str = '', message_type: str = '', message_id: str = '', message_number: str = '', parameters: tuple = ()):
+        """Sets the message shown in the status bar."""
+        self._properties.update(
+            text=text, messagetype=message_type, messageid=message_id,
+            messagenumber=message_number, messageparameter=list(parameters)
+            )
+        self.find('pane[0]')._properties['text'] = text
+
+
+class FakeGrid(FakeComponent):
+    """
+    ALV grid (GuiShell, sub type GridView) backed by a dict of columns.
+
+    strict_scrolling: if True, GetCellValue fails for rows outside the visible page, like
+    an ALV grid whose rows were not loaded yet.
+    """
+    _type_name = 'GuiShell'
+
+    def __init__(self, stats: CallStats, name: str, data: dict, visible_rows: int = 30, strict_scrolling: bool = False, export: bool = True):
+        super().__init__(stats, name, SubType='GridView', VisibleRowCount=visible_rows)
+        self._data = {column: list(values) for column, values in data.items()}
+        self._first_visible_row = 0
+        self._strict_scrolling = strict_scrolling
+        self._column_titles = {column: column for column in self._data}
+        self._export = export
+        self._context_button = None
+
+    def _row_count(self) -> int:
+        return len(next(iter(self._data.values()), []))
+
+    def _get_RowCount(self):
+        return self._row_count()
+
+    def _get_ColumnCount(self):
+        return len(self._data)
+
+    def _get_ColumnOrder(self):
+        return FakeCollection(self._stats, list(self._data))
+
+    def _get_FirstVisibleRow(self):
+        return self._first_visible_row
+
+    def _set_FirstVisibleRow(self, row):
+        self._first_visible_row = row
+
+    def _check_loaded(self, row):
+        visible_rows = self._properties['visiblerowcount']
+        if self._strict_scrolling and not self._first_visible_row <= row < self._first_visible_row + visible_rows:
+            raise Exception(f'Row {row} is not loaded.')
+
+    def GetCellValue(self, row, column):
+        self._check_loaded(row)
+        return self._data[column][row]
+
+    def SetCellValue(self, row, column, value):
+        self._data[column][row] = value
+
+    def ModifyCell(self, row, column, value):
+        self._check_loaded(row)
+        self._data[column][row] = value
+
+    def TriggerModified(self):
+        self._action('TriggerModified')
+
+    def GetDisplayedColumnTitle(self, column):
+        return self._column_titles[column]
+
+    def PressToolbarContextButton(self, button_id):
+        if button_id == '&MB_EXPORT' and not self._export:
+            raise Exception('The toolbar button could not be found.')
+        self._context_button = button_id
+        self._action('PressToolbarContextButton', button_id)
+
+    def SelectContextMenuItem(self, item):
+        if self._context_button == '&MB_EXPORT' and item == '&PC':
+            self._open_export_dialog()
+        self._context_button = None
+        self._action('SelectContextMenuItem', item)
+
+    def _open_export_dialog(self):
+        """Opens the 'Save list in file' dialogs of the ALV export, which write the file when confirmed."""
+        stats = self._stats
+        session = self._session()
+        formats = [
+            FakeComponent(stats, f'radSPOPLI-SELFLAG[{index},0]', 'GuiRadioButton', text=text, Selected=False)
+            for index, text in enumerate(('Unconverted', 'Spreadsheet', 'Rich text format', 'HTML Format', 'In the clipboard'))
+            ]
+        window = session.open_popup(
+            FakeComponent(stats, 'subSUBSCREEN_STEPLOOP:SAPLSPO5:0150', 'GuiSimpleContainer', children=[
+                FakeComponent(stats, 'sub:SAPLSPO5:0150', 'GuiSimpleContainer', children=formats),
+                ]),
+            title='Save list in file...'
+            )
+        toolbar = window.find('tbar[0]')
+
+        def choose_file():
+            selected = next((index for index, radio in enumerate(formats) if radio._properties['selected']), 0)
+            user_area = window.find('usr')
+            user_area.clear()
+            for name in ('ctxtDY_PATH', 'ctxtDY_FILENAME', 'ctxtDY_FILE_ENCODING'):
+                user_area.add(FakeComponent(stats, name, 'GuiCTextField'))
+            toolbar.clear()
+            toolbar.add(_FakeDialogButton(stats, 'btn[0]', lambda: save(selected)))
+
+        def save(selected):
+            user_area = window.find('usr')
+            path = f"{user_area.find('ctxtDY_PATH')._properties['text']}/{user_area.find('ctxtDY_FILENAME')._properties['text']}"
+            self.write_export(path, ('unconverted', 'spreadsheet')[selected])
+            session.close_popup()
+
+        toolbar.clear()
+        toolbar.add(_FakeDialogButton(stats, 'btn[0]', choose_file))
+
+    def write_export(self, path, format: str = 'unconverted'):
+        """Writes the grid to a file in the format of the ALV export ('unconverted' or 'spreadsheet')."""
+        columns = [self._column_titles[column] for column in self._data]
+        rows = [[str(value) for value in row] for row in zip(*self._data.values())]
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            if format == 'spreadsheet':
+                file.write('Dynamic List Display\r\n\r\n')
+                for row in [columns] + rows:
+                    file.write('\t' + '\t'.join(row) + '\r\n')
+                return
+            widths = [max([len(column)] + [len(row[index]) for row in rows]) for index, column in enumerate(columns)]
+            line = '-' * (sum(widths) + len(widths) + 1)
+            file.write(f'18.10.2026{"Dynamic List Display":^{len(line)}}1\r\n{line}\r\n')
+            file.write('|' + '|'.join(f'{column:<{width}}' for column, width in zip(columns, widths)) + '|\r\n')
+            file.write(line + '\r\n')
+            for row in rows:
+                file.write('|' + '|'.join(f'{value:<{width}}' for value, width in zip(row, widths)) + '|\r\n')
+            file.write(line + '\r\n')
+
+
+class _FakeDialogButton(FakeComponent):
+    """Button that runs a callback when pressed, to drive multi-step dialogs."""
+    _type_name = 'GuiButton'
+
+    def __init__(self, stats: CallStats, name: str, callback):
+        super().__init__(stats, name)
+        self._callback = callback
+
+    def Press(self):
+        self._callback()
+        self._action('Press')
+
+
+class FakeTree(FakeComponent):
+    """
+    Tree control (GuiShell, sub type Tree) built from nested dicts:
+
+        {'key': 'N1', 'text': 'Plant 1000', 'items': {'COL1': '10'}, 'lazy': True, 'children': [...]}
+
+    The children of a lazy node are loaded only when it is expanded, like the trees whose
+    nodes are sent by the server on demand. columns: item column names, for a column tree.
+    """
+    _type_name = 'GuiShell'
+
+    def __init__(self, stats: CallStats, name: str, nodes: list, columns: list = None):
+        super().__init__(stats, name, SubType='Tree')
+        self._columns_names = list(columns or [])
+        self._nodes = {}
+        self._roots = []
+        self._expanded = set()
+        self._expand_count = 0
+        for node in nodes:
+            self._roots.append(self._add_node(node, None, 0))
+
+    def _add_node(self, node: dict, parent: str, level: int) -> str:
+        key = node['key']
+        children = [self._add_node(child, key, level + 1) for child in node.get('children', [])]
+        self._nodes[key] = {
+            'text': node.get('text', ''), 'items': node.get('items', {}), 'parent': parent, 'level': level,
+            'children': children, 'loaded': not node.get('lazy', False),
+            }
+        return key
+
+    def _loaded_keys(self, keys: list) -> list:
+        result = []
+        for key in keys:
+            result.append(key)
+            node = self._nodes[key]
+            if node['loaded']:
+                result.extend(self._loaded_keys(node['children']))
+        return result
+
+    def _node(self, key):
+        node = self._nodes.get(key)
+        if node is None or key not in self._loaded_keys(self._roots):
+            raise Exception(f"The node '{key}' could not be found.")
+        return node
+
+    def GetTreeType(self):
+        return 2 if self._columns_names else 0
+
+    def GetColumnNames(self):
+        return FakeCollection(self._stats, list(self._columns_names))
+
+    def GetAllNodeKeys(self):
+        return FakeCollection(self._stats, self._loaded_keys(self._roots))
+
+    def GetSubNodesCol(self, key):
+        node = self._node(key)
+        if not node['children'] or not node['loaded']:
+            return None
+        return FakeCollection(self._stats, list(node['children']))
+
+    def GetNodeTextByKey(self, key):
+        return self._node(key)['text']
+
+    def GetItemText(self, key, column):
+        return self._node(key)['items'].get(column, '')
+
+    def GetParent(self, key):
+        return self._node(key)['parent'] or ''
+
+    def GetHierarchyLevel(self, key):
+        return self._node(key)['level']
+
+    def IsFolderExpandable(self, key):
+        return bool(self._node(key)['children'])
+
+    def IsFolderExpanded(self, key):
+        return key in self._expanded
+
+    def ExpandNode(self, key):
+        node = self._node(key)
+        node['loaded'] = True
+        self._expanded.add(key)
+        self._expand_count += 1
+        self._action('ExpandNode', key)
+
+    def CollapseNode(self, key):
+        self._expanded.discard(key)
+        self._action('CollapseNode', key)
+
+    def SelectNode(self, key):
+        self._node(key)
+        self._action('SelectNode', key)
+
+
+class FakeTableCell(FakeComponent):
+    """Input field of a table control cell. Its text is kept by the table."""
+    _type_name = 'GuiTextField'
+
+    def __init__(self, stats: CallStats, table: 'FakeTableControl', row: int, column: int):
+        field = table._fields[column]
+        super().__init__(stats, f'txt{field}[{column},{row}]', Name=field)
+        self._parent = table
+        self._table = table
+        self._row = table._first_row + row
+        self._column = column
+
+    def _get_Text(self):
+        return self._table._cell_text(self._row, self._column)
+
+    def _set_Text(self, value):
+        self._table._set_cell_text(self._row, self._column, value)
+
+
+class FakeScrollbar(FakeObject):
+    """GuiScrollbar of a table control. Changing its position goes to the server."""
+    _type_name = 'GuiScrollbar'
+
+    def __init__(self, stats: CallStats, table: 'FakeTableControl'):
+        super().__init__(stats, Minimum=0)
+        self._table = table
+
+    def _get_Position(self):
+        return self._table._first_row
+
+    def _set_Position(self, position):
+        table = self._table
+        if not 0 <= position <= table._maximum():
+            raise Exception('The scrollbar position is out of range.')
+        table._first_row = position
+        table._action('Scroll', position)
+
+    def _get_Maximum(self):
+        return self._table._maximum()
+
+    def _get_PageSize(self):
+        return self._table._visible_rows
+
+
+class FakeTableControl(FakeComponent):
+    """
+    Dynpro table control (GuiTableControl) with text cells. Like in SAP, only the visible
+    rows are available through GetCell, with row indexes relative to the first visible row,
+    and the other rows are reached by changing VerticalScrollbar.Position.
+
+    fields: field name of each column, like 'VBAP-MATNR'.
+    rows: initial rows, as sequences of texts.
+    row_count: number of rows of the table (RowCount). Defaults to the number of rows plus one page.
+    """
+    _type_name = 'GuiTableControl'
+
+    def __init__(self, stats: CallStats, name: str, fields: list, rows: list = None, visible_rows: int = 10, row_count: int = None):
+        super().__init__(stats, name, VisibleRowCount=visible_rows)
+        self._fields = list(fields)
+        self._rows = [list(row) for row in rows or []]
+        self._visible_rows = visible_rows
+        self._row_count = len(self._rows) + visible_rows if row_count is None else row_count
+        self._first_row = 0
+        self._scrollbar = FakeScrollbar(stats, self)
+        self._columns = FakeCollection(stats, [
+            FakeObject(stats, Type='GuiTableColumn', Title=field, Name=field) for field in self._fields
+            ])
+
+    def _maximum(self) -> int:
+        return max(self._row_count - self._visible_rows, 0)
+
+    def _cell_text(self, row: int, column: int) -> str:
+        if row < len(self._rows):
+            return self._rows[row][column]
+        return ''
+
+    def _set_cell_text(self, row: int, column: int, value):
+        if row >= self._row_count:
+            raise Exception(f'Row {row} does not exist.')
+        while len(self._rows) <= row:
+            self._rows.append([''] * len(self._fields))
+        self._rows[row][column] = value
+
+    def _get_RowCount(self):
+        return self._row_count
+
+    def _get_VerticalScrollbar(self):
+        return self._scrollbar
+
+    def _get_Columns(self):
+        return self._columns
+
+    def GetCell(self, row, column):
+        if not 0 <= row < self._visible_rows or not 0 <= column < len(self._fields):
+            raise Exception('The cell could not be found.')
+        return FakeTableCell(self._stats, self, row, column)
+
+    def rows(self) -> list:
+        """Returns a copy of the rows of the table, as lists of texts."""
+        return [list(row) for row in self._rows]
+
+
+class FakeSessionInfo(FakeObject):
+    """GuiSessionInfo."""
+    _type_name = 'GuiSessionInfo'
+
+    def __init__(self, stats: CallStats, system_name: str = 'PRD', client: str = '900', language: str = 'PT'):
+        super().__init__(
+            stats, User='', Client=client, Language=language, SystemName=system_name,
+            System=system_name, Transaction='S000', Program='SAPMSYST', ScreenNumber=20,
+            SessionNumber=1
+            )
+
+
+class FakeSession(FakeComponent):
+    """
+    GuiSession with a main window ('wnd[0]') made of a toolbar with the OK-code field,
+    a title bar, an user area and a status bar.
+
+    busy_time: seconds during which Busy stays True after each action.
+    on_action: optional callable(session, element, action, args) called after each action,
+    to change the screen like the SAP server would.
+    """
+    _type_name = 'GuiSession'
+
+    def __init__(self, stats: CallStats, name: str, info: FakeSessionInfo, busy_time: float = 0.0, on_action=None):
+        super().__init__(stats, name, children=[])
+        self._info = info
+        self._busy_time = busy_time
+        self._busy_until = 0.0
+        self._on_action = on_action
+        self._credentials = None
+        self._closed = False
+        self.add(FakeComponent(stats, 'wnd[0]', 'GuiMainWindow', children=[
+            FakeComponent(stats, 'tbar[0]', 'GuiToolbar', children=[
+                FakeComponent(stats, 'okcd', 'GuiOkCodeField'),
+                FakeComponent(stats, 'btn[0]', 'GuiButton'),
+                ]),
+            FakeComponent(stats, 'titl', 'GuiTitlebar', text='SAP'),
+            FakeComponent(stats, 'usr', 'GuiUserArea', children=[]),
+            FakeStatusbar(stats),
+            ]))
+
+    def _com_get(self, name):
+        if self._closed:
+            self._stats.record(self._properties['type'], name)
+            raise Exception('The session was closed.')
+        return super()._com_get(name)
+
+    def _get_Info(self):
+        return self._info
+
+    def _get_Busy(self):
+        return monotonic() < self._busy_until
+
+    def _get_ActiveWindow(self):
+        return self._children._items[-1]
+
+    def FindById(self, element_id: str, raise_error: bool = True):
+        prefix = self._full_id() + '/'
+        if element_id.startswith(prefix):
+            element_id = element_id[len(prefix):]
+        element = self.find(element_id)
+        if element is None and raise_error:
+            raise Exception('The control could not be found by id.')
+        return element
+
+    def StartTransaction(self, transaction: str):
+        self.set_screen(transaction=transaction.upper())
+        self._action('StartTransaction', transaction)
+
+    def EndTransaction(self):
+        self.set_screen(transaction='SESSION_MANAGER')
+        self._action('EndTransaction')
+
+    def CreateSession(self):
+        connection = self._parent
+        session = connection.add_session()
+        if self._info._properties['user']:
+            session.log_in(self._info._properties['user'])
+        self._action('CreateSession')
+
+    def _handle_action(self, element, name: str, args: tuple):
+        if name == 'SendVKey' and element._name == 'wnd[0]':
+            self._on_enter()
+        if self._busy_time:
+            self._busy_until = monotonic() + self._busy_time
+        if self._on_action is not None:
+            self._on_action(self, element, name, args)
+
+    def _on_enter(self):
+        """Default handling of Enter in the main window: logon screen and OK-code commands."""
+        statusbar = self.find('wnd[0]/sbar')
+        if self._credentials is not None and not self._info._properties['user']:
+            user_field = self.find('wnd[0]/usr/txtRSYST-BNAME')
+            password_field = self.find('wnd[0]/usr/pwdRSYST-BCODE')
+            user, password = self._credentials
+            if user_field._properties['text'] == user and (password is None or password_field._properties['text'] == password):
+                self.log_in(user)
+            else:
+                statusbar.set_message('O nome ou a senha não está correto (repetir o logon)', 'E', '00', '152')
+            return
+
+        okcd = self.find('wnd[0]/tbar[0]/okcd')
+        command = okcd._properties['text']
+        okcd._properties['text'] = ''
+        if command.lower().startswith('/n') and len(command) > 2:
+            self.set_screen(transaction=command[2:].upper())
+
+    # Auxiliares para montar cenários
+    def set_screen(self, *elements: FakeComponent, transaction: str = None, program: str = None, screen_number: int = None):
+        """Replaces the user area with the given elements and updates the session info."""
+        user_area = self.find('wnd[0]/usr')
+        user_area.clear()
+        for element in elements:
+            user_area.add(element)
+        self.find('wnd[0]/sbar').set_message()
+        if transaction is not None:
+            self._info._properties['transaction'] = transaction
+        if program is not None:
+            self._info._properties['program'] = program
+        if screen_number is not None:
+            self._info._properties['screennumber'] = screen_number
+
+    def show_logon(self, user: str, password: str = None):
+        """Shows the logon screen. Enter logs in when the fields match user and password."""
+        self._credentials = (user, password)
+        self._info._properties['user'] = ''
+        self.set_screen(
+            FakeComponent(self._stats, 'txtRSYST-BNAME', 'GuiTextField'),
+            FakeComponent(self._stats, 'pwdRSYST-BCODE', 'GuiPasswordField'),
+            transaction='S000', program='SAPMSYST', screen_number=20
+            )
+
+    def log_in(self, user: str):
+        """Puts the session in the logged state, on the SAP Easy Access screen."""
+        self._info._properties['user'] = user
+        self.set_screen(transaction='SESSION_MANAGER', program='SAPLSMTR_NAVIGATION', screen_number=100)
+
+    def open_popup(self, *elements: FakeComponent, title: str = '') -> FakeComponent:
+        """Opens a modal window ('wnd[n]') with the given user area elements and a toolbar with 'btn[0]'."""
+        window = FakeComponent(self._stats, f'wnd[{len(self._children._items)}]', 'GuiModalWindow', text=title, children=[
+            FakeComponent(self._stats, 'tbar[0]', 'GuiToolbar', children=[FakeComponent(self._stats, 'btn[0]', 'GuiButton')]),
+            FakeComponent(self._stats, 'usr', 'GuiUserArea', children=list(elements)),
+            ])
+        return self.add(window)
+
+    def close_popup(self):
+        """Closes the last modal window."""
+        if len(self._children._items) > 1:
+            self._children._items.pop()._parent = None
+
+
+class FakeConnection(FakeComponent):
+    """GuiConnection. Sessions are its children."""
+    _type_name = 'GuiConnection'
+
+    def __init__(self, stats: CallStats, name: str, description: str, info_options: dict, session_options: dict):
+        super().__init__(stats, name, children=[], Description=description)
+        self._info_options = info_options
+        self._session_options = session_options
+        self._session_number = 0
+
+    def _get_Sessions(self):
+        return self._children
+
+    def CloseSession(self, session_id: str):
+        for session in list(self._children._items):
+            if session._full_id() == session_id:
+                self._children._items.remove(session)
+                session._closed = True
+
+    def CloseConnection(self):
+        if self._parent is not None:
+            self._parent._children._items.remove(self)
+            self._parent = None
+
+    def add_session(self) -> FakeSession:
+        """Opens a new session in the connection and returns it."""
+        info = FakeSessionInfo(self._stats, **self._info_options)
+        info._properties['sessionnumber'] = len(self._children._items) + 1
+        session = FakeSession(self._stats, f'ses[{self._session_number}]', info, **self._session_options)
+        self._session_number += 1
+        return self.add(session)
+
+
+class FakeApplication(FakeComponent):
+    """GuiApplication. Connections are its children, available only after ready_after seconds."""
+    _type_name = 'GuiApplication'
+
+    def __init__(self, stats: CallStats, ready_at: float):
+        super().__init__(stats, '/app', children=[], Version='7700')
+        self._ready_at = ready_at
+
+    def _full_id(self) -> str:
+        return '/app'
+
+    def _get_Children(self):
+        if monotonic() < self._ready_at:
+            return FakeCollection(self._stats)
+        return self._children
+
+    def _get_Connections(self):
+        return self._get_Children()
+
+    def FindById(self, element_id: str, raise_error: bool = True):
+        element = self.find(element_id[len('/app/'):]) if element_id.startswith('/app/') else None
+        if element is None and raise_error:
+            raise Exception('The control could not be found by id.')
+        return element
+
+
+class FakeSapGuiAuto(FakeObject):
+    """The 'SAPGUI' object. GetScriptingEngine is None until the engine is ready."""
+    _type_name = 'SapROTWr.CSapROTWrapper'
+
+    def __init__(self, stats: CallStats, application: FakeApplication):
+        super().__init__(stats)
+        self._application = application
+
+    def _get_GetScriptingEngine(self):
+        if monotonic() < self._application._ready_at:
+            return None
+        return self._application
+
+
+class FakeEngine:
+    """
+    In-process simulator of the SAP GUI Scripting API, for tests and benchmarks that
+    must run without SAP (and without Windows).
+
+        engine = FakeEngine(latency=0.0005)
+        sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+        sap.open_transaction('VA03')
+        engine.stats.total  # COM calls made so far
+
+    latency: seconds added to every property access or method call.
+    ready_after: seconds until the scripting engine and the connection become available.
+    busy_time: seconds during which session.Busy stays True after each action.
+    logged: if False, the session starts on the logon screen of `user`/`password`.
+    on_action: optional callable(session, element, action, args) called after each action.
+    """
+    def __init__(self, latency: float = 0.0, ready_after: float = 0.0, busy_time: float = 0.0, logged: bool = True, user: str = 'USR', password: str = None, system_name: str = 'PRD', client: str = '900', language: str = 'PT', on_action=None):
+        self.stats = CallStats(latency)
+        self.application = FakeApplication(self.stats, monotonic() + ready_after)
+        self.sapgui = FakeSapGuiAuto(self.stats, self.application)
+        self._info_options = {'system_name': system_name, 'client': client, 'language': language}
+        self._session_options = {'busy_time': busy_time, 'on_action': on_action}
+        self.open_connection(logged=logged, user=user, password=password)
+
+    def open_connection(self, logged: bool = True, user: str = 'USR', password: str = None, description: str = None) -> FakeConnection:
+        """Opens a new connection with one session and returns it."""
+        index = len(self.application._children._items)
+        connection = FakeConnection(
+            self.stats, f'con[{index}]', description or self._info_options['system_name'],
+            self._info_options, self._session_options
+            )
+        self.application.add(connection)
+        session = connection.add_session()
+        if logged:
+            session.log_in(user)
+        else:
+            session.show_logon(user, password)
+        return connection
+
+    def crash(self):
+        """Simulates a crash of SAP GUI: from now on every call fails."""
+        self.stats.crashed = True
+
+    @property
+    def session(self) -> FakeSession:
+        """The first session of the first connection."""
+        return self.application._children._items[0]._children._items[0]
+
+    def element(self, name: str, type_name: str = 'GuiVComponent', **properties) -> FakeComponent:
+        """Builds a generic element that uses this engine's stats."""
+        return FakeComponent(self.stats, name, type_name, **properties)
+
+    def grid(self, name: str, data: dict, **options) -> FakeGrid:
+        """Builds an ALV grid that uses this engine's stats. See FakeGrid for the options."""
+        return FakeGrid(self.stats, name, data, **options)
+
+    def tree(self, name: str, nodes: list, columns: list = None) -> FakeTree:
+        """Builds a tree control that uses this engine's stats. See FakeTree for the nodes."""
+        return FakeTree(self.stats, name, nodes, columns)
+
+    def table_control(self, name: str, fields: list, rows: list = None, **options) -> FakeTableControl:
+        """Builds a table control that uses this engine's stats. See FakeTableControl for the options."""
+        return FakeTableControl(self.stats, name, fields, rows, **options)
@@ -0,0 +1,86 @@
+from time import monotonic, sleep
+from sapguipy.models.exceptions import WaitTimeout
+
+
+def wait_until(condition, timeout: float = 30, interval: float = 0.05, max_interval: float = 1.0, description: str = 'condition'):
+    """
+    Polls condition() until it returns a truthy value, which is then returned.
+
+    The polling interval starts at `interval` and doubles up to `max_interval`, so fast
+    conditions are detected almost immediately while slow ones are not polled too often.
+    Exceptions raised by condition() are treated as "not ready yet".
+
+    Raises:
+        WaitTimeout: if the condition is not met within `timeout` seconds.
+    """
+    deadline = monotonic() + timeout
+    delay = interval
+    last_error = None
+    while True:
+        try:
+            result = condition()
+            if result:
+                return result
+        except Exception as e:
+            last_error = e
+
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            message = f'Timed out after {timeout}s waiting for {description}.'
+            if last_error is not None:
+                message += f' Last error: {last_error}'
+            raise WaitTimeout(message)
+
+        sleep(min(delay, remaining))
+        delay = min(delay * 2, max_interval)
+
+
+def wait_for_file(path, timeout: float = 60, interval: float = 0.2):
+    """
+    Waits until the file exists, is not empty and its size stops changing between two polls,
+    which means the program writing it has finished.
+
+    Raises:
+        WaitTimeout: if the file is not complete within `timeout` seconds.
+    """
+    from pathlib import Path
+
+    path = Path(path)
+    sizes = []
+
+    def complete():
+        size = path.stat().st_size if path.exists() else 0
+        sizes.append(size)
+        return size > 0 and len(sizes) > 1 and sizes[-2] == size
+
+    wait_until(complete, timeout, interval=interval, max_interval=interval, description=f'the file {path}')
+    return path
+
+
+class PhaseTimer:
+    """
+    Measures how long each phase of an operation took.
+
+        timer = PhaseTimer()
+        with timer.phase('connection'):
+            ...
+        timer.timings  # {'connection': 0.42}
+    """
+    def __init__(self):
+        self.timings = {}
+
+    def phase(self, name: str):
+        return _Phase(self.timings, name)
+
+
+class _Phase:
+    def __init__(self, timings: dict, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timings[self.name] = monotonic() - self.start
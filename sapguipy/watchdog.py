@@ -0,0 +1,99 @@
+from threading import Thread, Event, get_ident
+import ctypes
+from sapguipy.models.exceptions import ConnectionLost
+
+
+def _raise_in_thread(thread_id: int, exception: type):
+    """Raises `exception` asynchronously in another thread, at its next Python instruction."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(exception))
+
+
+class ConnectionMonitor:
+    """
+    Watches a SapGui session from a background thread and reacts as soon as it stops answering.
+
+    Every `interval` seconds the session gets a single cheap call (session.Busy). When it
+    fails, the monitor:
+        - sets `lost` and `sap.logged = False`, so the next find_by_id raises ConnectionLost
+          (the default way an operation learns about the lost connection);
+        - closes the crash dialog of SAP GUI (crash_window_title), if it is open;
+        - calls the registered callbacks with (sap, error);
+        - if `interrupt` is True, raises ConnectionLost in the thread that started the monitor,
+          which stops the operation in progress as soon as its current COM call returns.
+          The exception may arrive at any instruction, including finally blocks and file writes,
+          so it is opt-in.
+    """
+    def __init__(self, sap, interval: float = 2.0, interrupt: bool = False, crash_window_title: str = 'SAP GUI for Windows 800'):
+        self.sap = sap
+        self.interval = interval
+        self.interrupt = interrupt
+        self.crash_window_title = crash_window_title
+        self.callbacks = []
+        self.callback_errors = []
+        self.lost = Event()
+        self.error = None
+        self._stop = Event()
+        self._thread = None
+        self._owner = None
+
+    def add_callback(self, callback):
+        """Registers callback(sap, error), called when the connection is lost."""
+        self.callbacks.append(callback)
+        return callback
+
+    def start(self):
+        """Starts watching. The thread that calls start is the one interrupted when the connection is lost."""
+        if self._thread is not None:
+            return self
+        self._owner = get_ident()
+        session = getattr(self.sap.session, '_com_object', self.sap.session)
+        packed = self.sap.backend.marshal(session)
+        self._thread = Thread(target=self._run, args=(packed,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Stops watching and waits for the monitor thread to finish."""
+        self._stop.set()
+        if self._thread is not None and self._thread.ident != get_ident():
+            self._thread.join(timeout if timeout is not None else self.interval + 1)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, packed):
+        backend = self.sap.backend
+        backend.initialize_thread()
+        try:
+            session = backend.unmarshal(packed)
+            while not self._stop.wait(self.interval):
+                try:
+                    session.Busy
+                except Exception as e:
+                    if not self._stop.is_set():
+                        self._connection_lost(e)
+                    return
+        finally:
+            backend.uninitialize_thread()
+
+    def _connection_lost(self, error: Exception):
+        self.error = error
+        self.sap.logged = False
+        self.lost.set()
+
+        # Fecha a janela de erro do SAP GUI, se ela estiver aberta.
+        try:
+            for window in self.sap.backend.find_windows(self.crash_window_title):
+                self.sap.backend.close_window(window)
+        except Exception as e:
+            self.callback_errors.append(e)
+
+        for callback in self.callbacks:
+            try:
+                callback(self.sap, error)
+            except Exception as e:
+                self.callback_errors.append(e)
+
+        if self.interrupt and not self._stop.is_set():
+            _raise_in_thread(self._owner, ConnectionLost)
@@ -19,8 +19,9 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     author_email="nicolasduart21@gmail.com",
-    packages=find_packages(),
+    packages=find_packages(exclude=['tests']),
     keywords="sap",
     python_requires='>=3.8',
     install_requires=requirements_list,
+    extras_require={'test': ['pytest', 'pytest-benchmark']},
 )
\ No newline at end of file
@@ -0,0 +1,97 @@
+import asyncio
+import subprocess
+import sys
+from threading import get_ident
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.backends import Backend
+from sapguipy.models.exceptions import ConnectionLost
+from sapguipy.testing import FakeEngine
+
+
+class _ThreadBackend(Backend):
+    """Records the threads where the COM apartment is opened and closed."""
+    def __init__(self):
+        self.initialized = []
+        self.uninitialized = []
+
+    def initialize_thread(self):
+        self.initialized.append(get_ident())
+
+    def uninitialize_thread(self):
+        self.uninitialized.append(get_ident())
+
+
+def _engine(threads: list) -> FakeEngine:
+    def on_action(session, element, action, args):
+        threads.append(get_ident())
+
+    engine = FakeEngine(on_action=on_action)
+    engine.session.set_screen(engine.grid('shell', {'MATNR': [f'M{row}' for row in range(25)]}, visible_rows=10))
+    return engine
+
+
+def test_every_call_runs_on_the_single_com_thread():
+    from sapguipy import AsyncSapGui
+
+    threads = []
+    engine = _engine(threads)
+    backend = _ThreadBackend()
+
+    async def main():
+        sap = AsyncSapGui(SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900', backend=backend))
+        await sap.attach(engine.application)
+        frame = await sap.read_shell_table('wnd[0]/usr/shell')
+        grid = await sap.find_by_id('wnd[0]/usr/shell')
+        chunks = [chunk async for chunk in grid.aiter('iter_shell_table', chunk_rows=10)]
+        button = await sap.find_by_id('wnd[0]/tbar[0]/btn[0]')
+        await button.press()
+        await sap.open_transaction('VA03')
+        window = await sap.new_window()
+        await window.open_transaction('VA01')
+        threads.append(await window.run(lambda sap: get_ident()))
+        await sap.close()
+        return frame, chunks
+
+    frame, chunks = asyncio.run(main())
+
+    assert len(frame) == 25
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert backend.initialized == backend.uninitialized == threads[:1]
+    assert set(threads) == set(backend.initialized)
+    assert get_ident() not in threads
+    assert engine.session.Info.Transaction == 'VA03'
+
+def test_calls_raise_connection_lost_once_the_monitor_detects_it():
+    from sapguipy import AsyncSapGui
+
+    engine = _engine([])
+
+    async def main():
+        sap = AsyncSapGui(SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900'))
+        await sap.attach(engine.application)
+        await sap.run(lambda sap: sap.start_monitor(interval=0.01))
+        engine.crash()
+        try:
+            # A espera é interrompida pela queda, em vez de terminar em WaitTimeout.
+            with pytest.raises(ConnectionLost):
+                await sap.wait_until(lambda sap: False, timeout=5, interval=0.01)
+            with pytest.raises(ConnectionLost):
+                await sap.open_transaction('VA03')
+        finally:
+            await sap.run(lambda sap: sap.stop_monitor(), check_connection=False)
+            await sap.close()
+
+    asyncio.run(main())
+
+def test_async_sap_is_imported_only_when_used():
+    code = (
+        "import sys, sapguipy\n"
+        "assert 'sapguipy.async_sap' not in sys.modules and 'asyncio' not in sys.modules\n"
+        "assert sapguipy.AsyncSapGui.__module__ == 'sapguipy.async_sap'\n"
+        "assert 'asyncio' in sys.modules\n"
+        )
+    subprocess.run([sys.executable, '-c', code], check=True)
+    with pytest.raises(AttributeError):
+        import sapguipy
+        sapguipy.AsyncSapGuiX
@@ -0,0 +1,91 @@
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.batch import BatchRunner
+from sapguipy.models.exceptions import ConnectionLost
+from sapguipy.testing import FakeEngine
+
+ITEMS = [{'ref': f'R{index}', 'transaction': 'VA03'} for index in range(6)]
+
+
+def _sap(engine: FakeEngine) -> SapGui:
+    return SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+
+
+@pytest.mark.parametrize('journal', ['batch.jsonl', 'batch.sqlite'])
+def test_an_interrupted_batch_resumes_where_it_stopped(tmp_path, journal):
+    path = tmp_path / journal
+    engine = FakeEngine()
+    runs = []
+    crash_at = {'R4'}
+    bad = {'R1'}
+
+    def step(sap, item):
+        runs.append(item['ref'])
+        if item['ref'] in crash_at:
+            raise ConnectionLost('The SAP connection was lost.')
+        sap.open_transaction(item['transaction'])
+        if item['ref'] in bad:
+            engine.session.find('wnd[0]/sbar').set_message('Document R1 is locked', 'E', 'V1', '042')
+        return item['ref'].lower()
+
+    runner = BatchRunner(_sap(engine), step, path, key=lambda item: item['ref'])
+    with pytest.raises(ConnectionLost):
+        runner.run(ITEMS)
+    assert runs == ['R0', 'R1', 'R2', 'R3', 'R4']
+    assert runner.metrics['done'] == 3
+    assert runner.metrics['failed'] == 1
+    assert runner.completed() == {'R0', 'R2', 'R3'}
+
+    # Depois da queda: novo SAP, novo BatchRunner com o mesmo journal.
+    runs.clear()
+    crash_at.clear()
+    bad.clear()
+    engine = FakeEngine()
+    runner = BatchRunner(_sap(engine), step, path, key=lambda item: item['ref'])
+    entries = runner.run(ITEMS)
+
+    assert runs == ['R1', 'R4', 'R5']
+    assert [(entry['key'], entry['status'], entry['result']) for entry in entries] == [
+        ('R1', 'done', 'r1'), ('R4', 'done', 'r4'), ('R5', 'done', 'r5'),
+        ]
+    assert runner.metrics['skipped'] == 3
+    assert runner.completed() == {item['ref'] for item in ITEMS}
+
+    runs.clear()
+    assert runner.run(ITEMS) == []
+    assert runs == []
+
+def test_failed_items_are_kept_when_retry_failed_is_false(tmp_path):
+    engine = FakeEngine()
+    runs = []
+
+    def step(sap, item):
+        runs.append(item)
+        if item == 'bad':
+            raise ValueError('invalid material')
+
+    path = tmp_path / 'batch.jsonl'
+    entries = BatchRunner(_sap(engine), step, path).run(['ok', 'bad'])
+    assert entries[1]['status'] == 'failed'
+    assert entries[1]['error'] == 'ValueError: invalid material'
+
+    runs.clear()
+    BatchRunner(_sap(engine), step, path, retry_failed=False).run(['ok', 'bad'])
+    assert runs == []
+    BatchRunner(_sap(engine), step, path).run(['ok', 'bad'])
+    assert runs == ['bad']
+
+def test_dataframes_are_run_row_by_row(tmp_path):
+    from pandas import DataFrame
+
+    engine = FakeEngine()
+
+    def step(sap, item):
+        sap.open_transaction(item['transaction'])
+        return item['quantity']
+
+    frame = DataFrame({'transaction': ['VA01', 'VA02'], 'quantity': [1, 2]})
+    entries = BatchRunner(_sap(engine), step, tmp_path / 'batch.db').run(frame)
+
+    assert [entry['result'] for entry in entries] == [1, 2]
+    assert engine.session.Info.Transaction == 'VA02'
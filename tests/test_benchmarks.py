@@ -0,0 +1,67 @@
+"""
+Benchmarks of the hot paths on the fake scripting engine. Besides the timings reported by
+pytest-benchmark, each test checks how many COM calls the path makes, so a change that adds
+round-trips fails in CI even where the fake engine is much faster than SAP.
+"""
+import pytest
+from sapguipy.testing.benchmarks import grid_extraction, element_lookup, login_flow, tree_walk
+
+
+def _calls(engine, run) -> int:
+    """COM calls made by one run of a scenario."""
+    engine.stats.reset()
+    run()
+    return engine.stats.total
+
+
+@pytest.mark.parametrize('export', [True, False], ids=['export', 'per_cell'])
+def test_grid_extraction(benchmark, export):
+    rows, columns = 2000, 10
+    engine, run = grid_extraction(rows=rows, columns=columns, export=export)
+    frame = benchmark(run)
+
+    assert frame.shape == (rows, columns)
+    assert frame['COL3'].iloc[-1] == f'{rows - 1}-3'
+    if export:
+        # O diálogo de exportação custa um número fixo de chamadas, qualquer que seja o tamanho do grid.
+        assert _calls(engine, run) <= 40
+    else:
+        # Uma chamada por célula, mais a rolagem de cada página.
+        assert _calls(engine, run) <= rows * columns + rows // 30 + 20
+
+def test_grid_extraction_chunked(benchmark):
+    rows, columns = 2000, 10
+    engine, run = grid_extraction(rows=rows, columns=columns, chunk_rows=500)
+
+    assert benchmark(run) == rows
+    assert _calls(engine, run) <= rows * columns + rows // 30 + 20
+
+@pytest.mark.parametrize('element_cache', [False, True], ids=['no_cache', 'cache'])
+def test_element_lookup(benchmark, element_cache):
+    lookups = 100
+    engine, run = element_lookup(lookups=lookups, element_cache=element_cache)
+    benchmark(run)
+
+    if element_cache:
+        # Depois da primeira execução, todos os elementos vêm do cache.
+        assert _calls(engine, run) == 0
+    else:
+        # FindById e Type de cada elemento.
+        assert _calls(engine, run) == lookups * 3 * 2
+
+def test_login_flow(benchmark):
+    engine, run = login_flow()
+    sap = benchmark.pedantic(run, setup=lambda: engine.session.show_logon('USR', 'pwd'), rounds=50)
+
+    assert sap.get_user_logged() == 'USR'
+    engine.session.show_logon('USR', 'pwd')
+    assert _calls(engine, run) <= 25
+
+def test_tree_walk(benchmark):
+    fields = 200
+    engine, run = tree_walk(fields=fields)
+    tree = benchmark(run)
+
+    assert len(tree['children'][2]['children']) == fields
+    # Uma leitura por propriedade do dump em cada elemento.
+    assert _calls(engine, run) <= (fields + 10) * 12
@@ -0,0 +1,135 @@
+from threading import get_ident
+from time import monotonic, sleep
+from sapguipy.sap import SapGui
+from sapguipy.backends import Backend
+from sapguipy.broker import SessionBroker, MAX_POPUPS
+from sapguipy.testing import FakeEngine
+
+
+class _Proxy:
+    """Marshalled copy of a session that records the thread that releases it."""
+    def __init__(self, session, released: list):
+        self._session = session
+        self._released = released
+
+    def SendCommand(self, command):
+        self._session.SendCommand(command)
+
+    def __del__(self):
+        self._released.append(get_ident())
+
+
+class _ProxyBackend(Backend):
+    def __init__(self):
+        self.unmarshalled = []
+        self.released = []
+
+    def unmarshal(self, packed):
+        self.unmarshalled.append(get_ident())
+        return _Proxy(super().unmarshal(packed), self.released)
+
+
+def _factory(engines: list, backend: Backend = None, close_popups: bool = True):
+    """Broker factory: every new session is attached to a fake engine of its own."""
+    def on_action(session, element, action, args):
+        if action != 'Close' or not close_popups:
+            return
+        title = element._properties['text']
+        session.close_popup()
+        if title == 'Exit':
+            session.open_popup(engine_of(session).element('txtMESSTXT1', 'GuiTextField', text='Data will be lost'), title='Confirm')
+
+    def engine_of(session):
+        return next(engine for engine in engines if engine.session is session)
+
+    def factory(sid, user, pwd, mandante, **options):
+        engine = FakeEngine(user=user, on_action=on_action)
+        engines.append(engine)
+        return SapGui(sid=sid, user=user, pwd=pwd, mandante=mandante, backend=backend, **options).attach(engine.application)
+    return factory
+
+
+def test_released_sessions_are_reused():
+    engines = []
+    broker = SessionBroker(keep_alive=0, factory=_factory(engines))
+
+    with broker.lease('PRD', 'USR', 'pwd', '900') as sap:
+        sap.open_transaction('VA03')
+    assert broker.idle_count == 1
+    assert engines[0].session.Info.Transaction == 'SESSION_MANAGER'
+
+    with broker.lease('PRD', 'USR', 'pwd', '900') as again:
+        assert again is sap
+        with broker.lease('PRD', 'USR', 'pwd', '900') as other:
+            assert other is not sap
+        with broker.lease('PRD', 'BOT', 'pwd', '900') as bot:
+            assert bot.user == 'BOT'
+
+    assert broker.stats == {'created': 3, 'reused': 1, 'recycled': 0, 'keep_alives': 0}
+    assert broker.idle_count == 3
+    broker.close()
+    assert broker.idle_count == 0
+    assert broker.stats['recycled'] == 3
+
+def test_popups_are_closed_topmost_first_on_release():
+    engines = []
+    broker = SessionBroker(keep_alive=0, factory=_factory(engines))
+
+    with broker.lease('PRD', 'USR', 'pwd', '900') as sap:
+        session = engines[0].session
+        session.open_popup(title='Search help')
+        # Fechar este popup abre uma confirmação.
+        session.open_popup(title='Exit')
+
+    assert session.ActiveWindow.Id.endswith('wnd[0]')
+    assert engines[0].stats.by_name()['Close'] == 3
+    assert broker.idle_count == 1
+    broker.close()
+
+def test_sessions_whose_popups_do_not_close_are_discarded():
+    engines = []
+    broker = SessionBroker(keep_alive=0, factory=_factory(engines, close_popups=False))
+
+    with broker.lease('PRD', 'USR', 'pwd', '900'):
+        engines[0].session.open_popup(title='Stuck')
+
+    assert engines[0].stats.by_name()['Close'] == MAX_POPUPS
+    assert broker.idle_count == 0
+    assert broker.stats['recycled'] == 1
+
+def test_unhealthy_idle_sessions_are_replaced():
+    engines = []
+    broker = SessionBroker(keep_alive=0, factory=_factory(engines))
+    with broker.lease('PRD', 'USR', 'pwd', '900'):
+        pass
+    engines[0].crash()
+
+    with broker.lease('PRD', 'USR', 'pwd', '900') as sap:
+        assert sap.session is engines[1].session
+    assert broker.stats['recycled'] == 1
+    broker.close()
+
+def test_keep_alive_proxies_live_and_die_in_the_keep_alive_thread():
+    engines = []
+    backend = _ProxyBackend()
+    broker = SessionBroker(keep_alive=0.05, factory=_factory(engines, backend))
+    with broker.lease('PRD', 'USR', 'pwd', '900'):
+        pass
+
+    deadline = monotonic() + 5
+    while not broker.stats['keep_alives'] and monotonic() < deadline:
+        sleep(0.01)
+    assert broker.stats['keep_alives']
+    assert engines[0].stats.by_name()['SendCommand'] >= 1
+
+    # Emprestar a sessão acorda a thread, que solta o proxy antes do próximo keep-alive.
+    sap = broker.acquire('PRD', 'USR', 'pwd', '900')
+    deadline = monotonic() + 5
+    while not backend.released and monotonic() < deadline:
+        sleep(0.01)
+    released_while_running = list(backend.released)
+    broker.close()
+
+    assert backend.unmarshalled and get_ident() not in backend.unmarshalled
+    assert released_while_running == backend.unmarshalled[:1]
+    assert sap.logged
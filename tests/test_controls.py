@@ -0,0 +1,83 @@
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.models.sap_controls import CONTROL_TYPES, register_control, GuiVComponent, GuiTextField, GuiGridView, GuiUserArea
+from sapguipy.testing import FakeEngine
+
+
+@pytest.fixture
+def control_types():
+    """Restores CONTROL_TYPES after a test registers its own classes."""
+    saved = dict(CONTROL_TYPES)
+    yield CONTROL_TYPES
+    CONTROL_TYPES.clear()
+    CONTROL_TYPES.update(saved)
+
+
+def _sap(*elements):
+    engine = FakeEngine()
+    engine.session.set_screen(*elements)
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    return engine, sap
+
+
+def test_unknown_types_fall_back_to_gui_v_component():
+    engine = FakeEngine()
+    _, sap = _sap(
+        engine.element('ctxtVBAK-VBELN', 'GuiCTextFieldNew', text='4711'),
+        engine.element('shellcont', 'GuiShell', SubType='Chart'),
+        )
+
+    field = sap.find_by_id('wnd[0]/usr/ctxtVBAK-VBELN')
+    shell = sap.find_by_id('wnd[0]/usr/shellcont')
+
+    assert type(field) is GuiVComponent
+    assert field.text == '4711'
+    # Shells de subtipo desconhecido ficam com a classe de 'GuiShell'.
+    assert type(shell) is CONTROL_TYPES['GuiShell']
+
+def test_registered_classes_are_used_by_find_by_id(control_types):
+    engine = FakeEngine()
+    _, sap = _sap(
+        engine.element('ctxtVBAK-VBELN', 'GuiCTextFieldNew'),
+        engine.element('shellcont', 'GuiShell', SubType='Chart'),
+        )
+
+    @register_control('GuiCTextFieldNew')
+    class GuiCTextFieldNew(GuiTextField):
+        pass
+
+    class GuiChart(GuiVComponent):
+        pass
+
+    assert register_control('GuiShell/Chart', GuiChart) is GuiChart
+    assert type(sap.find_by_id('wnd[0]/usr/ctxtVBAK-VBELN')) is GuiCTextFieldNew
+    assert type(sap.find_by_id('wnd[0]/usr/shellcont')) is GuiChart
+
+def test_registering_an_existing_type_replaces_its_class(control_types):
+    engine = FakeEngine()
+    _, sap = _sap(engine.grid('shell', {'MATNR': ['M1']}))
+
+    class AuditedGrid(GuiGridView):
+        pass
+
+    register_control('GuiShell/GridView', AuditedGrid)
+    assert type(sap.find_by_id('wnd[0]/usr/shell')) is AuditedGrid
+
+def test_children_are_wrapped_only_when_accessed():
+    engine = FakeEngine()
+    _, sap = _sap(*[engine.element(f'txtFIELD{index}', 'GuiTextField', text=str(index)) for index in range(5)])
+    user_area = sap.find_by_id('wnd[0]/usr')
+    assert isinstance(user_area, GuiUserArea)
+
+    engine.stats.reset()
+    children = user_area.list_children()
+    assert engine.stats.by_name()['Type'] == 0
+
+    assert len(children) == 5
+    assert children[-1].text == '4'
+    assert engine.stats.by_name()['Type'] == 1
+    assert [child.text for child in children[1:3]] == ['1', '2']
+    assert engine.stats.by_name()['Type'] == 3
+    assert all(type(child) is GuiTextField for child in children)
+    with pytest.raises(IndexError):
+        children[5]
@@ -0,0 +1,87 @@
+import math
+import pytest
+from sapguipy.models.conversion import to_number, to_integer, to_date, to_time, to_category, infer_type, convert_table, convert_chunks
+
+
+def test_to_number_reads_trailing_minus_and_thousands_separators():
+    values = ['1.234,56', '1.234,56-', '-3', '12,5-', '1.234.567', ' 7 ', '', 'abc']
+    numbers = to_number(values).tolist()
+
+    assert numbers[:6] == [1234.56, -1234.56, -3.0, -12.5, 1234567.0, 7.0]
+    assert all(math.isnan(number) for number in numbers[6:])
+
+@pytest.mark.parametrize('number_format, values', [
+    ('1,234,567.89', ['1,234.5-', '1,234,567.25', '']),
+    ('1 234 567,89', ['1 234,5-', '1 234 567,25', '']),
+    ])
+def test_to_number_other_user_formats(number_format, values):
+    numbers = to_number(values, number_format).tolist()
+
+    assert numbers[:2] == [-1234.5, 1234567.25]
+    assert math.isnan(numbers[2])
+
+def test_to_integer_dtypes():
+    assert str(to_integer(['1', '2.000', '3-']).dtype) == 'int16'
+    assert to_integer(['1', '2.000', '3-']).tolist() == [1, 2000, -3]
+
+    with_empty = to_integer(['1', '', '3-'])
+    assert str(with_empty.dtype) == 'Int64'
+    assert with_empty.isna().tolist() == [False, True, False]
+    assert str(to_integer(['1'], downcast=False).dtype) == 'Int64'
+
+def test_invalid_and_empty_dates_become_nat():
+    dates = to_date(['31.12.2024', '', '00.00.0000', '31.02.2024', 'tomorrow'])
+
+    assert dates.iloc[0].strftime('%Y-%m-%d') == '2024-12-31'
+    assert dates.isna().tolist() == [False, True, True, True, True]
+    assert to_date(['2024/02/29'], 'YYYY/MM/DD').iloc[0].day == 29
+
+def test_empty_times_and_categories_are_missing():
+    assert to_time(['13:45:10', '']).isna().tolist() == [False, True]
+    assert to_time(['13:45:10']).iloc[0].total_seconds() == 13 * 3600 + 45 * 60 + 10
+    categories = to_category(['A', ' A', ''])
+    assert categories.cat.categories.tolist() == ['A']
+    assert categories.isna().tolist() == [False, False, True]
+
+def test_infer_type():
+    assert infer_type(['1.234,56-', '', '3']) == 'number'
+    assert infer_type(['1.234', '5-', '']) == 'integer'
+    assert infer_type(['0000004711', '0000004712']) == 'text'
+    assert infer_type(['01.01.2024', '']) == 'date'
+    assert infer_type(['', ' ']) == 'text'
+    assert infer_type(['A', 'B', 'A', 'A']) == 'category'
+
+def test_convert_table_edge_cases():
+    from pandas import DataFrame
+
+    frame = DataFrame({
+        'VBELN': ['0000004711', '0000004712', '0000004713'],
+        'NETWR': ['1.234,56-', '', '10,00'],
+        'MENGE': ['1.000', '2', '3-'],
+        'ERDAT': ['31.12.2024', '', '31.02.2024'],
+        'WAERS': ['EUR', 'EUR', 'EUR'],
+        })
+    converted = convert_table(frame, types={'ERDAT': 'DATS'})
+
+    assert converted['VBELN'].tolist() == frame['VBELN'].tolist()
+    assert converted['NETWR'].iloc[0] == -1234.56
+    assert math.isnan(converted['NETWR'].iloc[1])
+    assert converted['MENGE'].tolist() == [1000, 2, -3]
+    assert converted['ERDAT'].isna().tolist() == [False, True, True]
+    assert str(converted['WAERS'].dtype) == 'category'
+
+    with pytest.raises(ValueError):
+        convert_table(frame, types={'MENGE': 'decimal'})
+    with pytest.raises(ValueError):
+        convert_table(frame, number_format='1234,5')
+
+def test_convert_chunks_rejects_values_that_do_not_fit_the_inferred_type():
+    from pandas import DataFrame
+
+    chunks = [DataFrame({'MENGE': ['1', '']}), DataFrame({'MENGE': ['2,5']}, index=[2])]
+    converted = convert_chunks(chunks)
+
+    assert str(next(converted)['MENGE'].dtype) == 'Int64'
+    with pytest.raises(ValueError, match='row 2'):
+        next(converted)
+    assert next(convert_chunks(chunks[1:], types={'MENGE': 'number'}))['MENGE'].tolist() == [2.5]
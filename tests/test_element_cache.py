@@ -0,0 +1,63 @@
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.testing import FakeEngine
+
+IDS = ('wnd[0]/sbar', 'wnd[0]/tbar[0]/okcd')
+
+
+def _sap(engine: FakeEngine, **options) -> SapGui:
+    return SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900', **options).attach(engine.application)
+
+
+def _lookup(sap: SapGui, times: int = 3):
+    for _ in range(times):
+        for element_id in IDS:
+            sap.find_by_id(element_id)
+
+
+def test_cached_lookups_do_not_go_to_com():
+    engine = FakeEngine()
+    sap = _sap(engine, element_cache=True)
+    sap.invalidate_cache()
+    engine.stats.reset()
+    hits, misses = sap.cache_hits, sap.cache_misses
+
+    _lookup(sap)
+
+    assert (sap.cache_hits - hits, sap.cache_misses - misses) == (4, 2)
+    assert sap.cache_stats['size'] == 2
+    assert engine.stats.by_name()['FindById'] == 2
+    assert sap.find_by_id('wnd[0]/sbar') is sap.find_by_id('wnd[0]/sbar')
+
+@pytest.mark.parametrize('action', [
+    lambda sap: sap.find_by_id('wnd[0]/tbar[0]/btn[0]').press(),
+    lambda sap: sap.find_by_id('wnd[0]').send_v_key(0),
+    lambda sap: sap.open_transaction('VA03'),
+    ], ids=['press', 'send_v_key', 'open_transaction'])
+def test_actions_that_go_to_the_server_invalidate_the_cache(action):
+    engine = FakeEngine()
+    sap = _sap(engine, element_cache=True)
+    _lookup(sap)
+    before = sap.find_by_id('wnd[0]/sbar')
+
+    action(sap)
+    assert sap.cache_stats['size'] == 0
+
+    engine.stats.reset()
+    hits, misses = sap.cache_hits, sap.cache_misses
+    _lookup(sap)
+
+    assert sap.cache_hits - hits == 4
+    assert sap.cache_misses - misses == 2
+    assert engine.stats.by_name()['FindById'] == 2
+    assert sap.find_by_id('wnd[0]/sbar') is not before
+
+def test_without_cache_every_lookup_goes_to_com():
+    engine = FakeEngine()
+    sap = _sap(engine)
+    engine.stats.reset()
+
+    _lookup(sap)
+
+    assert sap.cache_stats == {'hits': 0, 'misses': 0, 'size': 0}
+    assert engine.stats.by_name()['FindById'] == 6
@@ -0,0 +1,82 @@
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.models.export import iter_export_file, read_export_file
+from sapguipy.testing import FakeEngine
+
+UNCONVERTED = (
+    '18.10.2026        Dynamic List Display        1\r\n'
+    '----------------------------------------\r\n'
+    '|Material  |Plnt|  Quantity|Plnt|\r\n'
+    '----------------------------------------\r\n'
+    '|100-100   |1000|    10,000|1100|\r\n'
+    '|100-200   |1000| 1.250,500|1100|\r\n'
+    '----------------------------------------\r\n'
+    '18.10.2026        Dynamic List Display        2\r\n'
+    '|Material  |Plnt|  Quantity|Plnt|\r\n'
+    '|100-300   |2000|     3,000-|1200|\r\n'
+)
+
+SPREADSHEET = (
+    'Dynamic List Display\r\n'
+    '\r\n'
+    '\tMaterial\tPlnt\tQuantity\r\n'
+    '\t100-100\t1000\t10,000\r\n'
+    '\t100-200\t1000\t1.250,500\r\n'
+)
+
+
+def _write(tmp_path, name: str, text: str):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+def test_unconverted_skips_titles_and_repeated_headers(tmp_path):
+    frame = read_export_file(_write(tmp_path, 'list.txt', UNCONVERTED), 'unconverted')
+
+    assert list(frame.columns) == ['Material', 'Plnt', 'Quantity', 'Plnt.1']
+    assert frame['Material'].tolist() == ['100-100', '100-200', '100-300']
+    assert frame['Quantity'].iloc[2] == '3,000-'
+
+def test_spreadsheet_drops_the_leading_empty_column(tmp_path):
+    frame = read_export_file(_write(tmp_path, 'list.xls', SPREADSHEET), 'spreadsheet')
+
+    assert list(frame.columns) == ['Material', 'Plnt', 'Quantity']
+    assert frame['Quantity'].tolist() == ['10,000', '1.250,500']
+
+def test_iter_export_file_yields_chunks(tmp_path):
+    chunks = list(iter_export_file(_write(tmp_path, 'list.txt', UNCONVERTED), chunk_rows=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[1].index[0] == 2
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match='Unknown export format'):
+        read_export_file(_write(tmp_path, 'list.txt', UNCONVERTED), 'html')
+
+
+def _grid(export: bool = True):
+    engine = FakeEngine()
+    data = {'MATNR': ['100-100', '100-200'], 'MENGE': ['10,000', '1.250,500']}
+    engine.session.set_screen(engine.grid('shell', data, export=export))
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    return engine, sap.find_by_id('wnd[0]/usr/shell')
+
+@pytest.mark.parametrize('format', ['unconverted', 'spreadsheet'])
+def test_export_to_file_drives_the_dialogs(tmp_path, format):
+    engine, grid = _grid()
+    frame = grid.export_to_file(tmp_path / 'grid.txt', format, types=True)
+
+    assert frame['MENGE'].tolist() == [10.0, 1250.5]
+    assert engine.stats.by_name()['GetCellValue'] == 0
+    assert engine.session.FindById('wnd[1]', False) is None
+
+def test_export_to_file_falls_back_to_reading_the_cells(tmp_path):
+    _, grid = _grid(export=False)
+    frame = grid.export_to_file(tmp_path / 'grid.txt')
+
+    assert frame['MATNR'].tolist() == ['100-100', '100-200']
+    assert not (tmp_path / 'grid.txt').exists()
+
+    with pytest.raises(Exception):
+        grid.export_to_file(tmp_path / 'grid.txt', fallback=False)
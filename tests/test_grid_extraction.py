@@ -0,0 +1,43 @@
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.testing import FakeEngine
+
+
+def _grid(rows: int = 95, **options):
+    engine = FakeEngine()
+    data = {'MATNR': [f'M{row:04d}' for row in range(rows)], 'MENGE': [str(row) for row in range(rows)]}
+    engine.session.set_screen(engine.grid('shell', data, visible_rows=10, **options))
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    return engine, sap.find_by_id('wnd[0]/usr/shell')
+
+
+def test_read_shell_table_reads_every_cell():
+    engine, grid = _grid()
+    engine.stats.reset()
+    frame = grid.read_shell_table()
+
+    assert list(frame.columns) == ['MATNR', 'MENGE']
+    assert len(frame) == 95
+    assert frame['MATNR'].iloc[-1] == 'M0094'
+    assert engine.stats.by_name()['GetCellValue'] == 95 * 2
+
+def test_read_shell_table_scrolls_lazily_loaded_grids():
+    _, grid = _grid(strict_scrolling=True)
+
+    assert grid.read_shell_table()['MENGE'].tolist() == [str(row) for row in range(95)]
+    assert grid.get_column_values('MATNR')[57] == 'M0057'
+
+def test_iter_shell_table_matches_read_shell_table():
+    _, grid = _grid(strict_scrolling=True)
+    chunks = list(grid.iter_shell_table(chunk_rows=40))
+
+    assert [len(chunk) for chunk in chunks] == [40, 40, 15]
+    assert chunks[-1].index[0] == 80
+    assert chunks[-1]['MATNR'].iloc[-1] == 'M0094'
+
+def test_read_shell_table_converts_types():
+    _, grid = _grid()
+    frame = grid.read_shell_table(types=True)
+
+    assert frame['MENGE'].dtype.kind == 'i'
+    assert frame['MATNR'].iloc[0] == 'M0000'
@@ -0,0 +1,44 @@
+import os
+from sapguipy.orchestrator import Orchestrator
+from sapguipy.sap import SapGui
+from sapguipy.testing import FakeEngine
+
+
+class _FakeWorker:
+    """sap_factory of the tests: each worker process attaches to a fake engine of its own."""
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+
+    def __enter__(self):
+        self.engine = FakeEngine(user=f'BOT{self.worker_id}')
+        return SapGui(sid='PRD', user=f'BOT{self.worker_id}', pwd='pwd', mandante='900').attach(self.engine.application)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        ...
+
+def _job(sap, item):
+    if item == 'fail':
+        raise ValueError('bad item')
+    sap.open_transaction(item)
+    return os.getpid(), sap.get_user_logged(), sap.session_info.get_transaction()
+
+
+def test_items_are_spread_across_worker_processes():
+    orchestrator = Orchestrator(_FakeWorker, workers=2, heartbeat=0.2)
+    items = [f'VA0{index}' for index in range(8)]
+    results = orchestrator.run(_job, items)
+
+    assert [transaction for _, _, transaction in results] == [item.upper() for item in items]
+    assert {pid for pid, _, _ in results} - {os.getpid()}
+    assert {user for _, user, _ in results} <= {'BOT0', 'BOT1'}
+    assert orchestrator.metrics['done'] == 8
+    assert orchestrator.metrics['failed'] == 0
+
+def test_failed_items_keep_their_error():
+    orchestrator = Orchestrator(_FakeWorker, workers=2, heartbeat=0.2)
+    results = orchestrator.run(_job, ['VA01', 'fail', 'VA03'])
+
+    assert isinstance(results[1], Exception)
+    assert 'bad item' in str(results[1])
+    assert results[2][2] == 'VA03'
+    assert orchestrator.metrics['failed'] == 1
@@ -0,0 +1,106 @@
+from threading import get_ident
+from time import sleep
+import pytest
+from sapguipy.pool import SessionPool
+from sapguipy.sap import SapGui
+from sapguipy.testing import FakeEngine
+
+
+def _sap(engine: FakeEngine) -> SapGui:
+    return SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+
+
+def test_map_keeps_the_order_of_the_items():
+    engine = FakeEngine()
+    sap = _sap(engine)
+
+    def job(window, item):
+        # Os primeiros itens demoram mais, então terminam depois dos seguintes.
+        sleep(0.05 if item < 2 else 0)
+        window.open_transaction(f'VA0{item}')
+        return item, window.session_info.get_transaction(), window.session.Id, get_ident()
+
+    results = SessionPool(sap, size=2).map(job, range(6))
+
+    assert [(item, transaction) for item, transaction, _, _ in results] == [(item, f'VA0{item}') for item in range(6)]
+    assert len({session_id for _, _, session_id, _ in results}) == 2
+    assert sap.session.Id not in {session_id for _, _, session_id, _ in results}
+    assert get_ident() not in {thread for _, _, _, thread in results}
+    # As sessões do pool são fechadas quando map retorna.
+    assert sap.connection.Sessions.Count == 1
+
+def test_a_job_whose_session_died_is_retried_on_a_new_session():
+    engine = FakeEngine()
+    sap = _sap(engine)
+    killed = []
+
+    def job(window, item):
+        if item == 'kill' and not killed:
+            killed.append(window.session.Id)
+            window.connection.CloseSession(window.session.Id)
+            window.open_transaction('VA01')
+        return item, window.session.Id
+
+    results = SessionPool(sap, size=1, retries=1).map(job, ['first', 'kill', 'last'])
+
+    assert [item for item, _ in results] == ['first', 'kill', 'last']
+    assert results[0][1] == killed[0]
+    assert results[1][1] != killed[0]
+    assert sap.connection.Sessions.Count == 1
+
+def test_errors_of_live_sessions_are_not_retried():
+    engine = FakeEngine()
+    sap = _sap(engine)
+    calls = []
+
+    def job(window, item):
+        calls.append(item)
+        if item == 2:
+            raise ValueError('bad item')
+        return item
+
+    with pytest.raises(ValueError, match='bad item'):
+        SessionPool(sap, size=2).map(job, range(4))
+    assert sorted(calls) == [0, 1, 2, 3]
+    assert sap.connection.Sessions.Count == 1
+
+def test_a_crash_fails_the_job_after_the_retries():
+    engine = FakeEngine()
+    sap = _sap(engine)
+
+    def job(window, item):
+        engine.crash()
+        window.open_transaction('VA01')
+
+    with pytest.raises(Exception, match='RPC server is unavailable'):
+        SessionPool(sap, size=1, retries=0).map(job, ['item'])
+
+def test_size_is_checked_against_the_free_sessions_before_opening_any():
+    engine = FakeEngine()
+    sap = _sap(engine)
+
+    with pytest.raises(ValueError, match='size must be less than 3'):
+        SessionPool(sap, size=3)
+
+    other = sap.new_window()
+    other.new_window()
+    with pytest.raises(Exception, match='room for 0'):
+        SessionPool(sap, size=1).map(lambda window, item: item, [1])
+    assert sap.connection.Sessions.Count == 3
+
+def test_sessions_opened_before_a_startup_failure_are_closed(monkeypatch):
+    engine = FakeEngine()
+    sap = _sap(engine)
+    new_window = sap.new_window
+    opened = []
+
+    def failing_new_window(timeout: float = 30):
+        if opened:
+            raise Exception('The session could not be created.')
+        opened.append(new_window(timeout))
+        return opened[-1]
+
+    monkeypatch.setattr(sap, 'new_window', failing_new_window)
+    with pytest.raises(Exception, match='could not be created'):
+        SessionPool(sap, size=2).map(lambda window, item: item, range(4))
+    assert sap.connection.Sessions.Count == 1
@@ -0,0 +1,88 @@
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.profiler import Profiler, InstrumentedObject
+from sapguipy.testing import FakeEngine
+
+
+def _sap():
+    engine = FakeEngine()
+    engine.session.set_screen(engine.element('ctxtVBAK-AUART', 'GuiCTextField'))
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    return engine, sap
+
+
+def test_calls_are_attributed_to_the_step_that_made_them():
+    engine, sap = _sap()
+    profiler = sap.enable_profiling()
+    profiler.reset()
+    counts = {}
+
+    @profiler.step('save')
+    def save(sap):
+        sap.find_by_id('wnd[0]/tbar[0]/btn[0]').press()
+
+    engine.stats.reset()
+    with profiler.step('fill header'):
+        sap.find_by_id('wnd[0]/usr/ctxtVBAK-AUART').set_text('OR')
+    counts['fill header'] = engine.stats.total
+
+    engine.stats.reset()
+    save(sap)
+    save(sap)
+    counts['save'] = engine.stats.total
+
+    engine.stats.reset()
+    sap.open_transaction('VA01')
+    counts['<none>'] = engine.stats.total
+
+    assert {name: stat.count for name, stat in profiler.step_calls.items()} == counts
+    assert profiler.total_calls == sum(counts.values())
+    assert profiler.calls[('GuiCTextField', 'Text')].count == 1
+    assert profiler.calls[('GuiButton', 'Press')].count == 2
+    steps = {row['name']: row for row in profiler.to_dict()['steps']}
+    assert steps['save']['count'] == 2
+    assert steps['save']['com_calls'] == counts['save']
+    assert [span['name'] for span in profiler.to_spans()] == ['fill header', 'save', 'save']
+
+def test_nested_and_failed_steps():
+    _, sap = _sap()
+    profiler = sap.enable_profiling()
+
+    with pytest.raises(ValueError):
+        with profiler.step('order'):
+            with profiler.step('item'):
+                sap.find_by_id('wnd[0]/sbar')
+            raise ValueError('invalid order')
+
+    spans = {span['name']: span for span in profiler.to_spans()}
+    assert spans['item']['parent'] == 'order'
+    assert spans['item']['status'] == 'OK'
+    assert spans['order']['status'] == 'ERROR'
+    # As chamadas do passo interno não são somadas ao externo.
+    assert spans['order']['attributes']['sap.com.calls'] == 0
+    assert spans['item']['attributes']['sap.com.calls'] > 0
+
+def test_disable_profiling_restores_the_raw_session():
+    engine, sap = _sap()
+    profiler = sap.enable_profiling()
+    assert isinstance(sap.session, InstrumentedObject)
+
+    sap.disable_profiling()
+    calls = profiler.total_calls
+    sap.find_by_id('wnd[0]/usr/ctxtVBAK-AUART').set_text('OR')
+    sap.open_transaction('VA01')
+
+    assert sap.session is engine.session
+    assert not isinstance(sap.statusbar.element, InstrumentedObject)
+    assert sap.profiler is None
+    assert profiler.total_calls == calls
+    assert engine.session.Info.Transaction == 'VA01'
+
+def test_enable_profiling_reuses_a_given_profiler():
+    _, sap = _sap()
+    profiler = Profiler()
+
+    assert sap.enable_profiling(profiler) is profiler
+    sap.disable_profiling()
+    assert sap.enable_profiling(profiler) is profiler
+    assert isinstance(sap.session._com_object, InstrumentedObject) is False
@@ -0,0 +1,101 @@
+import subprocess
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.backends import Backend
+from sapguipy.testing import FakeEngine
+
+
+class _LaunchBackend(Backend):
+    """Backend of a desktop where sapshcut opens a connection in the fake engine."""
+    supported = True
+
+    def __init__(self, engine: FakeEngine):
+        self.engine = engine
+        self.terminated = []
+
+    def get_sapgui_object(self):
+        return self.engine.sapgui
+
+    def process_tree(self, pid: int) -> set:
+        return {pid, pid + 1}
+
+    def terminate_processes(self, pids: set, timeout: float = 10) -> set:
+        self.terminated.append(set(pids))
+        return set()
+
+
+class _Sapshcut:
+    """Popen of sapshcut.exe: opens a new connection, like saplogon does for the shortcut."""
+    def __init__(self, engine: FakeEngine, user: str):
+        self.pid = 4000
+        self.terminated = False
+        engine.open_connection(user=user)
+
+    def poll(self):
+        return None
+
+    def terminate(self):
+        self.terminated = True
+
+
+@pytest.fixture
+def launch(monkeypatch):
+    """Returns launch(engine, user): a SapGui started by start_sap on the fake engine."""
+    programs = []
+
+    def launch(engine: FakeEngine, user: str = 'BOT1') -> SapGui:
+        monkeypatch.setattr(subprocess, 'Popen', lambda args: programs.append(_Sapshcut(engine, user)) or programs[-1])
+        sap = SapGui(sid='PRD', user=user, pwd='pwd', mandante='900', backend=_LaunchBackend(engine))
+        sap.start_sap(timeout=5)
+        return sap
+    return launch
+
+
+def test_start_sap_owns_only_the_connection_it_opened(launch):
+    # Outro robô já está logado na primeira conexão do mesmo saplogon.
+    engine = FakeEngine(user='BOT0')
+    sap = launch(engine)
+
+    assert sap.connection_id == '/app/con[1]'
+    assert sap.get_user_logged() == 'BOT1'
+    assert set(sap.timings) == {'launch', 'scripting_engine', 'connection', 'session'}
+
+    sap.quit(timeout=1)
+
+    assert [connection.Id for connection in engine.application.Children] == ['/app/con[0]']
+    assert engine.session.Info.User == 'BOT0'
+    # O saplogon ainda atende o outro robô: os processos não são encerrados.
+    assert sap.backend.terminated == []
+    assert sap.program.terminated
+    assert not sap.logged
+
+def test_quit_terminates_the_processes_it_started_when_no_connection_is_left(launch):
+    engine = FakeEngine()
+    engine.application._children._items.clear()
+    sap = launch(engine)
+
+    assert sap.connection_id == '/app/con[0]'
+    sap.quit(timeout=1)
+
+    assert engine.application.Children.Count == 0
+    assert sap.backend.terminated == [{4000, 4001}]
+
+def test_quit_leaves_an_attached_session_alone():
+    engine = FakeEngine()
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+
+    sap.quit()
+
+    assert engine.application.Children.Count == 1
+    assert engine.session.Busy is False
+    assert not sap.logged
+
+def test_quit_of_a_new_window_closes_only_its_session():
+    engine = FakeEngine()
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    window = sap.new_window()
+
+    window.quit()
+
+    assert [session.Id for session in sap.connection.Sessions] == [sap.session.Id]
+    assert sap.session_info.get_user() == 'USR'
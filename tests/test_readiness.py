@@ -0,0 +1,62 @@
+from time import monotonic
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.wait import wait_until, PhaseTimer
+from sapguipy.models.exceptions import WaitTimeout
+from sapguipy.testing import FakeEngine
+
+
+def _sap(**options) -> SapGui:
+    return SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900', **options)
+
+
+def test_attach_returns_as_soon_as_the_engine_is_ready():
+    engine = FakeEngine(ready_after=0.3)
+    start = monotonic()
+    sap = _sap().attach(engine.application, timeout=5)
+    elapsed = monotonic() - start
+
+    assert sap.logged
+    assert 0.3 <= elapsed < 1.5
+    assert set(sap.timings) == {'connection', 'session'}
+    assert sap.timings['connection'] >= 0.25
+
+def test_attach_times_out_when_the_engine_never_gets_ready():
+    engine = FakeEngine(ready_after=60)
+
+    with pytest.raises(WaitTimeout, match='the SAP connection'):
+        _sap().attach(engine.application, timeout=0.3)
+
+def test_new_window_waits_for_the_new_session():
+    engine = FakeEngine(busy_time=0.2)
+    sap = _sap().attach(engine.application)
+    window = sap.new_window(timeout=5)
+
+    assert window.session is not sap.session
+    assert not window.session.Busy
+    assert 'session' in window.timings
+
+def test_auto_wait_blocks_until_the_session_is_idle():
+    engine = FakeEngine(busy_time=0.2)
+    sap = _sap(auto_wait=True).attach(engine.application)
+    sap.open_transaction('VA03')
+
+    assert not sap.session.Busy
+
+def test_wait_until_backs_off_and_returns_the_value():
+    calls = []
+
+    def condition():
+        calls.append(monotonic())
+        return len(calls) == 4 and 'ready'
+
+    assert wait_until(condition, timeout=5, interval=0.01) == 'ready'
+    gaps = [after - before for before, after in zip(calls, calls[1:])]
+    assert gaps[-1] > gaps[0]
+
+def test_phase_timer_records_each_phase():
+    timer = PhaseTimer()
+    with timer.phase('launch'):
+        pass
+
+    assert list(timer.timings) == ['launch']
@@ -0,0 +1,180 @@
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.recording import Param, Step, compile_recording, optimize, parameterize, parse_recording
+from sapguipy.testing import FakeEngine
+from sapguipy.testing.fake_engine import FakeComponent
+
+RECORDING = '''If Not IsObject(application) Then
+   Set SapGuiAuto  = GetObject("SAPGUI")
+   Set application = SapGuiAuto.GetScriptingEngine
+End If
+If Not IsObject(connection) Then
+   Set connection = application.Children(0)
+End If
+If Not IsObject(session) Then
+   Set session    = connection.Children(0)
+End If
+If IsObject(WScript) Then
+   WScript.ConnectObject session,     "on"
+End If
+' Pedido de venda
+session.findById("wnd[0]").maximize
+session.findById("wnd[0]/usr/ctxtVBAK-AUART").text = "XX"
+session.findById("wnd[0]/usr/ctxtVBAK-AUART").caretPosition = 2
+session.findById("wnd[0]/usr/ctxtVBAK-AUART").setFocus
+session.findById("wnd[0]/usr/ctxtVBAK-AUART").text = "OR"
+session.findById("wnd[0]/usr/ctxtVBAK-VKORG").setFocus
+session.findById("wnd[0]/usr/ctxtVBAK-VKORG").text = "1000"
+session.findById("wnd[0]/usr/tblITEMS").GetCell(1, 0).text = "M-01"
+session.findById("wnd[0]").sendVKey 0
+'''
+
+
+def test_header_and_comments_are_skipped():
+    steps = parse_recording(RECORDING)
+
+    assert steps[0] == Step('call', 'wnd[0]', 'maximize')
+    assert steps[0].line == 15
+    assert steps[-1] == Step('call', 'wnd[0]', 'sendVKey', (0,))
+    assert len(steps) == 9
+
+def test_members_with_arguments_are_parsed():
+    steps = parse_recording(
+        'session.findById("wnd[0]/usr/tblSAPLITEMS").getAbsoluteRow(5).selected = true\n'
+        'session.findById("wnd[0]/usr/tblITEMS").GetCell(0, "a.b").text = "x"\n'
+        'session.findById("wnd[0]/usr/tblITEMS").verticalScrollbar.position = 3\n'
+        'session.findById("wnd[0]/usr/cntlGRID/shellcont/shell").setCurrentCell 2,"MATNR"\n'
+        )
+
+    assert [(step.kind, step.name, step.path, step.args) for step in steps] == [
+        ('set', 'getAbsoluteRow(5).selected', (('getAbsoluteRow', (5,)),), (True,)),
+        ('set', 'GetCell(0, "a.b").text', (('GetCell', (0, 'a.b')),), ('x',)),
+        ('set', 'verticalScrollbar.position', (('verticalScrollbar', None),), (3,)),
+        ('call', 'setCurrentCell', (), (2, 'MATNR')),
+        ]
+    assert steps[2].ends_screen
+    assert not steps[3].ends_screen
+
+def test_unsupported_statements_raise_with_the_line():
+    with pytest.raises(ValueError, match='Line 2: unsupported'):
+        parse_recording('session.findById("wnd[0]").maximize\nsession.findById("wnd[0]").text = variable\n')
+
+def test_optimize_drops_the_statements_that_do_not_change_the_result():
+    steps = optimize(parse_recording(
+        RECORDING + 'session.findById("wnd[0]/usr/ctxtVBAK-KUNNR").setFocus\n'
+        'session.findById("wnd[0]").sendVKey 4\n'
+        'session.findById("wnd[0]/usr/ctxtVBAK-AUART").text = "ZOR"\n'
+        ))
+
+    assert [(step.target, step.name, step.args) for step in steps] == [
+        ('wnd[0]', 'maximize', ()),
+        ('wnd[0]/usr/ctxtVBAK-AUART', 'text', ('OR',)),
+        ('wnd[0]/usr/ctxtVBAK-VKORG', 'text', ('1000',)),
+        ('wnd[0]/usr/tblITEMS', 'GetCell(1, 0).text', ('M-01',)),
+        ('wnd[0]', 'sendVKey', (0,)),
+        ('wnd[0]/usr/ctxtVBAK-KUNNR', 'setFocus', ()),
+        ('wnd[0]', 'sendVKey', (4,)),
+        ('wnd[0]/usr/ctxtVBAK-AUART', 'text', ('ZOR',)),
+        ]
+
+def test_parameterize_by_value_and_by_element_id():
+    steps = parameterize(optimize(parse_recording(RECORDING)), {'OR': 'order_type', 'wnd[0]/usr/ctxtVBAK-VKORG': 'sales_org'})
+
+    assert steps[1].args == (Param('order_type'),)
+    assert steps[2].args == (Param('sales_org'),)
+    assert steps[3].args == ('M-01',)
+    assert steps[3].path == (('GetCell', (1, 0)),)
+
+
+def _order_engine() -> FakeEngine:
+    def on_action(session, element, action, args):
+        if action == 'SendVKey' and element._name == 'wnd[0]':
+            user_area = session.find('wnd[0]/usr')
+            order_type = user_area.find('ctxtVBAK-AUART')._properties['text']
+            material = user_area.find('tblITEMS').rows()[1][0]
+            session.find('wnd[0]/sbar').set_message(f'Order {order_type} {material} saved', 'S', 'V1', '311')
+
+    engine = FakeEngine(on_action=on_action)
+    engine.session.set_screen(
+        engine.element('ctxtVBAK-AUART', 'GuiCTextField'),
+        engine.element('ctxtVBAK-VKORG', 'GuiCTextField'),
+        engine.table_control('tblITEMS', ['VBAP-MATNR'], visible_rows=5),
+        transaction='VA01'
+        )
+    return engine
+
+def test_plan_runs_every_row_against_the_fake_engine():
+    engine = _order_engine()
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    plan = compile_recording(RECORDING, parameters={'OR': 'order_type', 'M-01': 'material'})
+
+    assert plan.parameters == ['order_type', 'material']
+    assert plan.stats == {'statements': 9, 'steps': 5, 'screens': 1, 'lookups': 4}
+
+    engine.stats.reset()
+    results = plan.run(sap, [{'order_type': 'OR', 'material': 'M-01'}, {'order_type': 'ZOR', 'material': 'M-02'}])
+
+    assert [(result['row'], result['message_type'], result['message']) for result in results] == [
+        (0, 'S', 'Order OR M-01 saved'),
+        (1, 'S', 'Order ZOR M-02 saved'),
+        ]
+    assert engine.stats.by_name()['FindById'] == 2 * (4 + 1)
+
+
+class _StaleField(FakeComponent):
+    """Text field whose reference stops answering once the screen is rebuilt, like a real COM reference."""
+    _type_name = 'GuiTextField'
+
+    def __init__(self, stats, name):
+        super().__init__(stats, name)
+        self._stale = False
+
+    def _get_Id(self):
+        if self._stale:
+            raise Exception('The object invoked has disconnected from its clients.')
+        return super()._get_Id()
+
+    def _set_Text(self, value):
+        if self._stale:
+            raise Exception('The object invoked has disconnected from its clients.')
+        self._properties['text'] = value
+
+def test_stale_references_are_looked_up_again():
+    def on_action(session, element, action, args):
+        # O foco no campo faz o servidor refazer a tela.
+        if action == 'SetFocus':
+            field = session.find('wnd[0]/usr/txtFIELD')
+            field._stale = True
+            session.set_screen(_StaleField(engine.stats, 'txtFIELD'))
+
+    engine = FakeEngine(on_action=on_action)
+    engine.session.set_screen(_StaleField(engine.stats, 'txtFIELD'))
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    plan = compile_recording(
+        'session.findById("wnd[0]/usr/txtFIELD").setFocus\n'
+        'session.findById("wnd[0]/usr/txtFIELD").text = "A"\n'
+        , optimized=False)
+
+    plan.run(sap)
+
+    assert engine.session.find('wnd[0]/usr/txtFIELD')._properties['text'] == 'A'
+
+def test_actions_that_go_to_the_server_are_not_repeated():
+    presses = []
+
+    def on_action(session, element, action, args):
+        if action == 'Press':
+            presses.append(element._name)
+            raise Exception('Fill in all required entry fields')
+
+    engine = FakeEngine(on_action=on_action)
+    engine.session.set_screen(engine.element('txtFIELD', 'GuiTextField'), engine.element('btnSAVE', 'GuiButton'))
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    plan = compile_recording(
+        'session.findById("wnd[0]/usr/btnSAVE").setFocus\n'
+        'session.findById("wnd[0]/usr/btnSAVE").press\n'
+        , optimized=False)
+
+    with pytest.raises(Exception, match='required entry fields'):
+        plan.run(sap)
+    assert presses == ['btnSAVE']
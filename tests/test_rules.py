@@ -0,0 +1,128 @@
+from threading import Thread
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.rules import LOGON_RULES, Rule, RuleEngine
+from sapguipy.models.exceptions import ScreenRuleError, RetryRequested
+from sapguipy.testing import FakeEngine
+
+
+def _popup_engine(close_popups: bool = True, **options) -> FakeEngine:
+    """FakeEngine whose popups close when their 'btn[0]' is pressed, like SAP's confirmations."""
+    def on_action(session, element, action, args):
+        window = element._parent._parent if element._parent is not None else None
+        if not close_popups or action != 'Press' or element._name != 'btn[0]' or window is None or window._name == 'wnd[0]':
+            return
+        session.close_popup()
+        if window.find('usr/lblRSYST-NCODE_TEXT') is not None:
+            session.open_popup(engine.element('txtMESSTXT1', 'GuiTextField', text='Password changed'), title='Information')
+
+    engine = FakeEngine(on_action=on_action, **options)
+    return engine
+
+def _sap(engine: FakeEngine, pwd: str = 'pwd') -> SapGui:
+    return SapGui(sid='PRD', user='USR', pwd=pwd, mandante='900').attach(engine.application)
+
+def _multi_logon_popup(engine: FakeEngine):
+    return engine.session.open_popup(
+        engine.element('radMULTI_LOGON_OPT1', 'GuiRadioButton', Selected=False),
+        engine.element('radMULTI_LOGON_OPT2', 'GuiRadioButton', Selected=False),
+        title='License Information for Multiple Logons'
+        )
+
+
+def test_wrong_password_raises():
+    engine = FakeEngine(logged=False, password='right')
+    sap = _sap(engine, pwd='wrong')
+
+    with pytest.raises(ValueError, match='Failed to login with the provided credentials'):
+        sap.login()
+
+def test_right_password_logs_in():
+    engine = FakeEngine(logged=False, password='pwd')
+    sap = _sap(engine)
+    sap.login()
+
+    assert sap.get_user_logged() == 'USR'
+
+def test_the_multiple_logon_popup_is_handled():
+    engine = _popup_engine()
+    sap = _sap(engine)
+    popup = _multi_logon_popup(engine)
+
+    state = sap.check_screen(LOGON_RULES)
+
+    assert popup.find('usr/radMULTI_LOGON_OPT1')._properties['selected'] is True
+    assert engine.session.ActiveWindow.Id.endswith('wnd[0]')
+    assert state.applied == {'multiple logon': 1}
+    assert state.popups == []
+
+def test_attach_handles_the_logon_popups():
+    engine = _popup_engine()
+    _multi_logon_popup(engine)
+
+    sap = _sap(engine)
+
+    assert sap.logged
+    assert engine.session.ActiveWindow.Id.endswith('wnd[0]')
+
+def test_password_change_and_information_popup():
+    engine = _popup_engine()
+    sap = _sap(engine)
+    engine.session.open_popup(
+        engine.element('lblRSYST-NCODE_TEXT', 'GuiLabel'),
+        engine.element('pwdRSYST-NCODE', 'GuiPasswordField'),
+        engine.element('pwdRSYST-NCOD2', 'GuiPasswordField'),
+        title='Change Password'
+        )
+
+    state = sap.check_screen(LOGON_RULES)
+
+    assert sap.new_pwd
+    assert state.applied == {'password change': 1, 'information popup': 1}
+    assert engine.session.ActiveWindow.Id.endswith('wnd[0]')
+
+def test_max_rounds_raises_screen_rule_error():
+    engine = _popup_engine(close_popups=False)
+    sap = _sap(engine)
+    engine.session.open_popup(engine.element('txtMESSTXT1', 'GuiTextField', text='Stuck'), title='Information')
+
+    with pytest.raises(ScreenRuleError, match='after 10 rounds'):
+        sap.check_screen(LOGON_RULES)
+    assert engine.stats.by_name()['Press'] == 10
+
+def test_applied_counts_belong_to_each_check():
+    engines = [_popup_engine() for _ in range(4)]
+    saps = [_sap(engine) for engine in engines]
+    states = [None] * len(saps)
+
+    def check(index):
+        _multi_logon_popup(engines[index])
+        states[index] = saps[index].check_screen(LOGON_RULES)
+
+    threads = [Thread(target=check, args=(index,)) for index in range(len(saps))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [state.applied for state in states] == [{'multiple logon': 1}] * len(saps)
+    assert saps[0].check_screen(LOGON_RULES).applied == {}
+
+def test_run_retries_the_action_when_a_retry_rule_matches():
+    engine = FakeEngine()
+    sap = _sap(engine)
+    rules = RuleEngine([Rule('retry', message_id='M3', message_number='897', name='locked')])
+    calls = []
+
+    def action(sap):
+        calls.append(len(calls))
+        if len(calls) < 3:
+            engine.session.find('wnd[0]/sbar').set_message('Material is locked', 'E', 'M3', '897')
+        else:
+            engine.session.find('wnd[0]/sbar').set_message()
+        return len(calls)
+
+    assert rules.run(sap, action, retries=2) == 3
+    calls.clear()
+    with pytest.raises(RetryRequested, match='locked'):
+        rules.run(sap, action, retries=0)
@@ -0,0 +1,65 @@
+import json
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.models.exceptions import ElementNotFound
+from sapguipy.models.screen import diff_screens, flatten_screen
+from sapguipy.testing import FakeEngine
+
+
+def _sap(engine: FakeEngine) -> SapGui:
+    return SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+
+
+def test_dump_screen_returns_a_compact_tree():
+    engine = FakeEngine()
+    engine.session.set_screen(engine.element('txtMATNR', 'GuiTextField', text='M1', Changeable=False))
+    tree = _sap(engine).dump_screen()
+
+    assert tree['id'] == 'wnd[0]'
+    assert tree['type'] == 'GuiMainWindow'
+    assert [child['id'] for child in tree['children']] == ['wnd[0]/tbar[0]', 'wnd[0]/titl', 'wnd[0]/usr', 'wnd[0]/sbar']
+    field = flatten_screen(tree)['wnd[0]/usr/txtMATNR']
+    assert field == {
+        'id': 'wnd[0]/usr/txtMATNR', 'type': 'GuiTextField', 'name': 'txtMATNR', 'text': 'M1',
+        'left': 0, 'top': 0, 'width': 10, 'height': 1, 'changeable': False,
+        }
+    # Textos vazios ficam de fora.
+    assert 'text' not in flatten_screen(tree)['wnd[0]/tbar[0]/okcd']
+    assert json.loads(json.dumps(tree)) == tree
+
+def test_dump_screen_depth():
+    engine = FakeEngine()
+    sap = _sap(engine)
+
+    assert 'children' not in sap.dump_screen(depth=0)
+    assert all('children' not in child for child in sap.dump_screen(depth=1)['children'])
+    assert len(flatten_screen(sap.dump_screen('wnd[0]/tbar[0]'))) == 3
+    with pytest.raises(ElementNotFound):
+        sap.dump_screen('wnd[1]')
+
+def test_diff_screens_reports_added_removed_and_changed_elements():
+    engine = FakeEngine()
+    sap = _sap(engine)
+    engine.session.set_screen(
+        engine.element('txtMATNR', 'GuiTextField', text='M1'),
+        engine.element('txtMENGE', 'GuiTextField', text='10'),
+        )
+    before = sap.dump_screen()
+
+    engine.session.set_screen(
+        engine.element('txtMATNR', 'GuiTextField', text='M2', Changeable=False),
+        engine.element('lblMAKTX', 'GuiLabel', text='Screw'),
+        )
+    engine.session.find('wnd[0]/sbar').set_message('Material M2 changed', 'S')
+    after = sap.dump_screen()
+
+    assert diff_screens(before, after) == {
+        'added': ['wnd[0]/usr/lblMAKTX'],
+        'removed': ['wnd[0]/usr/txtMENGE'],
+        'changed': {
+            'wnd[0]/usr/txtMATNR': {'text': ('M1', 'M2'), 'changeable': (True, False)},
+            'wnd[0]/sbar': {'text': (None, 'Material M2 changed')},
+            'wnd[0]/sbar/pane[0]': {'text': (None, 'Material M2 changed')},
+            },
+        }
+    assert diff_screens(after, after) == {'added': [], 'removed': [], 'changed': {}}
@@ -0,0 +1,61 @@
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.models import sap_controls
+from sapguipy.testing import FakeEngine
+
+PROPERTIES = ('Id', 'Type', 'Text', 'DefaultTooltip', 'IconName')
+
+
+@pytest.fixture(autouse=True)
+def missing_properties(monkeypatch):
+    """Starts every test with an empty per-type memo."""
+    memo = {}
+    monkeypatch.setattr(sap_controls, '_MISSING_PROPERTIES', memo)
+    return memo
+
+
+def _sap():
+    engine = FakeEngine()
+    engine.session.set_screen(
+        *[engine.element(f'lblTEXT{index}', 'GuiLabel', text=f'Label {index}') for index in range(3)],
+        engine.element('txtMATNR', 'GuiTextField', text='M1', IconName='S_B_DETL'),
+        )
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    return engine, sap
+
+
+def test_snapshot_reads_each_property_once():
+    engine, sap = _sap()
+    field = sap.find_by_id('wnd[0]/usr/txtMATNR')
+    engine.stats.reset()
+
+    snapshot = field.snapshot(PROPERTIES)
+
+    assert snapshot.as_dict() == {
+        'Id': '/app/con[0]/ses[0]/wnd[0]/usr/txtMATNR', 'Type': 'GuiTextField',
+        'Text': 'M1', 'DefaultTooltip': None, 'IconName': 'S_B_DETL',
+        }
+    assert snapshot.Text == snapshot['Text'] == 'M1'
+    assert engine.stats.total == len(PROPERTIES)
+    with pytest.raises(AttributeError):
+        snapshot.Text = 'M2'
+
+def test_missing_properties_are_remembered_per_type(missing_properties):
+    engine, sap = _sap()
+    children = sap.find_by_id('wnd[0]/usr').list_children()
+    engine.stats.reset()
+
+    snapshots = children.snapshot(PROPERTIES)
+
+    assert [snapshot.Text for snapshot in snapshots] == ['Label 0', 'Label 1', 'Label 2', 'M1']
+    assert all(snapshot.IconName is None for snapshot in snapshots[:3])
+    assert missing_properties == {'GuiLabel': {'DefaultTooltip', 'IconName'}, 'GuiTextField': {'DefaultTooltip'}}
+    calls = engine.stats.by_name()
+    # Só o primeiro rótulo tenta as propriedades que GuiLabel não tem.
+    assert calls['IconName'] == 2
+    assert calls['DefaultTooltip'] == 2
+
+    engine.stats.reset()
+    children.snapshot(PROPERTIES)
+    assert engine.stats.by_name()['IconName'] == 1
+    assert engine.stats.by_name()['DefaultTooltip'] == 0
@@ -0,0 +1,121 @@
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.models.sap_controls import GuiTableControl
+from sapguipy.testing import FakeEngine
+
+FIELDS = ['VBAP-POSNR', 'VBAP-MATNR', 'VBAP-KWMENG']
+
+
+def _table(rows: list, visible_rows: int = 10, row_count: int = None):
+    """Returns (engine, wrapper of the table control, scroll positions sent to the server)."""
+    scrolls = []
+
+    def on_action(session, element, action, args):
+        if action == 'Scroll':
+            scrolls.append(args[0])
+
+    engine = FakeEngine(on_action=on_action)
+    fake = engine.table_control('tblSAPMV45ATCTRL_U_ERF_AUFTRAG', FIELDS, rows, visible_rows=visible_rows, row_count=row_count)
+    engine.session.set_screen(fake, transaction='VA01')
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    return engine, sap.find_by_id('wnd[0]/usr/tblSAPMV45ATCTRL_U_ERF_AUFTRAG'), scrolls
+
+def _rows(count: int) -> list:
+    return [[f'{(row + 1) * 10:06d}', f'M-{row:03d}', str(row)] for row in range(count)]
+
+
+def test_read_table_pages_through_the_scrollbar():
+    engine, table, scrolls = _table(_rows(23))
+
+    assert isinstance(table, GuiTableControl)
+    frame = table.read_table()
+
+    # 23 linhas preenchidas mais uma página de linhas de entrada vazias.
+    assert len(frame) == 33
+    assert list(frame.columns) == FIELDS
+    assert frame.index.tolist() == list(range(33))
+    assert frame.loc[22, 'VBAP-MATNR'] == 'M-022'
+    assert frame.loc[23, 'VBAP-MATNR'] == ''
+    # A última página para no máximo da barra de rolagem (33 - 10) sem repetir linhas.
+    assert scrolls == [10, 20, 23]
+    assert [page['rows'] for page in table.page_timings] == [10, 10, 10, 3]
+
+def test_stop_at_empty_row_ends_at_the_blank_entry_rows():
+    engine, table, scrolls = _table(_rows(23))
+    # Os nomes das colunas são lidos uma vez por objeto.
+    assert table.columns == FIELDS
+
+    engine.stats.reset()
+    frame = table.read_table(columns=['VBAP-MATNR', 'VBAP-KWMENG'], stop_at_empty_row=True)
+
+    assert len(frame) == 23
+    assert frame['VBAP-MATNR'].tolist() == [f'M-{row:03d}' for row in range(23)]
+    assert scrolls == [10, 20]
+    # Cada linha lida custa um GetCell e um Text por coluna, mais a linha vazia que encerra a leitura.
+    assert engine.stats.by_name()['GetCell'] == (23 + 1) * 2
+
+def test_iter_rows_reads_a_page_at_a_time():
+    _, table, scrolls = _table(_rows(23))
+    rows = table.iter_rows(columns=[1], stop_at_empty_row=True)
+
+    assert [next(rows) for _ in range(10)] == [(f'M-{row:03d}',) for row in range(10)]
+    assert scrolls == []
+    assert next(rows) == ('M-010',)
+    assert scrolls == [10]
+
+def test_iter_table_indexes_the_chunks_by_absolute_row():
+    _, table, _ = _table(_rows(23))
+
+    chunks = list(table.iter_table(chunk_rows=8, stop_at_empty_row=True))
+
+    assert [chunk.index.tolist() for chunk in chunks] == [list(range(0, 8)), list(range(8, 16)), list(range(16, 23))]
+
+
+def test_write_rows_fills_the_table_control_page_by_page():
+    engine, table, scrolls = _table([], visible_rows=5, row_count=20)
+    rows = [{'VBAP-MATNR': f'M-{row:03d}', 'VBAP-KWMENG': str(row + 1)} for row in range(12)]
+    rows[3]['VBAP-KWMENG'] = None
+
+    timings = table.write_rows(rows, start_row=2)
+
+    written = engine.session.find('wnd[0]/usr/tblSAPMV45ATCTRL_U_ERF_AUFTRAG').rows()
+    assert [row[1:] for row in written[2:14]] == [[f'M-{row:03d}', '' if row == 3 else str(row + 1)] for row in range(12)]
+    assert written[:2] == [['', '', ''], ['', '', '']]
+    # Cada página é enviada ao servidor pela rolagem; a última fica na tela para ser confirmada.
+    assert scrolls == [2, 7, 12]
+    assert [(page['first_row'], page['rows'], page['cells']) for page in timings] == [(2, 5, 9), (7, 5, 10), (12, 2, 4)]
+
+
+def _grid(rows: int = 6, visible_rows: int = 3):
+    engine = FakeEngine()
+    data = {'MATNR': [f'M-{row:03d}' for row in range(rows)], 'MENGE': [''] * rows, 'WERKS': ['1000'] * rows}
+    fake = engine.grid('shell', data, visible_rows=visible_rows, strict_scrolling=True)
+    engine.session.set_screen(engine.element('cntlGRID', 'GuiCustomControl', children=[engine.element('shellcont', 'GuiContainerShell', children=[fake])]))
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    return engine, fake, sap.find_by_id('wnd[0]/usr/cntlGRID/shellcont/shell')
+
+def test_write_rows_modifies_the_grid_and_triggers_one_round_trip():
+    from pandas import DataFrame
+
+    engine, fake, grid = _grid()
+    frame = DataFrame({'MENGE': [10.0, None, 30.0, 40.0, 50.0], 'WERKS': ['2000', '2000', None, '2000', '2000']})
+
+    engine.stats.reset()
+    timings = grid.write_rows(frame, start_row=1)
+
+    assert fake._data['MENGE'] == ['', '10.0', '', '30.0', '40.0', '50.0']
+    assert fake._data['WERKS'] == ['1000', '2000', '2000', '1000', '2000', '2000']
+    assert fake._data['MATNR'] == [f'M-{row:03d}' for row in range(6)]
+    calls = engine.stats.by_name()
+    assert calls['ModifyCell'] == 8
+    assert calls['TriggerModified'] == 1
+    # A grade só aceita células da página visível: rola uma página por vez.
+    assert [(page['first_row'], page['rows']) for page in timings] == [(1, 3), (4, 2)]
+    assert fake._first_visible_row == 4
+
+def test_write_rows_rejects_rows_beyond_the_grid():
+    engine, fake, grid = _grid(rows=2)
+
+    with pytest.raises(ValueError, match='has 2 rows'):
+        grid.write_rows([['x'], ['y'], ['z']], columns=['MENGE'])
+    assert engine.stats.by_name()['TriggerModified'] == 0
@@ -0,0 +1,87 @@
+from sapguipy.sap import SapGui
+from sapguipy.models.sap_controls import GuiTree
+from sapguipy.testing import FakeEngine
+
+NODES = [
+    {'key': 'R', 'text': 'Plant 1000', 'items': {'QTY': '30'}, 'children': [
+        {'key': 'A', 'text': 'Storage 0001', 'items': {'QTY': '10'}},
+        {'key': 'B', 'text': 'Storage 0002', 'items': {'QTY': '20'}, 'lazy': True, 'children': [
+            {'key': 'B1', 'text': 'Bin 01', 'items': {'QTY': '5'}},
+            {'key': 'B2', 'text': 'Bin 02', 'items': {'QTY': '15'}},
+            ]},
+        ]},
+    {'key': 'C', 'text': 'Plant 2000', 'items': {'QTY': '0'}},
+    ]
+
+
+def _tree():
+    engine = FakeEngine()
+    fake = engine.tree('shell', NODES, columns=['QTY'])
+    # A raiz já aparece aberta, como nas transações que mostram a árvore expandida no primeiro nível.
+    fake._expanded.add('R')
+    engine.session.set_screen(engine.element('cntlTREE', 'GuiCustomControl', children=[fake]))
+    sap = SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900').attach(engine.application)
+    return engine, fake, sap.find_by_id('wnd[0]/usr/cntlTREE/shell')
+
+def test_tree_shells_are_wrapped_as_gui_tree():
+    _, _, tree = _tree()
+
+    assert isinstance(tree, GuiTree)
+    assert tree.column_names == ['QTY']
+
+def test_iter_nodes_expands_lazy_folders_once():
+    engine, fake, tree = _tree()
+
+    nodes = list(tree.iter_nodes())
+
+    assert [(node['key'], node['parent'], node['level'], node['QTY']) for node in nodes] == [
+        ('R', None, 0, '30'), ('A', 'R', 1, '10'), ('B', 'R', 1, '20'),
+        ('B1', 'B', 2, '5'), ('B2', 'B', 2, '15'), ('C', None, 0, '0'),
+        ]
+    assert fake._expand_count == 1
+
+    engine.stats.reset()
+    assert [node['key'] for node in tree.iter_nodes()] == ['R', 'A', 'B', 'B1', 'B2', 'C']
+    assert fake._expand_count == 1
+    assert engine.stats.by_name()['ExpandNode'] == 0
+
+def test_iter_nodes_without_expand_reads_only_the_loaded_nodes():
+    _, fake, tree = _tree()
+
+    assert [node['key'] for node in tree.iter_nodes(expand=False)] == ['R', 'A', 'B', 'C']
+    assert fake._expand_count == 0
+
+def test_iter_nodes_of_a_subtree():
+    _, _, tree = _tree()
+
+    nodes = list(tree.iter_nodes('B', columns=[]))
+
+    assert nodes == [
+        {'key': 'B', 'parent': 'R', 'level': 1, 'text': 'Storage 0002'},
+        {'key': 'B1', 'parent': 'B', 'level': 2, 'text': 'Bin 01'},
+        {'key': 'B2', 'parent': 'B', 'level': 2, 'text': 'Bin 02'},
+        ]
+
+def test_read_tree_returns_a_flat_dataframe():
+    _, _, tree = _tree()
+
+    frame = tree.read_tree()
+
+    assert list(frame.columns) == ['key', 'parent', 'level', 'text', 'QTY']
+    assert frame['key'].tolist() == ['R', 'A', 'B', 'B1', 'B2', 'C']
+    assert frame.loc[3, 'parent'] == 'B'
+    assert frame['level'].tolist() == [0, 1, 1, 2, 2, 0]
+
+def test_to_dict_nests_the_children():
+    _, fake, tree = _tree()
+
+    roots = tree.to_dict(columns=[])
+
+    assert [root['key'] for root in roots] == ['R', 'C']
+    assert [child['key'] for child in roots[0]['children']] == ['A', 'B']
+    assert roots[0]['children'][1]['children'] == [
+        {'key': 'B1', 'level': 2, 'text': 'Bin 01', 'children': []},
+        {'key': 'B2', 'level': 2, 'text': 'Bin 02', 'children': []},
+        ]
+    assert roots[1]['children'] == []
+    assert fake._expand_count == 1
@@ -0,0 +1,97 @@
+from time import monotonic, sleep
+import pytest
+from sapguipy.sap import SapGui
+from sapguipy.backends import Backend
+from sapguipy.models.exceptions import ConnectionLost
+from sapguipy.testing import FakeEngine
+
+
+class _CrashDialogBackend(Backend):
+    """Backend whose desktop shows the crash dialog of SAP GUI."""
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.closed = []
+
+    def find_windows(self, title: str) -> list:
+        if self.fail:
+            raise Exception('The desktop is locked.')
+        return [title]
+
+    def close_window(self, window):
+        self.closed.append(window)
+
+
+def _sap(engine: FakeEngine, backend: Backend = None) -> SapGui:
+    return SapGui(sid='PRD', user='USR', pwd='pwd', mandante='900', backend=backend).attach(engine.application)
+
+
+def test_a_crash_is_detected_and_reported_to_the_callbacks():
+    engine = FakeEngine()
+    backend = _CrashDialogBackend()
+    sap = _sap(engine, backend)
+    calls = []
+    monitor = sap.start_monitor(interval=0.02, callbacks=[lambda sap, error: calls.append((sap, error))])
+
+    assert monitor.running
+    engine.crash()
+
+    assert monitor.lost.wait(2)
+    assert not sap.logged
+    assert 'RPC server is unavailable' in str(monitor.error)
+    assert calls == [(sap, monitor.error)]
+    assert backend.closed == ['SAP GUI for Windows 800']
+    with pytest.raises(ConnectionLost, match='RPC server is unavailable'):
+        sap.find_by_id('wnd[0]')
+
+def test_errors_of_the_callbacks_are_collected():
+    engine = FakeEngine()
+    sap = _sap(engine, _CrashDialogBackend(fail=True))
+    calls = []
+
+    def failing(sap, error):
+        raise ValueError('callback failed')
+
+    monitor = sap.start_monitor(interval=0.02, callbacks=[failing, lambda sap, error: calls.append(error)])
+    engine.crash()
+
+    assert monitor.lost.wait(2)
+    monitor.stop()
+    assert len(calls) == 1
+    assert [str(error) for error in monitor.callback_errors] == ['The desktop is locked.', 'callback failed']
+
+def test_a_healthy_session_is_not_reported():
+    engine = FakeEngine()
+    sap = _sap(engine)
+    monitor = sap.start_monitor(interval=0.02)
+
+    assert not monitor.lost.wait(0.2)
+    sap.stop_monitor()
+    assert not monitor.running
+    assert sap.logged
+
+def test_quit_stops_the_monitor_before_closing():
+    engine = FakeEngine()
+    sap = _sap(engine)
+    window = sap.new_window()
+    monitor = window.start_monitor(interval=0.02)
+
+    window.quit()
+
+    assert not monitor.running
+    assert not monitor.lost.is_set()
+
+def test_interrupt_raises_in_the_thread_that_started_the_monitor():
+    engine = FakeEngine()
+    sap = _sap(engine)
+    monitor = sap.start_monitor(interval=0.02, interrupt=True)
+    engine.crash()
+
+    try:
+        with pytest.raises(ConnectionLost):
+            # Operação longa em Python: a exceção chega na próxima instrução.
+            deadline = monotonic() + 5
+            while monotonic() < deadline:
+                sleep(0.01)
+    finally:
+        monitor.stop()
+    assert monitor.lost.is_set()